@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import threading
+
+from app.services.event_service import EventService
+from app.services.ingest_queue import IngestQueue
+from app.services.ingest_service import BulkIngestService
+from app.services.memory_service import MemoryService
+
+
+_lock = threading.Lock()
+_memory_svc: MemoryService | None = None
+_event_svc = EventService()
+_ingest_queue = IngestQueue()
+
+
+def get_memory_service() -> MemoryService:
+    """
+    I build MemoryService once per process, on first use, and share it across all routers
+    (so the embedding model, Qdrant client and Nebula pool exist only once per worker).
+    """
+    global _memory_svc
+
+    if _memory_svc is not None:
+        return _memory_svc
+
+    with _lock:
+        if _memory_svc is None:
+            _memory_svc = MemoryService()
+    return _memory_svc
+
+
+def flush_services() -> None:
+    """
+    I push out writes that long-lived services still buffer (the KG batch writer).
+    """
+    with _lock:
+        svc = _memory_svc
+    if svc is not None:
+        svc.kg.flush()
+
+
+def close_services() -> None:
+    """
+    I release long-lived clients on shutdown (only the ones that were actually built).
+    """
+    with _lock:
+        svc = _memory_svc
+    if svc is not None:
+        svc.kg.close()
+        svc.llm.close()
+
+
+async def aclose_services() -> None:
+    """
+    I release clients bound to the app's event loop (the LLM's async HTTP client) on shutdown.
+    """
+    with _lock:
+        svc = _memory_svc
+    if svc is not None:
+        await svc.llm.aclose()
+
+
+def get_event_service() -> EventService:
+    return _event_svc
+
+
+def get_bulk_ingest_service() -> BulkIngestService:
+    return BulkIngestService(get_memory_service(), _event_svc)
+
+
+def get_ingest_queue() -> IngestQueue:
+    return _ingest_queue
@@ -4,10 +4,16 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
+from app.api.deps import get_bulk_ingest_service, get_event_service, get_ingest_queue, get_memory_service
+from app.core.config import settings
+from app.core.executors import run_blocking
 from app.db.session import get_db
-from app.schemas.event import EventCreate, EventOut
+from app.models.memory import Memory
+from app.schemas.event import BulkEventsIn, BulkEventsOut, EventCreate, EventOut, EventStatusOut
 from app.schemas.memory import MemoryOut
 from app.services.event_service import EventService
+from app.services.ingest_queue import IngestQueue
+from app.services.ingest_service import BulkIngestService
 from app.services.memory_service import MemoryService
 
 
@@ -15,15 +21,32 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix='/v1/events', tags=['events'])
 
-event_svc = EventService()
-memory_svc = MemoryService()
-
 USER_ACTOR = os.getenv('USER_ACTOR', 'user').strip()
 SYS_ACTOR = os.getenv('SYSTEM_ACTOR', 'system').strip()
 
 
+def _queue_event(db: Session, event_svc: EventService, ingest_queue: IngestQueue, payload: EventCreate):
+    # event + job in one transaction; background workers do the LLM/vector/KG work.
+    try:
+        evt = event_svc.create_event(db, payload, commit=False)
+        ingest_queue.enqueue(db, evt.id)
+        db.commit()
+        db.refresh(evt)
+    except Exception:
+        db.rollback()
+        logger.exception('Failed to queue event for async processing')
+        raise
+    return evt
+
+
 @router.post('', response_model=EventOut)
-def create_event(payload: EventCreate, db: Session = Depends(get_db)) -> EventOut:
+async def create_event(
+    payload: EventCreate,
+    db: Session = Depends(get_db),
+    event_svc: EventService = Depends(get_event_service),
+    memory_svc: MemoryService = Depends(get_memory_service),
+    ingest_queue: IngestQueue = Depends(get_ingest_queue),
+) -> EventOut:
     logger.debug(
         'POST /v1/events called',
         extra={
@@ -34,45 +57,70 @@ def create_event(payload: EventCreate, db: Session = Depends(get_db)) -> EventOu
         },
     )
 
-    evt = event_svc.create_event(db, payload)
+    if settings.async_ingest:
+        evt = await run_blocking('db', _queue_event, db, event_svc, ingest_queue, payload)
+
+        logger.debug(
+            'POST /v1/events queued for async processing',
+            extra={'event_id': evt.id},
+        )
+        return EventOut.model_validate(evt).model_copy(update={'processing_status': 'pending'})
+
+    # event + memories + duplicate bumps in one transaction; a failed write leaves nothing behind
+    evt, memories = await memory_svc.aingest_event(db, payload, event_svc=event_svc)
+
+    # the commit expired evt: reload it (id, created_at) off the event loop, and only then log
+    out = await run_blocking('db', EventOut.model_validate, evt)
 
     logger.debug(
-        'Event created; processing to memories',
-        extra={'event_id': getattr(evt, 'id', None)},
+        'POST /v1/events completed',
+        extra={'event_id': out.id, 'memories_written': len(memories)},
     )
+    return out
 
-    try:
-        memory_svc.process_event_to_memories(db, evt)
-    except Exception:
-        run_llm_tests = os.getenv('RUN_LLM_TESTS', 'false').lower() in ('1', 'true', 'yes')
 
-        logger.exception(
-            'process_event_to_memories failed in create_event',
-            extra={
-                'event_id': getattr(evt, 'id', None),
-                'RUN_LLM_TESTS': run_llm_tests,
-            },
+@router.post(':bulk', response_model=BulkEventsOut)
+async def create_events_bulk(
+    payload: BulkEventsIn,
+    db: Session = Depends(get_db),
+    ingest_svc: BulkIngestService = Depends(get_bulk_ingest_service),
+) -> BulkEventsOut:
+    logger.debug(
+        'POST /v1/events:bulk called',
+        extra={'events': len(payload.events)},
+    )
+
+    if len(payload.events) > settings.bulk_max_events:
+        raise HTTPException(
+            status_code=413,
+            detail=f'too many events: {len(payload.events)} > {settings.bulk_max_events}',
         )
 
-        # do NOT hide LLM issues during integration tests.
-        if run_llm_tests:
-            raise
-            
+    result = await run_blocking('ingest', ingest_svc.ingest, db, payload.events)
+
     logger.debug(
-        'POST /v1/events completed',
-        extra={'event_id': getattr(evt, 'id', None)},
+        'POST /v1/events:bulk completed',
+        extra={
+            'processed': result.processed,
+            'failed': result.failed,
+            'events_per_s': result.events_per_s,
+        },
     )
-    return evt
+    return result
 
 
 @router.get('/{event_id}', response_model=EventOut)
-def get_event(event_id: int, db: Session = Depends(get_db)) -> EventOut:
+async def get_event(
+    event_id: int,
+    db: Session = Depends(get_db),
+    event_svc: EventService = Depends(get_event_service),
+) -> EventOut:
     logger.debug(
         'GET /v1/events/{event_id} called',
         extra={'event_id': event_id},
     )
 
-    evt = event_svc.get_event(db, event_id)
+    evt = await run_blocking('db', event_svc.get_event, db, event_id)
     if not evt:
         logger.debug(
             'Event not found',
@@ -87,14 +135,52 @@ def get_event(event_id: int, db: Session = Depends(get_db)) -> EventOut:
     return evt
 
 
+@router.get('/{event_id}/status', response_model=EventStatusOut)
+async def get_event_status(
+    event_id: int,
+    db: Session = Depends(get_db),
+    event_svc: EventService = Depends(get_event_service),
+    ingest_queue: IngestQueue = Depends(get_ingest_queue),
+) -> EventStatusOut:
+    evt = await run_blocking('db', event_svc.get_event, db, event_id)
+    if not evt:
+        raise HTTPException(status_code=404, detail='event not found')
+
+    job, memories = await run_blocking('db', _status_rows, db, ingest_queue, event_id)
+
+    # no job row means the event was processed inline (sync mode)
+    return EventStatusOut(
+        event_id=event_id,
+        status=job.status if job else 'done',
+        attempts=job.attempts if job else 0,
+        error=job.last_error if job else None,
+        memories=[MemoryOut.model_validate(m) for m in memories],
+    )
+
+
+def _memories_out(memories: list[Memory]) -> list[MemoryOut]:
+    return [MemoryOut.model_validate(m) for m in memories]
+
+
+def _status_rows(db: Session, ingest_queue: IngestQueue, event_id: int):
+    job = ingest_queue.get_for_event(db, event_id)
+    memories = db.query(Memory).filter(Memory.event_id == event_id).order_by(Memory.id).all()
+    return job, memories
+
+
 @router.post('/{event_id}/process', response_model=list[MemoryOut])
-def process_event(event_id: int, db: Session = Depends(get_db)) -> list[MemoryOut]:
+async def process_event(
+    event_id: int,
+    db: Session = Depends(get_db),
+    event_svc: EventService = Depends(get_event_service),
+    memory_svc: MemoryService = Depends(get_memory_service),
+) -> list[MemoryOut]:
     logger.debug(
         'POST /v1/events/{event_id}/process called',
         extra={'event_id': event_id},
     )
 
-    evt = event_svc.get_event(db, event_id)
+    evt = await run_blocking('db', event_svc.get_event, db, event_id)
     if not evt:
         logger.debug(
             'Event not found for processing',
@@ -103,7 +189,7 @@ def process_event(event_id: int, db: Session = Depends(get_db)) -> list[MemoryOu
         raise HTTPException(status_code=404, detail='event not found')
 
     try:
-        result = memory_svc.process_event_to_memories(db, evt)
+        result = await memory_svc.aprocess_event_to_memories(db, evt)
     except Exception:
         logger.exception(
             'process_event_to_memories failed in /process endpoint',
@@ -118,4 +204,4 @@ def process_event(event_id: int, db: Session = Depends(get_db)) -> list[MemoryOu
             'memories_written': len(result),
         },
     )
-    return result
+    return await run_blocking('db', _memories_out, result)
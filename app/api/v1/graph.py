@@ -1,21 +1,27 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
-from app.api.v1.events import memory_svc  # I reuse the singleton so it shares KG client
+from app.api.deps import get_memory_service  # shared singleton so it shares KG client
+from app.core.executors import run_blocking
+from app.services.memory_service import MemoryService
 
 
 router = APIRouter(prefix='/v1/graph', tags=['graph'])
 
 
 @router.get('/nodes/{node_id}')
-def get_node(node_id: str):
-    n = memory_svc.kg.graph.get_node(node_id)
+async def get_node(node_id: str, memory_svc: MemoryService = Depends(get_memory_service)):
+    n = await run_blocking('graph', memory_svc.kg.graph.get_node, node_id)
     if not n:
         raise HTTPException(status_code=404, detail='node not found')
     return n
 
 
 @router.get('/neighbors/{node_id}')
-def neighbors(node_id: str, edge_type: str | None = None):
-    return memory_svc.kg.graph.neighbors(node_id, edge_type=edge_type)
+async def neighbors(
+    node_id: str,
+    edge_type: str | None = None,
+    memory_svc: MemoryService = Depends(get_memory_service),
+):
+    return await run_blocking('graph', memory_svc.kg.graph.neighbors, node_id, edge_type=edge_type)
@@ -1,10 +1,16 @@
 import logging
+from typing import Iterator, Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import RowMapping
 from sqlalchemy.orm import Session
 
+from app.api.deps import get_memory_service
+from app.core.config import settings
+from app.core.executors import run_blocking
 from app.db.session import get_db
-from app.schemas.memory import MemoryCreate, MemoryOut
+from app.schemas.memory import MemoryCreate, MemoryListItemOut, MemoryOut, MemorySearchHit, MemorySearchIn
 from app.services.memory_service import MemoryService
 
 
@@ -12,11 +18,13 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix='/v1/memories', tags=['memories'])
 
-memory_svc = MemoryService()
-
 
 @router.post('', response_model=MemoryOut)
-def create_memory(payload: MemoryCreate, db: Session = Depends(get_db)) -> MemoryOut:
+async def create_memory(
+    payload: MemoryCreate,
+    db: Session = Depends(get_db),
+    memory_svc: MemoryService = Depends(get_memory_service),
+) -> MemoryOut:
     logger.debug(
         'POST /v1/memories called',
         extra={
@@ -29,7 +37,7 @@ def create_memory(payload: MemoryCreate, db: Session = Depends(get_db)) -> Memor
     )
 
     try:
-        mem = memory_svc.create_memory(db, payload)
+        mem = await run_blocking('db', memory_svc.create_memory, db, payload)
     except Exception:
         logger.exception(
             'Failed to create memory via API',
@@ -48,22 +56,53 @@ def create_memory(payload: MemoryCreate, db: Session = Depends(get_db)) -> Memor
     return mem
 
 
-@router.get('', response_model=list[MemoryOut])
-def list_memories(
+@router.get('', response_model=list[MemoryListItemOut], response_model_exclude_unset=True)
+async def list_memories(
+    response: Response,
     scope: str | None = None,
     type: str | None = None,
+    cursor: int | None = Query(default=None, ge=1, description='X-Next-Cursor from the previous page'),
+    limit: int = Query(default=settings.memories_page_default, ge=1, le=settings.memories_page_max),
+    include_value: bool = True,
+    format: Literal['json', 'ndjson'] = 'json',
     db: Session = Depends(get_db),
-) -> list[MemoryOut]:
+    memory_svc: MemoryService = Depends(get_memory_service),
+):
     logger.debug(
         'GET /v1/memories called',
         extra={
             'scope': scope,
             'type': type,
+            'cursor': cursor,
+            'limit': limit,
+            'include_value': include_value,
+            'format': format,
         },
     )
 
+    if format == 'ndjson':
+        # export mode: stream everything after `cursor`, one page-sized query at a time.
+        rows = memory_svc.iter_memories(
+            db,
+            scope=scope,
+            type=type,
+            before_id=cursor,
+            include_value=include_value,
+            page_size=limit,
+        )
+        return StreamingResponse(_ndjson_lines(rows, db), media_type='application/x-ndjson')
+
     try:
-        items = memory_svc.list_memories(db, scope=scope, type=type)
+        items, next_cursor = await run_blocking(
+            'db',
+            memory_svc.list_memories,
+            db,
+            scope=scope,
+            type=type,
+            before_id=cursor,
+            limit=limit,
+            include_value=include_value,
+        )
     except Exception:
         logger.exception(
             'Failed to list memories via API',
@@ -74,8 +113,68 @@ def list_memories(
         )
         raise
 
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+
     logger.debug(
         'GET /v1/memories completed',
-        extra={'count': len(items)},
+        extra={'count': len(items), 'next_cursor': next_cursor},
+    )
+    return [MemoryListItemOut.model_validate(dict(row)) for row in items]
+
+
+def _ndjson_lines(rows: Iterator[RowMapping], db: Session) -> Iterator[bytes]:
+    count = 0
+    try:
+        for row in rows:
+            count += 1
+            yield MemoryListItemOut.model_validate(dict(row)).model_dump_json(exclude_unset=True).encode() + b'\n'
+    except Exception:
+        logger.exception('Failed while streaming memories', extra={'count': count})
+        raise
+    finally:
+        # the request-scoped session may already be closed by the time the body streams;
+        # closing again is a no-op but releases the connection the pages re-acquired.
+        db.close()
+        logger.debug('GET /v1/memories stream completed', extra={'count': count})
+
+
+@router.post('/search', response_model=list[MemorySearchHit])
+async def search_memories(
+    payload: MemorySearchIn,
+    db: Session = Depends(get_db),
+    memory_svc: MemoryService = Depends(get_memory_service),
+) -> list[MemorySearchHit]:
+    logger.debug(
+        'POST /v1/memories/search called',
+        extra={
+            'actor_type': payload.actor_type,
+            'actor_id': payload.actor_id,
+            'type': payload.type,
+            'scope': payload.scope,
+            'k': payload.k,
+        },
+    )
+
+    try:
+        results = await run_blocking(
+            'db',
+            memory_svc.search_memories,
+            db,
+            query=payload.query,
+            actor_type=payload.actor_type,
+            actor_id=payload.actor_id,
+            type=payload.type,
+            scope=payload.scope,
+            k=payload.k,
+            min_score=payload.min_score,
+        )
+    except Exception:
+        logger.exception('Failed to search memories via API')
+        raise
+
+    logger.debug(
+        'POST /v1/memories/search completed',
+        extra={'count': len(results)},
     )
-    return items
+    return [MemorySearchHit(score=score, memory=MemoryOut.model_validate(mem)) for score, mem in results]
@@ -4,19 +4,20 @@ import logging
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
+from app.api.deps import get_event_service, get_ingest_queue, get_memory_service
+from app.core.config import settings
+from app.core.executors import run_blocking
 from app.db.session import get_db
 from app.schemas.message import MessageIn, MessageOut
 from app.schemas.event import EventCreate
 from app.services.event_service import EventService
+from app.services.ingest_queue import IngestQueue
 from app.services.memory_service import MemoryService
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix='/v1/messages', tags=['messages'])
 
-event_svc = EventService()
-memory_svc = MemoryService()
-
 USER_ACTOR = os.getenv('USER_ACTOR', 'user').strip()
 SYS_ACTOR = os.getenv('SYSTEM_ACTOR', 'system').strip()
 
@@ -31,8 +32,33 @@ def _generate_output_prompt(evt, memories) -> str | None:
     return f'Noted {len(memories)} items.'
 
 
+def _queue_message(
+    db: Session,
+    event_svc: EventService,
+    ingest_queue: IngestQueue,
+    incoming: EventCreate,
+    before_commit,
+):
+    try:
+        evt = event_svc.create_event(db, incoming, commit=False)
+        ingest_queue.enqueue(db, evt.id)
+        before_commit(evt, [])
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception('Failed to queue message for async processing')
+        raise
+    return evt
+
+
 @router.post('', response_model=MessageOut)
-def handle_message(payload: MessageIn, db: Session = Depends(get_db)) -> MessageOut:
+async def handle_message(
+    payload: MessageIn,
+    db: Session = Depends(get_db),
+    event_svc: EventService = Depends(get_event_service),
+    memory_svc: MemoryService = Depends(get_memory_service),
+    ingest_queue: IngestQueue = Depends(get_ingest_queue),
+) -> MessageOut:
     logger.debug(
         'POST /v1/messages called',
         extra={
@@ -42,34 +68,24 @@ def handle_message(payload: MessageIn, db: Session = Depends(get_db)) -> Message
         },
     )
 
-    incoming_evt = event_svc.create_event(
-        db,
-        EventCreate(
-            actor_type=USER_ACTOR,
-            actor_id=payload.actor_id,
-            text=payload.text,
-            payload=payload.payload,
-        ),
-    )
-
-    logger.debug(
-        'Incoming event created',
-        extra={'event_id': incoming_evt.id},
+    incoming = EventCreate(
+        actor_type=USER_ACTOR,
+        actor_id=payload.actor_id,
+        text=payload.text,
+        payload=payload.payload,
     )
 
-    memories = memory_svc.process_event_to_memories(db, incoming_evt)
-
-    logger.debug(
-        'Processed event to memories',
-        extra={
-            'event_id': incoming_evt.id,
-            'memories_created': len(memories),
-        },
-    )
+    incoming_id: int | None = None
+    output_text: str | None = None
 
-    output_text = _generate_output_prompt(incoming_evt, memories)
+    def add_reply(evt, memories) -> None:
+        # runs inside the incoming event's transaction: message, memories and reply commit together
+        nonlocal incoming_id, output_text
+        incoming_id = evt.id
+        output_text = _generate_output_prompt(evt, memories)
+        if not output_text:
+            return
 
-    if output_text:
         system_evt = event_svc.create_event(
             db,
             EventCreate(
@@ -77,21 +93,46 @@ def handle_message(payload: MessageIn, db: Session = Depends(get_db)) -> Message
                 actor_id='memvec',
                 text=output_text,
                 payload={
-                    'in_response_to_event_id': incoming_evt.id,
+                    'in_response_to_event_id': evt.id,
                 },
             ),
+            commit=False,
         )
 
         logger.debug(
             'System response event created',
             extra={
                 'event_id': system_evt.id,
-                'in_response_to_event_id': incoming_evt.id,
+                'in_response_to_event_id': evt.id,
+            },
+        )
+
+    processing_status: str | None = None
+    if settings.async_ingest:
+        # ack now; background workers qualify and index the message.
+        await run_blocking('db', _queue_message, db, event_svc, ingest_queue, incoming, add_reply)
+
+        memories = []
+        processing_status = 'pending'
+
+        logger.debug(
+            'Incoming event queued for async processing',
+            extra={'event_id': incoming_id},
+        )
+    else:
+        _, memories = await memory_svc.aingest_event(db, incoming, event_svc=event_svc, before_commit=add_reply)
+
+        logger.debug(
+            'Processed event to memories',
+            extra={
+                'event_id': incoming_id,
+                'memories_created': len(memories),
             },
         )
 
     return MessageOut(
-        event_id=incoming_evt.id,
+        event_id=incoming_id,
         output_text=output_text,
         memories_created=len(memories),
+        processing_status=processing_status,
     )
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import APIRouter
+
+from app.core.metrics import collect_metrics
+
+
+router = APIRouter(prefix='/v1/metrics', tags=['metrics'])
+
+
+# async so the executors section sees the event loop's pools
+@router.get('')
+async def get_metrics() -> dict[str, Any]:
+    return collect_metrics()
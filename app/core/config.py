@@ -19,9 +19,46 @@ class Settings(BaseSettings):
 
     ollama_base_url: str = 'http://localhost:11434'
     ollama_model: str = 'qwen2.5:3b-instruct'
+    # keep-alive connections per client (sync session pool and async client limits)
+    ollama_pool_size: int = 16
+    # retries on connection errors / 5xx, with exponential backoff starting at ollama_retry_backoff_s
+    ollama_max_retries: int = 2
+    ollama_retry_backoff_s: float = 0.5
+    # hard cap on generated tokens per qualification (Ollama num_predict)
+    ollama_num_predict: int = 1024
+    # stream the completion, stop as soon as the JSON object is complete or can't be valid anymore
+    ollama_stream: bool = False
 
     use_llm_qualifier: bool = True
 
+    # cheap pre-filter in front of the LLM qualifier (app/services/memory_prefilter.py)
+    prefilter_enabled: bool = True
+    prefilter_skip_actor_types: str = 'system'  # comma-separated
+    prefilter_min_chars: int = 6
+    # 1: one-word answers ("vegetarian", "Berlin") are facts; min_chars and the ack list catch the noise
+    prefilter_min_words: int = 1
+    # optional embedding centroid classifier, fitted from a labeled JSONL file ({"text", "memory"})
+    prefilter_classifier_examples: str | None = None
+    prefilter_classifier_threshold: float = -0.05
+
+    # events packed into one LLM qualification call on the bulk/worker paths (1 = one call per event)
+    qualify_batch_size: int = 1
+
+    # cache of LLM qualification results: 'memory' (per process), 'sqlite' (local file) or 'none'
+    qualification_cache_backend: str = 'memory'
+    qualification_cache_ttl_s: float = 24 * 3600.0
+    qualification_cache_max_entries: int = 10_000
+    qualification_cache_path: str = '.cache/qualification.sqlite3'
+
+    # async ingestion: persist + ack the event now, qualify/index it on background workers
+    async_ingest: bool = False
+    ingest_workers: int = 4
+    ingest_claim_batch: int = 8
+    ingest_poll_interval_s: float = 0.5
+    ingest_max_attempts: int = 5
+    ingest_retry_backoff_s: float = 2.0
+    ingest_stale_lock_s: float = 300.0
+
     LOG_LEVEL: str = 'DEBUG'
     LOG_FORMAT: str = 'text'
     LOG_SQLALCHEMY: bool = False
@@ -31,7 +68,32 @@ class Settings(BaseSettings):
     qdrant_url: str = 'http://localhost:6333'
     qdrant_collection: str = 'memories'
     qdrant_vector_dim: int = 32
+    # check/create the collection in the app lifespan instead of on the first request
+    qdrant_ensure_on_startup: bool = True
+    # gRPC is noticeably cheaper per call for bulk traffic; REST stays the default
+    qdrant_prefer_grpc: bool = False
+    qdrant_grpc_port: int = 6334
+    # points per upsert / payload-update / retrieve request in the *_many methods
+    qdrant_batch_size: int = 256
+    # False = fire-and-forget bulk writes (acknowledged before indexing); bulk ingest re-checks them with missing_points()
+    qdrant_bulk_wait: bool = True
     embedding_model: str = 'sentence-transformers/all-MiniLM-L6-v2'
+    # None lets sentence-transformers pick (cuda if available, else cpu)
+    embedding_device: str | None = None
+    # batch size handed to model.encode() for one embed_many() call
+    embedding_encode_batch_size: int = 64
+    # micro-batching: coalesce embed calls from concurrent requests into one encode()
+    embedding_micro_batching: bool = True
+    embedding_batch_max_size: int = 64
+    embedding_batch_max_wait_ms: float = 5.0
+    # content-addressed embedding cache (in-memory LRU + optional mmap'd on-disk tier)
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 50_000
+    embedding_cache_dir: str | None = None
+    embedding_cache_disk_max_entries: int = 200_000
+    # exact dedup on memories.content_hash (LRU of hash -> memory id, then one SELECT) before the vector path
+    exact_dedup_enabled: bool = True
+    exact_dedup_lru_entries: int = 100_000
 
     nebula_host: str = '127.0.0.1'
     nebula_port: int = 9669
@@ -39,6 +101,50 @@ class Settings(BaseSettings):
     nebula_password: str = 'nebula'
     nebula_space: str = 'memkg'
     nebula_vid_len: int = 256
+    # long-lived sessions kept per process (also the connection pool size)
+    nebula_pool_size: int = 10
+
+    # KG write coalescing (KGBatchWriter). Off = every memory is written to the graph inline.
+    kg_batch_enabled: bool = False
+    kg_batch_max_items: int = 500
+    kg_batch_window_ms: float = 200.0
+    kg_batch_max_pending: int = 10_000
+    kg_recent_vids: int = 10_000
+    # how many `;`-separated statements go into one Nebula request for batch writes
+    nebula_statements_per_request: int = 200
+    # rows per multi-row INSERT VERTEX / INSERT EDGE statement
+    nebula_rows_per_insert: int = 200
+
+    # transactional outbox: Qdrant/KG indexing happens after commit, from memory_outbox rows
+    outbox_enabled: bool = False
+    outbox_drainer_in_app: bool = True  # false when db_script/drain_outbox.py runs separately
+    outbox_drainers: int = 1
+    outbox_batch_size: int = 200
+    outbox_poll_interval_s: float = 0.5
+    outbox_max_attempts: int = 8
+    outbox_retry_backoff_s: float = 1.0
+    outbox_stale_lock_s: float = 300.0
+
+    # bulk ingestion (POST /v1/events:bulk)
+    bulk_max_events: int = 10_000
+    bulk_chunk_size: int = 200
+    bulk_llm_concurrency: int = 4
+
+    # re-embed / rebuild job (app/services/reindex_service.py, db_script/reindex_qdrant.py)
+    reindex_batch_rows: int = 2000
+    reindex_memory_budget_mb: int = 256
+    reindex_checkpoint_dir: str = '.cache/reindex'
+
+    # GET /v1/memories keyset pagination
+    memories_page_default: int = 100
+    memories_page_max: int = 1000
+
+    # async routes: blocking work runs in named, bounded thread pools (app/core/executors.py)
+    api_db_concurrency: int = 20
+    api_ingest_concurrency: int = 8
+    api_graph_concurrency: int = 8
+    # default anyio threadpool (sync dependencies such as get_db); must cover the pools above
+    api_threadpool_size: int = 48
 
     @property
     def database_url(self) -> str:
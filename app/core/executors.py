@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import weakref
+from typing import Any, Callable, TypeVar
+
+import anyio
+import anyio.to_thread
+
+from app.core.config import settings
+from app.core.metrics import register_metrics
+
+T = TypeVar('T')
+
+# Blocking work is split by backend so one slow dependency can't starve the others:
+# - db:     MySQL reads/writes (plus Qdrant lookups that hydrate from MySQL)
+# - ingest: qualification pre-checks, embedding, dedup, vector + KG indexing
+# - graph:  Nebula calls
+POOLS = ('db', 'ingest', 'graph')
+
+_lock = threading.Lock()
+# CapacityLimiter binds to the running event loop, so I keep one set per loop
+_limiters: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, anyio.CapacityLimiter]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def pool_size(pool: str) -> int:
+    sizes = {
+        'db': settings.api_db_concurrency,
+        'ingest': settings.api_ingest_concurrency,
+        'graph': settings.api_graph_concurrency,
+    }
+    if pool not in sizes:
+        raise ValueError(f'unknown executor pool {pool!r}')
+    return max(1, int(sizes[pool]))
+
+
+def limiter(pool: str) -> anyio.CapacityLimiter:
+    loop = asyncio.get_running_loop()
+    with _lock:
+        per_loop = _limiters.setdefault(loop, {})
+        lim = per_loop.get(pool)
+        if lim is None:
+            lim = per_loop[pool] = anyio.CapacityLimiter(pool_size(pool))
+        return lim
+
+
+async def run_blocking(pool: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    I run a blocking call on a worker thread, admitted by the named pool's limiter.
+    Callers beyond the pool size wait on the event loop instead of holding a thread.
+    """
+    call = functools.partial(fn, *args, **kwargs) if kwargs else fn
+    return await anyio.to_thread.run_sync(call, *([] if kwargs else args), limiter=limiter(pool))
+
+
+def configure_threadpool() -> None:
+    """
+    I size the default threadpool explicitly. It still runs sync dependencies (get_db) and
+    sync routes; it has to be large enough for the named pools plus those.
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = max(1, settings.api_threadpool_size)
+
+
+def metrics() -> dict[str, Any]:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    with _lock:
+        per_loop = dict(_limiters.get(loop, {})) if loop is not None else {}
+
+    out: dict[str, Any] = {}
+    for pool in POOLS:
+        lim = per_loop.get(pool)
+        out[pool] = {
+            'size': pool_size(pool),
+            'busy': lim.borrowed_tokens if lim is not None else 0,
+            'waiting': lim.statistics().tasks_waiting if lim is not None else 0,
+        }
+    return out
+
+
+register_metrics('executors', metrics)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+MetricsProvider = Callable[[], dict[str, Any]]
+
+_lock = threading.Lock()
+_providers: dict[str, MetricsProvider] = {}
+
+
+def register_metrics(name: str, provider: MetricsProvider) -> None:
+    """
+    I let components publish a metrics section without the API layer knowing about them.
+    Registering the same name again replaces the previous provider.
+    """
+    with _lock:
+        _providers[name] = provider
+
+
+def collect_metrics() -> dict[str, Any]:
+    with _lock:
+        providers = dict(_providers)
+
+    out: dict[str, Any] = {}
+    for name, provider in sorted(providers.items()):
+        try:
+            out[name] = provider()
+        except Exception as e:
+            # one broken provider should not hide the others
+            logger.exception('Metrics provider failed', extra={'section': name})
+            out[name] = {'error': str(e)}
+    return out
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_autoinc_step: dict[str, int] = {}
+
+
+def _auto_increment_step(db: Session) -> int:
+    bind = db.get_bind()
+    cache_key = str(bind.url)
+    step = _autoinc_step.get(cache_key)
+    if step is None:
+        step = int(db.execute(text('SELECT @@auto_increment_increment')).scalar() or 1)
+        _autoinc_step[cache_key] = step
+    return step
+
+
+def insert_returning_ids(db: Session, model: Any, rows: list[dict[str, Any]]) -> list[int]:
+    """
+    I insert all rows with ONE multi-row INSERT and return their primary keys in row order.
+
+    - Dialects with ordered INSERT..RETURNING (sqlite, MariaDB, postgres) use it directly.
+    - MySQL has no RETURNING. A multi-row VALUES insert is a "simple insert" for InnoDB, so the
+      ids of one statement are consecutive (in auto_increment_increment steps) starting at
+      LAST_INSERT_ID(), which the driver hands back as lastrowid.
+
+    Nothing is committed here; the caller owns the transaction.
+    """
+    if not rows:
+        return []
+
+    table = model.__table__
+    pk = table.primary_key.columns.values()[0]
+    dialect = db.get_bind().dialect
+
+    if getattr(dialect, 'insert_executemany_returning_sort_by_parameter_order', False):
+        result = db.execute(insert(table).returning(pk, sort_by_parameter_order=True), rows)
+        return [r[0] for r in result]
+
+    result = db.execute(insert(table).values(rows))
+    first_id = int(result.lastrowid)
+    step = _auto_increment_step(db) if dialect.name == 'mysql' else 1
+    return [first_id + i * step for i in range(len(rows))]
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import logging
+from typing import Callable
+
+from sqlalchemy import Engine, Index, inspect, text
+from sqlalchemy.exc import DBAPIError
+
+from app.models.memory import Memory
+
+logger = logging.getLogger(__name__)
+
+# (table, column) pairs added after the table shipped; create_all() never alters an existing table
+_ADDED_COLUMNS = (('memories', 'content_hash'),)
+_ADDED_INDEXES = (('memories', 'ix_memories_content_hash'),)
+
+_TABLES = {'memories': Memory.__table__}
+
+
+def upgrade_schema(engine: Engine) -> list[str]:
+    """
+    I bring an existing database up to the ORM models: add the columns and indexes listed above
+    when they are missing. Safe to run on every startup and from several processes at once.
+    Returns what was applied.
+    """
+    applied: list[str] = []
+    existing_tables = set(inspect(engine).get_table_names())
+
+    for table_name, column_name in _ADDED_COLUMNS:
+        if table_name not in existing_tables:
+            continue
+        if column_name in {c['name'] for c in inspect(engine).get_columns(table_name)}:
+            continue
+
+        column = _TABLES[table_name].c[column_name]
+        ddl = f'ALTER TABLE {table_name} ADD COLUMN {column_name} {column.type.compile(engine.dialect)} NULL'
+        _apply(engine, ddl, lambda: column_name in {c['name'] for c in inspect(engine).get_columns(table_name)})
+        applied.append(f'{table_name}.{column_name}')
+
+    for table_name, index_name in _ADDED_INDEXES:
+        if table_name not in existing_tables:
+            continue
+        if index_name in {i['name'] for i in inspect(engine).get_indexes(table_name)}:
+            continue
+
+        index = next(i for i in _TABLES[table_name].indexes if i.name == index_name)
+        _apply(engine, index, lambda: index_name in {i['name'] for i in inspect(engine).get_indexes(table_name)})
+        applied.append(f'{table_name}.{index_name}')
+
+    if applied:
+        logger.info('Upgraded database schema', extra={'applied': applied})
+    return applied
+
+
+def _apply(engine: Engine, ddl: str | Index, done: Callable[[], bool]) -> None:
+    try:
+        with engine.begin() as conn:
+            if isinstance(ddl, str):
+                conn.execute(text(ddl))
+            else:
+                ddl.create(bind=conn)
+    except DBAPIError as e:
+        # another process applied it between my check and the DDL
+        if done():
+            return
+        raise RuntimeError(
+            'Database schema upgrade failed; apply the ALTER statements at the end of '
+            'db_script/create_schema.sql by hand'
+        ) from e
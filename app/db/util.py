@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+
+def utcnow() -> datetime:
+    """
+    Naive UTC for the queue tables (ingest_jobs, memory_outbox): their timestamps are written and
+    compared only from Python, so DB and app timezones never mix.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
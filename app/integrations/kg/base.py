@@ -17,6 +17,25 @@ class GraphDB(ABC):
     def upsert_edge(self, src_id: str, edge_type: str, dst_id: str, props: dict[str, Any] | None = None) -> None:
         raise NotImplementedError
 
+    def upsert_many(
+        self,
+        nodes: list[tuple[str, str, dict[str, Any]]],
+        edges: list[tuple[str, str, str]],
+    ) -> None:
+        """
+        Batch upsert of (node_id, label, props) nodes and (src_id, edge_type, dst_id) edges.
+        Implementations should override this with fewer round trips; nodes go before edges.
+        """
+        for node_id, label, props in nodes:
+            self.upsert_node(node_id, label, props)
+        for src_id, edge_type, dst_id in edges:
+            self.upsert_edge(src_id, edge_type, dst_id)
+
+    def close(self) -> None:
+        """
+        Release connections/sessions. Default: nothing to release.
+        """
+
     @abstractmethod
     def get_node(self, node_id: str) -> dict[str, Any] | None:
         raise NotImplementedError
@@ -1,19 +1,149 @@
 from __future__ import annotations
 
+import logging
+import queue
+import threading
 from typing import Any
 
+from nebula3.common.ttypes import ErrorCode
 from nebula3.Config import Config
-from nebula3.gclient.net import ConnectionPool
+from nebula3.Exception import IOErrorException
+from nebula3.gclient.net import ConnectionPool, Session
 
 from app.core.config import settings
 from app.integrations.kg.base import GraphDB
 
+logger = logging.getLogger(__name__)
+
+# server-side session is gone; I drop the client session and retry on a fresh one
+_DEAD_SESSION_CODES = {
+    ErrorCode.E_SESSION_INVALID,
+    ErrorCode.E_SESSION_NOT_FOUND,
+    ErrorCode.E_SESSION_TIMEOUT,
+}
+
+
+_EDGE_TYPES = ('HAS_MEMORY', 'ABOUT')
+
 
 def _escape(s: str) -> str:
     # I escape quotes so simple strings don't break nGQL.
     return (s or '').replace('\\', '\\\\').replace('"', '\\"')
 
 
+class NebulaSessionPool:
+    """
+    I keep authenticated, space-bound Nebula sessions alive and hand them out to one thread at a time.
+
+    Before this every call did get_session (auth round trip) + `USE` (round trip) + query + release.
+    Now sessions are created lazily up to `size`, reused, and every request carries its own
+    `USE <space>;` prefix so a single round trip is always correct, whatever the session did before.
+    """
+
+    def __init__(self, conn_pool: ConnectionPool, space: str, size: int) -> None:
+        self.conn_pool = conn_pool
+        self.space = space
+        self.size = max(1, size)
+
+        self._idle: queue.LifoQueue[Session] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _new_session(self) -> Session:
+        sess = self.conn_pool.get_session(settings.nebula_user, settings.nebula_password)
+        r = sess.execute(f'USE {self.space};')
+        if not r.is_succeeded():
+            sess.release()
+            raise RuntimeError(f'Nebula USE failed: {r.error_msg()}')
+        return sess
+
+    def _acquire(self) -> Session:
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError('Nebula session pool is closed')
+                grow = self._created < self.size
+                if grow:
+                    self._created += 1
+
+            if grow:
+                try:
+                    return self._new_session()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+
+            # at capacity: wait for a session to come back. The timeout lets me notice capacity
+            # freed up by a discarded session, which never comes back through the queue.
+            try:
+                return self._idle.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+    def _release(self, sess: Session) -> None:
+        if self._closed:
+            sess.release()
+            return
+        self._idle.put(sess)
+
+    def _discard(self, sess: Session) -> None:
+        with self._lock:
+            self._created -= 1
+        try:
+            sess.release()
+        except Exception:
+            logger.debug('Ignoring error while releasing a dead Nebula session', exc_info=True)
+
+    def execute(self, ngql: str):
+        """
+        I run `USE <space>; <ngql>` as ONE request and return the ResultSet of the last statement.
+        A dead session (IO error or session-expired codes) is replaced and the request retried once.
+        """
+        stmt = f'USE {self.space}; {ngql}'
+        for attempt in (1, 2):
+            sess = self._acquire()
+            try:
+                r = sess.execute(stmt)
+            except IOErrorException:
+                self._discard(sess)
+                if attempt == 2:
+                    raise
+                logger.warning('Nebula session broke, retrying on a fresh session', exc_info=True)
+                continue
+
+            if not r.is_succeeded() and r.error_code() in _DEAD_SESSION_CODES and attempt == 1:
+                self._discard(sess)
+                logger.warning('Nebula session expired, retrying on a fresh session', extra={'code': r.error_code()})
+                continue
+
+            self._release(sess)
+            if not r.is_succeeded():
+                raise RuntimeError(f'Nebula query failed: {r.error_msg()} | ngql={ngql}')
+            return r
+
+        raise RuntimeError('unreachable')
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                sess = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                sess.release()
+            except Exception:
+                logger.debug('Ignoring error while releasing a Nebula session', exc_info=True)
+
+
 class NebulaGraphDB(GraphDB):
     """
     I implement GraphDB using NebulaGraph.
@@ -22,7 +152,7 @@ class NebulaGraphDB(GraphDB):
 
     def __init__(self) -> None:
         cfg = Config()
-        cfg.max_connection_pool_size = 10
+        cfg.max_connection_pool_size = max(1, settings.nebula_pool_size)
 
         self.pool = ConnectionPool()
         ok = self.pool.init([(settings.nebula_host, settings.nebula_port)], cfg)
@@ -30,120 +160,136 @@ class NebulaGraphDB(GraphDB):
             raise RuntimeError('Failed to init Nebula connection pool')
 
         self.space = settings.nebula_space
+        self.sessions = NebulaSessionPool(self.pool, self.space, settings.nebula_pool_size)
 
-    def _exec(self, ngql: str) -> None:
-        sess = self.pool.get_session(settings.nebula_user, settings.nebula_password)
-        try:
-            r = sess.execute(f'USE {self.space};')
-            if not r.is_succeeded():
-                raise RuntimeError(f'Nebula USE failed: {r.error_msg()}')
-
-            r = sess.execute(ngql)
-            if not r.is_succeeded():
-                raise RuntimeError(f'Nebula query failed: {r.error_msg()} | ngql={ngql}')
-        finally:
-            sess.release()
+    def _exec(self, ngql: str):
+        return self.sessions.execute(ngql)
 
-    def upsert_node(self, node_id: str, label: str, props: dict[str, Any]) -> None:
-        vid = _escape(node_id)
+    def close(self) -> None:
+        self.sessions.close()
+        self.pool.close()
 
+    def _node_props(self, label: str, props: dict[str, Any]) -> list[tuple[str, str]]:
+        """
+        (prop, nGQL literal) pairs for a vertex; the tag's full prop list, in schema order.
+        """
         if label == 'Actor':
-            actor_type = _escape(str(props.get('actor_type', '')))
-            actor_id = _escape(str(props.get('actor_id', '')))
-            ngql = f'UPSERT VERTEX ON Actor "{vid}" SET actor_type="{actor_type}", actor_id="{actor_id}";'
-            self._exec(ngql)
-            return
+            return [
+                ('actor_type', f'"{_escape(str(props.get("actor_type", "")))}"'),
+                ('actor_id', f'"{_escape(str(props.get("actor_id", "")))}"'),
+            ]
 
         if label == 'Memory':
-            memory_id = int(props.get('memory_id') or 0)
-            mtype = _escape(str(props.get('type', '')))
-            scope = _escape(str(props.get('scope', '')))
-            key = _escape(str(props.get('key', '')))
-            conf = float(props.get('confidence') or 0.0)
-            ngql = (
-                f'UPSERT VERTEX ON Memory "{vid}" '
-                f'SET memory_id={memory_id}, type="{mtype}", scope="{scope}", key="{key}", confidence={conf};'
-            )
-            self._exec(ngql)
-            return
+            return [
+                ('memory_id', str(int(props.get('memory_id') or 0))),
+                ('type', f'"{_escape(str(props.get("type", "")))}"'),
+                ('scope', f'"{_escape(str(props.get("scope", "")))}"'),
+                ('key', f'"{_escape(str(props.get("key", "")))}"'),
+                ('confidence', repr(float(props.get('confidence') or 0.0))),
+            ]
 
         if label == 'Entity':
-            name = _escape(str(props.get('name', '')))
-            entity_type = _escape(str(props.get('entity_type', '')))
-            ngql = f'UPSERT VERTEX ON Entity "{vid}" SET name="{name}", entity_type="{entity_type}";'
-            self._exec(ngql)
-            return
+            return [
+                ('name', f'"{_escape(str(props.get("name", "")))}"'),
+                ('entity_type', f'"{_escape(str(props.get("entity_type", "")))}"'),
+            ]
 
         raise ValueError(f'Unknown label: {label}')
 
-    def upsert_edge(self, src_id: str, edge_type: str, dst_id: str, props: dict[str, Any] | None = None) -> None:
-        # I ignore props for now to keep edges simple.
+    def _node_stmt(self, node_id: str, label: str, props: dict[str, Any]) -> str:
+        vid = _escape(node_id)
+        sets = ', '.join(f'{p}={v}' for p, v in self._node_props(label, props))
+        return f'UPSERT VERTEX ON {label} "{vid}" SET {sets};'
+
+    def _edge_stmt(self, src_id: str, edge_type: str, dst_id: str) -> str:
         src = _escape(src_id)
         dst = _escape(dst_id)
 
-        if edge_type not in ('HAS_MEMORY', 'ABOUT'):
+        if edge_type not in _EDGE_TYPES:
             raise ValueError(f'Unknown edge_type: {edge_type}')
 
-        ngql = f'UPSERT EDGE ON {edge_type} "{src}" -> "{dst}" SET _dummy=1;'
-        # Nebula requires at least one property on UPSERT EDGE. We'll create a dummy prop.
-        # We'll also need the edge schema to allow it — easiest is to define no props and use INSERT instead.
+        # Nebula requires at least one property on UPSERT EDGE, and our edges have none.
         # So I use INSERT IGNORE semantics by doing INSERT EDGE (idempotency is handled by same src/dst/rank).
-        #
-        # To avoid schema changes, use INSERT EDGE without props:
-        ngql = f'INSERT EDGE IF NOT EXISTS {edge_type}() VALUES "{src}"->"{dst}":();'
-        self._exec(ngql)
+        return f'INSERT EDGE IF NOT EXISTS {edge_type}() VALUES "{src}"->"{dst}":();'
 
-    def get_node(self, node_id: str) -> dict[str, Any] | None:
-        vid = _escape(node_id)
+    def _insert_stmts(
+        self,
+        nodes: list[tuple[str, str, dict[str, Any]]],
+        edges: list[tuple[str, str, str]],
+    ) -> list[str]:
+        """
+        Multi-row INSERT VERTEX / INSERT EDGE statements, one per tag/edge type (chunked by
+        nebula_rows_per_insert). INSERT VERTEX overwrites all of the tag's props, which matches
+        UPSERT here because I always write the full prop list.
+        """
+        rows_per_stmt = max(1, settings.nebula_rows_per_insert)
 
-        ngql = f'FETCH PROP ON * "{vid}" YIELD vertex AS v;'
-        sess = self.pool.get_session(settings.nebula_user, settings.nebula_password)
-        try:
-            r = sess.execute(f'USE {self.space};')
-            if not r.is_succeeded():
-                raise RuntimeError(f'Nebula USE failed: {r.error_msg()}')
+        by_label: dict[str, list[str]] = {}
+        cols: dict[str, str] = {}
+        for node_id, label, props in nodes:
+            pairs = self._node_props(label, props)
+            cols.setdefault(label, ', '.join(f'`{p}`' for p, _ in pairs))
+            values = ', '.join(v for _, v in pairs)
+            by_label.setdefault(label, []).append(f'"{_escape(node_id)}":({values})')
 
-            r = sess.execute(ngql)
-            if not r.is_succeeded():
-                raise RuntimeError(f'Nebula query failed: {r.error_msg()} | ngql={ngql}')
+        by_edge: dict[str, list[str]] = {}
+        for src_id, edge_type, dst_id in edges:
+            if edge_type not in _EDGE_TYPES:
+                raise ValueError(f'Unknown edge_type: {edge_type}')
+            by_edge.setdefault(edge_type, []).append(f'"{_escape(src_id)}"->"{_escape(dst_id)}":()')
 
-            if r.row_size() == 0:
-                return None
+        stmts: list[str] = []
+        for label, rows in by_label.items():
+            for i in range(0, len(rows), rows_per_stmt):
+                stmts.append(f'INSERT VERTEX {label}({cols[label]}) VALUES {", ".join(rows[i : i + rows_per_stmt])};')
+        for edge_type, rows in by_edge.items():
+            for i in range(0, len(rows), rows_per_stmt):
+                stmts.append(
+                    f'INSERT EDGE IF NOT EXISTS {edge_type}() VALUES {", ".join(rows[i : i + rows_per_stmt])};'
+                )
+        return stmts
 
-            # col_names = [r.keys()[i] for i in range(r.column_size())]
-            # row = r.row_values(0)
-            # props: dict[str, Any] = {}
-            # for i, k in enumerate(col_names):
-            #     props[str(k)] = str(row[i])
+    def upsert_node(self, node_id: str, label: str, props: dict[str, Any]) -> None:
+        self._exec(self._node_stmt(node_id, label, props))
 
-            # return {'id': node_id, 'props': props}
-            v = r.row_values(0)[0]
-            return {'id': node_id, 'vertex': str(v)}
-        finally:
-            sess.release()
+    def upsert_edge(self, src_id: str, edge_type: str, dst_id: str, props: dict[str, Any] | None = None) -> None:
+        # I ignore props for now to keep edges simple.
+        self._exec(self._edge_stmt(src_id, edge_type, dst_id))
+
+    def upsert_many(
+        self,
+        nodes: list[tuple[str, str, dict[str, Any]]],
+        edges: list[tuple[str, str, str]],
+    ) -> None:
+        """
+        I write vertices then edges as multi-row INSERTs, several `;`-separated statements per
+        request (nGQL executes them in order).
+        """
+        stmts = self._insert_stmts(nodes, edges)
+        step = max(1, settings.nebula_statements_per_request)
+        for i in range(0, len(stmts), step):
+            self._exec(' '.join(stmts[i : i + step]))
+
+    def get_node(self, node_id: str) -> dict[str, Any] | None:
+        vid = _escape(node_id)
+
+        r = self._exec(f'FETCH PROP ON * "{vid}" YIELD vertex AS v;')
+        if r.row_size() == 0:
+            return None
 
+        v = r.row_values(0)[0]
+        return {'id': node_id, 'vertex': str(v)}
 
     def neighbors(self, node_id: str, edge_type: str | None = None) -> list[dict[str, Any]]:
         vid = _escape(node_id)
         et = edge_type or ''
         edge_clause = f'OVER {et}' if et else 'OVER HAS_MEMORY,ABOUT'
 
-        ngql = f'GO FROM "{vid}" {edge_clause} YIELD edge AS edge, dst(edge) AS dst;'
-        sess = self.pool.get_session(settings.nebula_user, settings.nebula_password)
-        try:
-            r = sess.execute(f'USE {self.space};')
-            if not r.is_succeeded():
-                raise RuntimeError(f'Nebula USE failed: {r.error_msg()}')
-
-            r = sess.execute(ngql)
-            if not r.is_succeeded():
-                raise RuntimeError(f'Nebula query failed: {r.error_msg()} | ngql={ngql}')
+        r = self._exec(f'GO FROM "{vid}" {edge_clause} YIELD edge AS edge, dst(edge) AS dst;')
 
-            out: list[dict[str, Any]] = []
-            for i in range(r.row_size()):
-                row = r.row_values(i)
-                # row[0]=edge name, row[1]=dst vid
-                out.append({'edge': str(row[0]), 'dst': str(row[1])})
-            return out
-        finally:
-            sess.release()
+        out: list[dict[str, Any]] = []
+        for i in range(r.row_size()):
+            row = r.row_values(i)
+            # row[0]=edge name, row[1]=dst vid
+            out.append({'edge': str(row[0]), 'dst': str(row[1])})
+        return out
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any
 
@@ -12,3 +13,20 @@ class LLMClient(ABC):
     @abstractmethod
     def generate_json(self, system_prompt: str, user_prompt: str, timeout_s: int = 30) -> Any:
         raise NotImplementedError
+
+    async def agenerate_json(self, system_prompt: str, user_prompt: str, timeout_s: int = 30) -> Any:
+        """
+        Async variant. Default runs generate_json in a worker thread; clients with a native
+        async transport should override this.
+        """
+        return await asyncio.to_thread(self.generate_json, system_prompt, user_prompt, timeout_s)
+
+    def close(self) -> None:
+        """
+        Release pooled connections. Default: nothing to release.
+        """
+
+    async def aclose(self) -> None:
+        """
+        Release connections bound to the running event loop. Default: nothing to release.
+        """
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+from app.integrations.llm.prompt import (
+    MEMORY_QUALIFIER_BATCH_SYSTEM,
+    MEMORY_QUALIFIER_SYSTEM,
+    MEMORY_QUALIFIER_VERSION,
+    build_memory_qualifier_user_prompt,
+)
+from app.schemas.llm import MemoryQualification, QualifiedMemory
+
+logger = logging.getLogger(__name__)
+
+_WS = re.compile(r'\s+')
+
+
+def normalize_event_text(text: str | None) -> str:
+    # NFC + collapsed whitespace: retries and copy-pasted boilerplate often differ only there.
+    return _WS.sub(' ', unicodedata.normalize('NFC', text or '')).strip()
+
+
+@functools.lru_cache(maxsize=1)
+def qualifier_fingerprint() -> str:
+    """
+    Changes whenever the qualifier prompts (system prompts and the user prompt template) or their
+    version change, so old entries stop matching. The prompts are static per process, so I hash
+    them once; key() is the cache-hit hot path.
+    """
+    template = build_memory_qualifier_user_prompt(actor_type='\1', actor_id='\2', text='\3', payload={})
+    raw = f'{MEMORY_QUALIFIER_VERSION}\0{MEMORY_QUALIFIER_SYSTEM}\0{MEMORY_QUALIFIER_BATCH_SYSTEM}\0{template}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def qualification_key(model: str, *, actor_type: str, actor_id: str, text: str | None, payload: dict | None) -> str:
+    # the prompt's inputs, normalized: text by whitespace/NFC, the payload as canonical JSON
+    inputs = json.dumps(
+        [actor_type, actor_id, normalize_event_text(text), payload or {}],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    raw = f'{model}\0{qualifier_fingerprint()}\0{inputs}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class QualificationCacheBackend(ABC):
+    """
+    Storage for serialized qualification results. Backends own TTL expiry and LRU eviction.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> str | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def size(self) -> int:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryQualificationBackend(QualificationCacheBackend):
+    def __init__(self, *, max_entries: int, ttl_s: float) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self._lock = threading.Lock()
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            expires_at, value = hit
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class SqliteQualificationBackend(QualificationCacheBackend):
+    """
+    I persist results in a local sqlite file so they survive restarts and are shared by the
+    worker processes on one host. LRU is approximated with a last_used column.
+    """
+
+    def __init__(self, path: str, *, max_entries: int, ttl_s: float) -> None:
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS qualification_cache ('
+            ' key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS ix_qualification_cache_last_used ON qualification_cache (last_used)'
+        )
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM qualification_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute('DELETE FROM qualification_cache WHERE key = ?', (key,))
+                return None
+            self._conn.execute('UPDATE qualification_cache SET last_used = ? WHERE key = ?', (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO qualification_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)',
+                (key, value, now + self.ttl_s, now),
+            )
+            excess = self._conn.execute('SELECT COUNT(*) FROM qualification_cache').fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    'DELETE FROM qualification_cache WHERE key IN '
+                    '(SELECT key FROM qualification_cache ORDER BY last_used LIMIT ?)',
+                    (excess,),
+                )
+                self.evictions += excess
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM qualification_cache')
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM qualification_cache').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class QualificationCache:
+    """
+    I cache MemoryQualification results so near-identical events don't each pay an LLM call.
+    """
+
+    def __init__(self, backend: QualificationCacheBackend, *, model: str) -> None:
+        self.backend = backend
+        self.model = model
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+
+    def key(self, *, actor_type: str, actor_id: str, text: str | None, payload: dict | None) -> str:
+        return qualification_key(self.model, actor_type=actor_type, actor_id=actor_id, text=text, payload=payload)
+
+    def get(self, key: str) -> list[QualifiedMemory] | None:
+        try:
+            raw = self.backend.get(key)
+            hit = MemoryQualification.model_validate_json(raw).memories if raw is not None else None
+        except Exception:
+            # a broken cache must never break qualification
+            logger.warning('Qualification cache read failed', exc_info=True)
+            with self._lock:
+                self._errors += 1
+            hit = None
+
+        with self._lock:
+            if hit is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return hit
+
+    def put(self, key: str, memories: list[QualifiedMemory]) -> None:
+        try:
+            self.backend.set(key, MemoryQualification(memories=memories).model_dump_json())
+        except Exception:
+            logger.warning('Qualification cache write failed', exc_info=True)
+            with self._lock:
+                self._errors += 1
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            hits, misses, errors = self._hits, self._misses, self._errors
+        total = hits + misses
+        return {
+            'backend': type(self.backend).__name__,
+            'entries': self.backend.size(),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else 0.0,
+            'evictions': getattr(self.backend, 'evictions', 0),
+            'errors': errors,
+            'fingerprint': qualifier_fingerprint(),
+        }
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+# characters allowed outside strings: structure, whitespace, numbers and the true/false/null literals
+_BARE = frozenset(' \t\r\n:,-+.0123456789eEtruefalsn')
+_CLOSE = {'}': '{', ']': '['}
+
+
+class JSONStreamScanner:
+    """
+    I watch a JSON document arrive chunk by chunk and answer two questions cheaply:
+    - is the top-level object complete? (stop generating, parse what we have)
+    - can this still become valid JSON? (stop generating, it's garbage)
+
+    This is a structural scan (string/escape state, bracket matching, allowed bare characters),
+    not a full parser: json.loads still validates the final text.
+    """
+
+    def __init__(self) -> None:
+        self._parts: list[str] = []
+        self._size = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._end: int | None = None
+        self.error: str | None = None
+
+    @property
+    def complete(self) -> bool:
+        return self._end is not None
+
+    @property
+    def invalid(self) -> bool:
+        return self.error is not None
+
+    def feed(self, chunk: str) -> None:
+        if self.complete or self.invalid or not chunk:
+            return
+
+        base = self._size
+        self._parts.append(chunk)
+        self._size += len(chunk)
+
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if not self._stack:
+                # before the top-level object: only whitespace may precede it
+                if ch == '{':
+                    self._stack.append(ch)
+                elif not ch.isspace():
+                    self.error = f'expected "{{" at offset {base + i}, got {ch!r}'
+                    return
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._stack.append(ch)
+            elif ch in '}]':
+                if self._stack[-1] != _CLOSE[ch]:
+                    self.error = f'unbalanced {ch!r} at offset {base + i}'
+                    return
+                self._stack.pop()
+                if not self._stack:
+                    self._end = base + i + 1
+                    return
+            elif ch not in _BARE:
+                self.error = f'unexpected {ch!r} at offset {base + i}'
+                return
+
+    def text(self) -> str:
+        """
+        Everything received so far, cut right after the top-level object when it is complete.
+        """
+        full = ''.join(self._parts)
+        return full[: self._end] if self._end is not None else full
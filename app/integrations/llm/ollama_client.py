@@ -1,18 +1,30 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import logging
+import threading
+import time
+import weakref
 from typing import Any
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from app.core.config import settings
 from app.integrations.llm.base import LLMClient
+from app.integrations.llm.json_stream import JSONStreamScanner
 
 
 logger = logging.getLogger(__name__)
 
 
+_RETRY_STATUSES = (500, 502, 503, 504)
+
+
 class LLMJSONError(Exception):
     """I raise this when the model refuses to give me usable JSON."""
 
@@ -20,32 +32,185 @@ class LLMJSONError(Exception):
 class OllamaClient(LLMClient):
     """
     I keep this client tiny: JSON-in, JSON-out, no surprises.
+
+    Connections are pooled and kept alive: one requests.Session for sync callers (thread-safe for
+    our use, one pooled connection per concurrent caller) and one httpx.AsyncClient per event loop
+    for agenerate_json. Connection errors and 5xx are retried with exponential backoff.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        session: requests.Session | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
         self.base_url = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
         self.model = os.getenv('OLLAMA_MODEL', 'qwen2.5')
 
+        self.session = session or self._build_session()
+        self._async_transport = async_transport
+        # keyed by the loop object, not id(loop): a new loop can reuse a dead loop's id
+        self._async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._async_lock = threading.Lock()
+
         logger.debug(
             'Initialized OllamaClient',
             extra={
                 'base_url': self.base_url,
                 'model': self.model,
+                'pool_size': settings.ollama_pool_size,
+                'max_retries': settings.ollama_max_retries,
             },
         )
 
-    def generate_json(self, system_prompt: str, user_prompt: str, timeout_s: int = 30) -> Any:
-        payload = {
+    @staticmethod
+    def _build_session() -> requests.Session:
+        retry = Retry(
+            total=settings.ollama_max_retries,
+            connect=settings.ollama_max_retries,
+            read=0,  # a read timeout means the model is slow, retrying just doubles the wait
+            status=settings.ollama_max_retries,
+            status_forcelist=_RETRY_STATUSES,
+            allowed_methods=frozenset({'POST'}),
+            backoff_factor=settings.ollama_retry_backoff_s,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.ollama_pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _async_client(self) -> httpx.AsyncClient:
+        # an AsyncClient's connections belong to the loop that opened them
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            with self._async_lock:
+                client = self._async_clients.get(loop)
+                if client is None:
+                    limits = httpx.Limits(
+                        max_connections=settings.ollama_pool_size,
+                        max_keepalive_connections=settings.ollama_pool_size,
+                    )
+                    client = httpx.AsyncClient(
+                        base_url=self.base_url,
+                        limits=limits,
+                        transport=self._async_transport,
+                    )
+                    self._async_clients[loop] = client
+        return client
+
+    def _payload(self, system_prompt: str, user_prompt: str, stream: bool = False) -> dict[str, Any]:
+        payload: dict[str, Any] = {
             'model': self.model,
             'messages': [
                 {'role': 'system', 'content': system_prompt},
                 {'role': 'user', 'content': user_prompt},
             ],
-            'stream': False,
+            'stream': stream,
             'options': {
                 'temperature': 0.0,
+                'num_predict': settings.ollama_num_predict,
             },
         }
+        if stream:
+            # constrained decoding: without it the scanner would reject a ```json fence or a preamble
+            payload['format'] = 'json'
+        return payload
+
+    @staticmethod
+    def _feed_stream_line(scanner: JSONStreamScanner, line: str | bytes, deadline: float) -> bool:
+        """
+        I feed one NDJSON chunk of /api/chat output into the scanner.
+        Returns True when generation should stop (object complete or model done).
+        """
+        if time.monotonic() > deadline:
+            raise TimeoutError('Ollama generation exceeded its deadline')
+        if not line:
+            return False
+
+        chunk = json.loads(line)
+        if chunk.get('error'):
+            raise RuntimeError(f'Ollama stream error: {chunk["error"]}')
+
+        scanner.feed(chunk.get('message', {}).get('content', ''))
+        if scanner.invalid:
+            raise LLMJSONError(f'LLM output can no longer be valid JSON: {scanner.error}')
+        return scanner.complete or bool(chunk.get('done'))
+
+    def _finish_stream(self, scanner: JSONStreamScanner, started: float, chunks: int) -> Any:
+        logger.debug(
+            'Ollama stream finished',
+            extra={
+                'chunks': chunks,
+                'early_stop': scanner.complete,
+                'elapsed_s': round(time.monotonic() - started, 3),
+            },
+        )
+        return self._parse_content({'message': {'content': scanner.text()}})
+
+    def _generate_json_stream(self, payload: dict[str, Any], timeout_s: int) -> Any:
+        started = time.monotonic()
+        # the per-read timeout alone never bounds a model that keeps trickling tokens
+        deadline = started + timeout_s
+        scanner = JSONStreamScanner()
+        chunks = 0
+
+        try:
+            with self.session.post(
+                f'{self.base_url}/api/chat',
+                json=payload,
+                timeout=timeout_s,
+                stream=True,
+            ) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines():
+                    chunks += 1
+                    if self._feed_stream_line(scanner, line, deadline):
+                        # leaving the block closes the connection, which makes Ollama stop generating
+                        break
+        except LLMJSONError:
+            logger.warning('Aborted Ollama stream: output is not valid JSON', extra={'chunks': chunks})
+            raise
+        except Exception:
+            logger.exception('Streaming request to Ollama failed')
+            raise
+
+        return self._finish_stream(scanner, started, chunks)
+
+    async def _agenerate_json_stream(self, payload: dict[str, Any], timeout_s: int) -> Any:
+        started = time.monotonic()
+        deadline = started + timeout_s
+        scanner = JSONStreamScanner()
+        chunks = 0
+
+        try:
+            async with self._async_client().stream('POST', '/api/chat', json=payload, timeout=timeout_s) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    chunks += 1
+                    if self._feed_stream_line(scanner, line, deadline):
+                        break
+        except LLMJSONError:
+            logger.warning('Aborted Ollama stream: output is not valid JSON', extra={'chunks': chunks})
+            raise
+        except Exception:
+            logger.exception('Async streaming request to Ollama failed')
+            raise
+
+        return self._finish_stream(scanner, started, chunks)
+
+    def generate_json(self, system_prompt: str, user_prompt: str, timeout_s: int = 30) -> Any:
+        if settings.ollama_stream:
+            return self._generate_json_stream(self._payload(system_prompt, user_prompt, stream=True), timeout_s)
+
+        payload = self._payload(system_prompt, user_prompt)
 
         logger.debug(
             'Sending request to Ollama',
@@ -56,12 +221,12 @@ class OllamaClient(LLMClient):
         )
 
         try:
-            resp = requests.post(
+            resp = self.session.post(
                 f'{self.base_url}/api/chat',
                 json=payload,
                 timeout=timeout_s,
             )
-            
+
             resp.raise_for_status()
         except Exception:
             logger.exception('HTTP request to Ollama failed')
@@ -73,6 +238,57 @@ class OllamaClient(LLMClient):
             logger.exception('Failed to decode Ollama response as JSON')
             raise
 
+        return self._parse_content(resp_json)
+
+    async def agenerate_json(self, system_prompt: str, user_prompt: str, timeout_s: int = 30) -> Any:
+        if settings.ollama_stream:
+            return await self._agenerate_json_stream(self._payload(system_prompt, user_prompt, stream=True), timeout_s)
+
+        payload = self._payload(system_prompt, user_prompt)
+        client = self._async_client()
+
+        logger.debug(
+            'Sending async request to Ollama',
+            extra={
+                'url': f'{self.base_url}/api/chat',
+                'timeout_s': timeout_s,
+            },
+        )
+
+        attempts = max(0, settings.ollama_max_retries) + 1
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                resp = await client.post('/api/chat', json=payload, timeout=timeout_s)
+                if resp.status_code in _RETRY_STATUSES and not last:
+                    logger.warning(
+                        'Ollama returned a retryable status',
+                        extra={'status': resp.status_code, 'attempt': attempt + 1},
+                    )
+                else:
+                    resp.raise_for_status()
+                    break
+            except (httpx.ConnectError, httpx.RemoteProtocolError) as e:
+                if last:
+                    logger.exception('Async HTTP request to Ollama failed')
+                    raise
+                logger.warning('Ollama connection failed, retrying', extra={'attempt': attempt + 1, 'error': str(e)})
+            except Exception:
+                logger.exception('Async HTTP request to Ollama failed')
+                raise
+
+            await asyncio.sleep(settings.ollama_retry_backoff_s * (2**attempt))
+
+        try:
+            resp_json = resp.json()
+        except Exception:
+            logger.exception('Failed to decode Ollama response as JSON')
+            raise
+
+        return self._parse_content(resp_json)
+
+    @staticmethod
+    def _parse_content(resp_json: dict[str, Any]) -> Any:
         content = resp_json.get('message', {}).get('content', '').strip()
         logger.debug('Received LLM response')
         #logger.debug('LLM content (first 1000 chars): %s', content[:1000])
@@ -109,3 +325,13 @@ class OllamaClient(LLMClient):
             },
         )
         raise LLMJSONError('LLM output was not valid JSON.')
+
+    def close(self) -> None:
+        self.session.close()
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+# Bump when the meaning of qualifier output changes without the prompt text changing
+# (schema/normalization changes). Any edit to MEMORY_QUALIFIER_SYSTEM invalidates cached results anyway.
+MEMORY_QUALIFIER_VERSION = '1'
 
 MEMORY_QUALIFIER_SYSTEM = """
   You are a Memory Extraction Engine for a B2B assistant.
@@ -122,3 +125,39 @@ text:
 payload (json):
 {payload}
 """.strip()
+
+
+# Batched mode: the same rules, several events per call. Only the output envelope changes.
+MEMORY_QUALIFIER_BATCH_SYSTEM = (
+    MEMORY_QUALIFIER_SYSTEM
+    + """
+
+  ========================
+  BATCH MODE (overrides the output shape above)
+  ========================
+  You will receive SEVERAL events, each starting with a line `### event <id>`.
+  Qualify every event independently, exactly as if it were sent alone.
+  Output ONLY this JSON object, with exactly one entry per event id, in input order:
+
+  {
+    "results": [
+      { "id": "<event id>", "memories": [ ...memory objects as above... ] }
+    ]
+  }
+
+  - Each result MUST contain ONLY: id, memories.
+  - An event with nothing to store MUST still appear, with "memories": [].
+""".rstrip()
+)
+
+
+def build_memory_qualifier_batch_user_prompt(events: list[tuple[str, str, str, str, dict]]) -> str:
+    """
+    events: (id, actor_type, actor_id, text, payload) tuples.
+    """
+    blocks = [
+        f'### event {eid}\n'
+        + build_memory_qualifier_user_prompt(actor_type=actor_type, actor_id=actor_id, text=text, payload=payload)
+        for eid, actor_type, actor_id, text, payload in events
+    ]
+    return f'Classify these {len(events)} incoming events.\n\n' + '\n\n'.join(blocks)
@@ -20,3 +20,20 @@ class VectorDB(ABC):
     @abstractmethod
     def get(self, point_id: str) -> dict | None:
         raise NotImplementedError
+
+
+class Embedder(ABC):
+    """
+    I keep this interface so wrappers (registry, caching, batching) can stack on any model.
+    """
+
+    model_name: str
+    dim: int
+
+    @abstractmethod
+    def embed(self, text: str) -> list[float]:
+        raise NotImplementedError
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        # Naive default; real models should override this with one batched forward pass.
+        return [self.embed(t) for t in texts]
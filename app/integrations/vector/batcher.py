@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any
+
+from app.integrations.vector.base import Embedder
+
+logger = logging.getLogger(__name__)
+
+
+class _Pending:
+    __slots__ = ('texts', 'future')
+
+    def __init__(self, texts: list[str]) -> None:
+        self.texts = texts
+        self.future: Future[list[list[float]]] = Future()
+
+
+class MicroBatchingEmbedder(Embedder):
+    """
+    I sit in front of a real embedder and coalesce embed calls coming from concurrent
+    requests into a single embed_many() (one model.encode) call.
+
+    A batch is dispatched when it reaches max_batch_size texts, or max_wait_ms after the
+    first text arrived, whichever comes first. All encoding runs on one background thread,
+    so the model never sees concurrent forward passes.
+    """
+
+    def __init__(self, inner: Embedder, *, max_batch_size: int = 64, max_wait_ms: float = 5.0) -> None:
+        self.inner = inner
+        self.model_name = inner.model_name
+        self.dim = inner.dim
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue: queue.Queue[_Pending | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._encode_time_s = 0.0
+
+    def _ensure_started(self) -> None:
+        # caller holds self._lock
+        if self._closed:
+            raise RuntimeError('MicroBatchingEmbedder is closed')
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run,
+                name='embedding-microbatcher',
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _submit(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        p = _Pending(list(texts))
+        # checked and enqueued under the lock, so nothing lands behind close()'s stop marker
+        with self._lock:
+            self._ensure_started()
+            self._queue.put(p)
+        return p.future.result()
+
+    def embed(self, text: str) -> list[float]:
+        return self._submit([text])[0]
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        return self._submit(texts)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            n = len(first.texts)
+            deadline = time.monotonic() + self.max_wait_s
+
+            while n < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    # finish what we already collected, then exit
+                    stopping = True
+                    break
+                batch.append(item)
+                n += len(item.texts)
+
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list[_Pending]) -> None:
+        texts = [t for p in batch for t in p.texts]
+
+        t0 = time.perf_counter()
+        try:
+            # coalescing can overshoot (and one caller may send more): the model never sees more
+            # than max_batch_size texts per call
+            vecs: list[list[float]] = []
+            for start in range(0, len(texts), self.max_batch_size):
+                vecs.extend(self.inner.embed_many(texts[start : start + self.max_batch_size]))
+        except Exception as e:
+            logger.exception('Micro-batched embedding failed', extra={'batch_size': len(texts)})
+            for p in batch:
+                p.future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - t0
+
+        i = 0
+        for p in batch:
+            p.future.set_result(vecs[i : i + len(p.texts)])
+            i += len(p.texts)
+
+        with self._lock:
+            self._batches += 1
+            self._items += len(texts)
+            self._largest_batch = max(self._largest_batch, len(texts))
+            self._encode_time_s += elapsed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=5)
+
+        # whatever the worker didn't get to: fail it rather than leave callers waiting forever
+        while True:
+            try:
+                p = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if p is not None and not p.future.done():
+                p.future.set_exception(RuntimeError('MicroBatchingEmbedder is closed'))
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_s * 1000.0,
+                'batches': self._batches,
+                'items': self._items,
+                'avg_batch_size': (self._items / self._batches) if self._batches else 0.0,
+                'largest_batch': self._largest_batch,
+                'queue_depth': self._queue.qsize(),
+                'encode_time_s': round(self._encode_time_s, 3),
+            }
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+from app.integrations.vector.base import Embedder
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str | None) -> str:
+    # I keep normalization conservative so the cached vector is what the model would produce anyway.
+    return unicodedata.normalize('NFC', text or '').strip()
+
+
+def cache_key(model_name: str, normalized_text: str) -> str:
+    return hashlib.sha256(f'{model_name}\0{normalized_text}'.encode('utf-8')).hexdigest()
+
+
+class DiskEmbeddingStore:
+    """
+    I persist embeddings across restarts in a fixed-size float32 arena (np.memmap) plus an
+    append-only index log of `<hash> <slot>` lines.
+
+    The arena is a ring: once full, the oldest slot is overwritten. Only one process may own
+    a directory; others fall back to memory-only caching.
+    """
+
+    META_FILE = 'meta.json'
+    ARENA_FILE = 'vectors.f32'
+    INDEX_FILE = 'index.log'
+    LOCK_FILE = '.lock'
+
+    def __init__(self, directory: str, *, model_name: str, dim: int, capacity: int) -> None:
+        self.directory = directory
+        self.model_name = model_name
+        self.dim = int(dim)
+        self.capacity = max(1, int(capacity))
+
+        self._lock = threading.Lock()
+        self._slots: dict[str, int] = {}
+        self._slot_owner: dict[int, str] = {}
+        self._next_slot = 0
+        self._log_lines = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock_fh = open(os.path.join(directory, self.LOCK_FILE), 'a+')
+        try:
+            fcntl.flock(self._lock_fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_fh.close()
+            raise RuntimeError(f'Embedding cache dir is in use by another process: {directory}')
+
+        meta = {'model_name': model_name, 'dim': self.dim, 'capacity': self.capacity}
+        arena_path = os.path.join(directory, self.ARENA_FILE)
+        index_path = os.path.join(directory, self.INDEX_FILE)
+        meta_path = os.path.join(directory, self.META_FILE)
+
+        reuse = False
+        if os.path.exists(meta_path) and os.path.exists(arena_path):
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    reuse = json.load(f) == meta
+            except Exception:
+                reuse = False
+
+        if not reuse:
+            # model/dim/capacity changed (or first run): start from an empty arena
+            for p in (arena_path, index_path):
+                if os.path.exists(p):
+                    os.remove(p)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+
+        self._arena = np.memmap(
+            arena_path,
+            dtype=np.float32,
+            mode='r+' if reuse else 'w+',
+            shape=(self.capacity, self.dim),
+        )
+
+        if reuse:
+            self._replay_index(index_path)
+        self._index_fh = open(index_path, 'a', encoding='ascii')
+
+        logger.info(
+            'Opened on-disk embedding cache',
+            extra={'dir': directory, 'entries': len(self._slots), 'capacity': self.capacity},
+        )
+
+    def _replay_index(self, index_path: str) -> None:
+        if not os.path.exists(index_path):
+            return
+        last_slot = -1
+        with open(index_path, 'r', encoding='ascii', errors='ignore') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 2:
+                    continue  # torn write at the tail
+                key, slot_s = parts
+                try:
+                    slot = int(slot_s)
+                except ValueError:
+                    continue
+                if not 0 <= slot < self.capacity:
+                    continue
+                self._assign(key, slot)
+                last_slot = slot
+                self._log_lines += 1
+        self._next_slot = (last_slot + 1) % self.capacity
+
+    def _assign(self, key: str, slot: int) -> None:
+        previous = self._slot_owner.get(slot)
+        if previous is not None and previous != key:
+            self._slots.pop(previous, None)
+        old_slot = self._slots.get(key)
+        if old_slot is not None and old_slot != slot:
+            self._slot_owner.pop(old_slot, None)
+        self._slots[key] = slot
+        self._slot_owner[slot] = key
+
+    def get(self, key: str) -> list[float] | None:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                return None
+            return self._arena[slot].tolist()
+
+    def put(self, key: str, vector: list[float]) -> None:
+        with self._lock:
+            if key in self._slots:
+                return
+            slot = self._next_slot
+            self._next_slot = (slot + 1) % self.capacity
+
+            # vector first, index line second: a crash in between only loses the entry
+            self._arena[slot] = np.asarray(vector, dtype=np.float32)
+            self._assign(key, slot)
+            self._index_fh.write(f'{key} {slot}\n')
+            self._index_fh.flush()
+            self._log_lines += 1
+
+            if self._log_lines > 2 * self.capacity:
+                self._compact()
+
+    def _compact(self) -> None:
+        index_path = os.path.join(self.directory, self.INDEX_FILE)
+        tmp_path = index_path + '.tmp'
+        # keep ring order so replay recovers the right next slot
+        ordered = sorted(self._slots.items(), key=lambda kv: (kv[1] - self._next_slot) % self.capacity)
+        with open(tmp_path, 'w', encoding='ascii') as f:
+            for key, slot in ordered:
+                f.write(f'{key} {slot}\n')
+        self._index_fh.close()
+        os.replace(tmp_path, index_path)
+        self._index_fh = open(index_path, 'a', encoding='ascii')
+        self._log_lines = len(ordered)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def close(self) -> None:
+        with self._lock:
+            self._arena.flush()
+            self._index_fh.close()
+            self._lock_fh.close()
+
+
+class CachedEmbedder(Embedder):
+    """
+    I put a content-addressed cache in front of an embedder:
+    key = sha256(model_name + normalized text), an in-memory LRU tier and an optional
+    on-disk tier (DiskEmbeddingStore) that survives restarts.
+    """
+
+    def __init__(
+        self,
+        inner: Embedder,
+        *,
+        max_entries: int = 50_000,
+        disk: DiskEmbeddingStore | None = None,
+    ) -> None:
+        self.inner = inner
+        self.model_name = inner.model_name
+        self.dim = inner.dim
+        self.max_entries = max(1, int(max_entries))
+        self.disk = disk
+
+        self._lock = threading.Lock()
+        self._lru: OrderedDict[str, list[float]] = OrderedDict()
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _lookup(self, key: str) -> list[float] | None:
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+                self._hits += 1
+                return vec
+
+        if self.disk is not None:
+            vec = self.disk.get(key)
+            if vec is not None:
+                self._remember(key, vec, persist=False)
+                with self._lock:
+                    self._disk_hits += 1
+                return vec
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def _remember(self, key: str, vec: list[float], *, persist: bool = True) -> None:
+        with self._lock:
+            self._lru[key] = vec
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+                self._evictions += 1
+
+        if persist and self.disk is not None:
+            try:
+                self.disk.put(key, vec)
+            except Exception:
+                # the disk tier is best-effort; the memory tier still works
+                logger.exception('Failed to write embedding to disk cache')
+
+    def embed(self, text: str) -> list[float]:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        normalized = [normalize_text(t) for t in texts]
+        keys = [cache_key(self.model_name, n) for n in normalized]
+
+        out: list[list[float] | None] = [None] * len(texts)
+        missing: dict[str, list[int]] = {}
+        for i, key in enumerate(keys):
+            if key in missing:
+                # same text twice in one call: embed it once
+                missing[key].append(i)
+                continue
+            vec = self._lookup(key)
+            if vec is None:
+                missing[key] = [i]
+            else:
+                out[i] = vec
+
+        if missing:
+            miss_keys = list(missing)
+            vecs = self.inner.embed_many([normalized[missing[k][0]] for k in miss_keys])
+            for key, vec in zip(miss_keys, vecs):
+                self._remember(key, vec)
+                for i in missing[key]:
+                    out[i] = vec
+
+        return out  # type: ignore[return-value]
+
+    def close(self) -> None:
+        close = getattr(self.inner, 'close', None)
+        if close is not None:
+            close()
+        if self.disk is not None:
+            self.disk.close()
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                'hits': self._hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'hit_rate': ((self._hits + self._disk_hits) / lookups) if lookups else 0.0,
+                'size': len(self._lru),
+                'max_entries': self.max_entries,
+                'evictions': self._evictions,
+                'disk_entries': len(self.disk) if self.disk is not None else None,
+            }
@@ -3,16 +3,22 @@ from __future__ import annotations
 from sentence_transformers import SentenceTransformer
 
 from app.core.config import settings
+from app.integrations.vector.base import Embedder
 
 
-class SentenceTransformerEmbedder:
+class SentenceTransformerEmbedder(Embedder):
     """
     I wrap SentenceTransformer so the rest of the system doesn't care
     which embedding model is being used.
+
+    Don't build this directly in services; use get_embedder() from the registry
+    so the model is only loaded once per process.
     """
 
-    def __init__(self) -> None:
-        self.model = SentenceTransformer(settings.embedding_model)
+    def __init__(self, model_name: str | None = None, device: str | None = None) -> None:
+        self.model_name = model_name or settings.embedding_model
+        self.device = device or settings.embedding_device
+        self.model = SentenceTransformer(self.model_name, device=self.device)
         self.dim = self.model.get_sentence_embedding_dimension()
 
     def embed(self, text: str) -> list[float]:
@@ -22,3 +28,15 @@ class SentenceTransformerEmbedder:
             convert_to_numpy=True,
         )
         return vec.tolist()
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+
+        vecs = self.model.encode(
+            [t or '' for t in texts],
+            batch_size=settings.embedding_encode_batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        )
+        return vecs.tolist()
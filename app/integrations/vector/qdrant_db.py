@@ -1,13 +1,69 @@
 from __future__ import annotations
 
-from typing import Any
+import logging
+import threading
+from typing import Any, Callable, Iterator, Sequence, TypeVar
 
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as qm
+from qdrant_client.http.exceptions import UnexpectedResponse
 
 from app.core.config import settings
-from app.integrations.vector.base import VectorDB
-from app.integrations.vector.embedder import SentenceTransformerEmbedder
+from app.integrations.vector.base import Embedder, VectorDB
+from app.integrations.vector.registry import get_embedder
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+def _is_missing_collection(exc: Exception) -> bool:
+    if isinstance(exc, UnexpectedResponse):
+        return exc.status_code == 404
+
+    # over gRPC the same condition is an RpcError with NOT_FOUND
+    code = getattr(exc, 'code', None)
+    if callable(code):
+        try:
+            import grpc
+        except ImportError:  # pragma: no cover - grpcio ships with qdrant-client
+            return False
+        try:
+            return code() == grpc.StatusCode.NOT_FOUND
+        except Exception:
+            return False
+    return False
+
+
+def _chunks(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    size = max(1, int(size))
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def build_filter(filters: dict[str, Any] | None) -> qm.Filter | None:
+    """
+    {'type': 'fact', 'actor_id': 'u1', 'scope': ['profile', 'session']} -> Qdrant payload filter.
+    None values are ignored; lists mean "any of".
+    """
+    if not filters:
+        return None
+
+    must: list[qm.Condition] = []
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            must.append(qm.FieldCondition(key=key, match=qm.MatchAny(any=list(value))))
+        else:
+            must.append(qm.FieldCondition(key=key, match=qm.MatchValue(value=value)))
+
+    return qm.Filter(must=must) if must else None
+
+
+# payload fields dedup and retrieval filter on; each gets a keyword index so filtered searches
+# stay cheap as the collection grows
+PAYLOAD_INDEXES = ('key', 'type', 'scope', 'actor_type', 'actor_id')
 
 
 class QdrantVectorDB(VectorDB):
@@ -15,43 +71,257 @@ class QdrantVectorDB(VectorDB):
     I keep Qdrant operations here: ensure collection + upsert + get + search.
     """
 
-    def __init__(self) -> None:
-        self.client = QdrantClient(url=settings.qdrant_url)
-        self.collection = settings.qdrant_collection
-        self.embedder = SentenceTransformerEmbedder()
+    def __init__(self, embedder: Embedder | None = None, collection: str | None = None) -> None:
+        self.client = QdrantClient(
+            url=settings.qdrant_url,
+            prefer_grpc=settings.qdrant_prefer_grpc,
+            grpc_port=settings.qdrant_grpc_port,
+        )
+        # the app talks to settings.qdrant_collection, which may be an alias (see swap_alias)
+        self.collection = collection or settings.qdrant_collection
+        self.batch_size = settings.qdrant_batch_size
+        self.embedder = embedder or get_embedder()
         self.dim = self.embedder.dim
 
+        # I only check/create the collection once per process, not on every call.
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
     def ensure_ready(self) -> None:
-        existing = {c.name for c in self.client.get_collections().collections}
-        if self.collection in existing:
+        if self._ready:
             return
 
-        self.client.create_collection(
-            collection_name=self.collection,
-            vectors_config=qm.VectorParams(
-                size=self.dim,
-                distance=qm.Distance.COSINE,
-            ),
-        )
+        with self._ready_lock:
+            if self._ready:
+                return
 
-    def upsert(self, point_id: int, vector: list[float], payload: dict) -> None:
-        self.ensure_ready()
-        self.client.upsert(
-            collection_name=self.collection,
-            points=[
-                qm.PointStruct(
-                    id=point_id,
-                    vector=vector,
-                    payload=payload,
+            existing = {c.name for c in self.client.get_collections().collections}
+            if self.collection not in existing and self.alias_target(self.collection) is None:
+                logger.info('Creating Qdrant collection', extra={'collection': self.collection, 'dim': self.dim})
+                try:
+                    self.client.create_collection(
+                        collection_name=self.collection,
+                        vectors_config=qm.VectorParams(
+                            size=self.dim,
+                            distance=qm.Distance.COSINE,
+                        ),
+                    )
+                except UnexpectedResponse as e:
+                    # another worker created it between our check and create
+                    if e.status_code != 409:
+                        raise
+
+            self._ensure_payload_indexes()
+            self._ready = True
+
+    def _ensure_payload_indexes(self) -> None:
+        # creating an index that already exists is a no-op in Qdrant; a failure only costs speed
+        for field_name in PAYLOAD_INDEXES:
+            try:
+                self.client.create_payload_index(
+                    collection_name=self.collection,
+                    field_name=field_name,
+                    field_schema=qm.PayloadSchemaType.KEYWORD,
+                    wait=False,
+                )
+            except Exception:
+                logger.warning(
+                    'Failed to create Qdrant payload index',
+                    extra={'collection': self.collection, 'field': field_name},
+                    exc_info=True,
+                )
+
+    def alias_target(self, alias: str) -> str | None:
+        """
+        The collection `alias` points to, or None when no such alias exists.
+        """
+        for a in self.client.get_aliases().aliases:
+            if a.alias_name == alias:
+                return a.collection_name
+        return None
+
+    def swap_alias(self, alias: str, collection: str, *, replace_collection: bool = False) -> str | None:
+        """
+        I point `alias` at `collection` in one atomic alias update and return the collection it
+        pointed to before. A real collection named like the alias (pre-alias deployments) can only
+        be replaced with replace_collection=True: it has to be deleted first, so there is a short
+        window without anything behind the name.
+
+        replace_collection is for a stopped app only: a running one recreates the missing collection
+        lazily (see _call) inside that window, and the alias can't be created over it. I detect that
+        and raise; stop the app and run the swap again.
+        """
+        previous = self.alias_target(alias)
+        replaced = False
+        ops: list[Any] = []
+        if previous is not None:
+            ops.append(qm.DeleteAliasOperation(delete_alias=qm.DeleteAlias(alias_name=alias)))
+        elif alias in {c.name for c in self.client.get_collections().collections}:
+            if not replace_collection:
+                raise RuntimeError(
+                    f'{alias!r} is a collection, not an alias; pass replace_collection=True to delete it'
                 )
-            ],
+            logger.warning('Deleting collection to replace it with an alias', extra={'collection': alias})
+            self.client.delete_collection(collection_name=alias)
+            replaced = True
+
+        def recreated() -> RuntimeError | None:
+            if replaced and alias in {c.name for c in self.client.get_collections().collections}:
+                return RuntimeError(
+                    f'{alias!r} was recreated as a collection while it was being replaced (is the app '
+                    f'still running?); the data is in {collection!r}. Stop the app and swap again.'
+                )
+            return None
+
+        err = recreated()
+        if err is not None:
+            raise err
+
+        ops.append(qm.CreateAliasOperation(create_alias=qm.CreateAlias(collection_name=collection, alias_name=alias)))
+        try:
+            self.client.update_collection_aliases(change_aliases_operations=ops)
+        except Exception as e:
+            err = recreated()
+            if err is not None:
+                raise err from e
+            raise
+
+        logger.info('Swapped Qdrant alias', extra={'alias': alias, 'collection': collection, 'previous': previous})
+        return previous
+
+    def count(self) -> int:
+        return self._call(lambda: self.client.count(collection_name=self.collection, exact=True)).count
+
+    def invalidate(self) -> None:
+        """
+        Forget cached readiness; the next operation checks (and recreates) the collection.
+        """
+        self._ready = False
+
+    def _call(self, op: Callable[[], T]) -> T:
+        self.ensure_ready()
+        try:
+            return op()
+        except Exception as e:
+            if not _is_missing_collection(e):
+                raise
+
+        # The collection vanished under us (dropped / Qdrant restarted without storage).
+        logger.warning('Qdrant collection missing; recreating', extra={'collection': self.collection})
+        self.invalidate()
+        self.ensure_ready()
+        return op()
+
+    def upsert(self, point_id: int, vector: list[float], payload: dict) -> None:
+        self._call(
+            lambda: self.client.upsert(
+                collection_name=self.collection,
+                points=[
+                    qm.PointStruct(
+                        id=point_id,
+                        vector=vector,
+                        payload=payload,
+                    )
+                ],
+            )
         )
 
+    def upsert_many(
+        self,
+        points: list[tuple[int, list[float], dict]],
+        *,
+        wait: bool | None = None,
+    ) -> None:
+        """
+        Multi-point upsert of (point_id, vector, payload) tuples, `batch_size` points per request.
+        wait=False returns once Qdrant accepted the batch, before it is applied; pair it with
+        missing_points() when the caller needs to confirm the writes landed.
+        """
+        if not points:
+            return
+        wait = settings.qdrant_bulk_wait if wait is None else wait
+
+        for chunk in _chunks(points, self.batch_size):
+            structs = [qm.PointStruct(id=pid, vector=vec, payload=payload) for pid, vec, payload in chunk]
+            self._call(
+                lambda: self.client.upsert(
+                    collection_name=self.collection,
+                    points=structs,
+                    wait=wait,
+                )
+            )
+
+        logger.debug('Upserted Qdrant points', extra={'points': len(points), 'wait': wait})
+
+    def set_payload_many(
+        self,
+        updates: list[tuple[int, dict[str, Any]]],
+        *,
+        wait: bool | None = None,
+    ) -> None:
+        """
+        Batched update_payload_field(): merges each (point_id, payload) into the point's payload.
+        One request carries `batch_size` set-payload operations.
+        """
+        if not updates:
+            return
+        wait = settings.qdrant_bulk_wait if wait is None else wait
+
+        for chunk in _chunks(updates, self.batch_size):
+            ops = [
+                qm.SetPayloadOperation(set_payload=qm.SetPayload(payload=payload, points=[pid]))
+                for pid, payload in chunk
+            ]
+            self._call(
+                lambda: self.client.batch_update_points(
+                    collection_name=self.collection,
+                    update_operations=ops,
+                    wait=wait,
+                )
+            )
+
+        logger.debug('Updated Qdrant payloads', extra={'points': len(updates), 'wait': wait})
+
+    def retrieve_many(
+        self,
+        point_ids: list[int],
+        *,
+        with_payload: bool = True,
+        with_vectors: bool = False,
+    ) -> dict[int, dict[str, Any]]:
+        """
+        Batched get(): {point_id: {'id', 'payload'[, 'vector']}} for the points that exist.
+        """
+        out: dict[int, dict[str, Any]] = {}
+        for chunk in _chunks(point_ids, self.batch_size):
+            points = self._call(
+                lambda: self.client.retrieve(
+                    collection_name=self.collection,
+                    ids=list(chunk),
+                    with_payload=with_payload,
+                    with_vectors=with_vectors,
+                )
+            )
+            for p in points:
+                item: dict[str, Any] = {'id': str(p.id), 'payload': p.payload or {}}
+                if with_vectors:
+                    item['vector'] = p.vector
+                out[int(p.id)] = item
+        return out
+
+    def missing_points(self, point_ids: list[int]) -> list[int]:
+        """
+        Consistency check after wait=False writes: the ids that are not (yet) in the collection.
+        """
+        found = self.retrieve_many(point_ids, with_payload=False)
+        return [pid for pid in point_ids if int(pid) not in found]
+
     def get(self, point_id: str) -> dict | None:
-        self.ensure_ready()
-        points = self.client.retrieve(
-            collection_name=self.collection,
-            ids=[point_id],
+        points = self._call(
+            lambda: self.client.retrieve(
+                collection_name=self.collection,
+                ids=[point_id],
+            )
         )
         if not points:
             return None
@@ -64,23 +334,31 @@ class QdrantVectorDB(VectorDB):
 
     def search(
         self,
-        query: str,
+        query: str | None = None,
         *,
+        vector: list[float] | None = None,
         limit: int = 3,
         min_score: float | None = None,
+        filters: dict[str, Any] | None = None,
     ) -> list[dict[str, Any]]:
         """
-        Pure semantic search.
+        Semantic search, optionally restricted by payload `filters` (applied inside Qdrant).
+        Pass `vector` when the caller already embedded the text, so it isn't encoded twice.
         """
 
-        self.ensure_ready()
+        if vector is None and query is None:
+            raise ValueError('search needs either query or vector')
 
-        query_vector = self.embedder.embed(query)
+        query_vector = vector if vector is not None else self.embedder.embed(query)
 
-        results = self.client.search(
-            collection_name=self.collection,
-            query_vector=query_vector,
-            limit=limit,
+        results = self._call(
+            lambda: self.client.search(
+                collection_name=self.collection,
+                query_vector=query_vector,
+                query_filter=build_filter(filters),
+                limit=limit,
+                score_threshold=min_score,
+            )
         )
 
         hits: list[dict[str, Any]] = []
@@ -99,6 +377,51 @@ class QdrantVectorDB(VectorDB):
 
         return hits
     
+    def search_many(
+        self,
+        vectors: list[list[float]],
+        *,
+        limit: int = 1,
+        min_score: float | None = None,
+        filters: list[dict[str, Any] | None] | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        """
+        search() for many vectors through Qdrant's batch search: `batch_size` queries per request.
+        `filters` (optional) is aligned with `vectors`. Returns one hit list per vector.
+        """
+        if not vectors:
+            return []
+        if filters is None:
+            filters = [None] * len(vectors)
+
+        out: list[list[dict[str, Any]]] = []
+        for chunk in _chunks(list(zip(vectors, filters)), self.batch_size):
+            requests = [
+                qm.SearchRequest(
+                    vector=vec,
+                    filter=build_filter(flt),
+                    limit=limit,
+                    score_threshold=min_score,
+                    with_payload=True,
+                )
+                for vec, flt in chunk
+            ]
+            results = self._call(
+                lambda: self.client.search_batch(
+                    collection_name=self.collection,
+                    requests=requests,
+                )
+            )
+            for points in results:
+                out.append(
+                    [
+                        {'id': str(r.id), 'score': r.score, 'payload': r.payload or {}}
+                        for r in points
+                        if min_score is None or r.score >= min_score
+                    ]
+                )
+        return out
+
     def update_payload_field(
         self,
         point_id: str,
@@ -108,10 +431,10 @@ class QdrantVectorDB(VectorDB):
         """
         Update a single payload field for an existing point.
         """
-        self.ensure_ready()
-
-        self.client.set_payload(
-            collection_name=self.collection,
-            payload={key: value},
-            points=[point_id],
+        self._call(
+            lambda: self.client.set_payload(
+                collection_name=self.collection,
+                payload={key: value},
+                points=[point_id],
+            )
         )
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable
+
+from app.core.config import settings
+from app.core.metrics import register_metrics
+from app.integrations.vector.base import Embedder
+from app.integrations.vector.batcher import MicroBatchingEmbedder
+from app.integrations.vector.cache import CachedEmbedder, DiskEmbeddingStore
+
+logger = logging.getLogger(__name__)
+
+EmbedderFactory = Callable[[str, str | None], Embedder]
+
+
+def _rss_bytes() -> int | None:
+    # I read current RSS from /proc; elsewhere I just report nothing.
+    try:
+        with open('/proc/self/statm', 'r', encoding='ascii') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        return None
+
+
+def _param_bytes(embedder: Embedder) -> int | None:
+    model = getattr(embedder, 'model', None)
+    if model is None or not hasattr(model, 'parameters'):
+        return None
+    try:
+        return int(sum(p.numel() * p.element_size() for p in model.parameters()))
+    except Exception:
+        return None
+
+
+def _default_factory(model_name: str, device: str | None) -> Embedder:
+    # imported lazily so importing the registry doesn't pull in torch
+    from app.integrations.vector.embedder import SentenceTransformerEmbedder
+
+    return SentenceTransformerEmbedder(model_name=model_name, device=device)
+
+
+class EmbedderRegistry:
+    """
+    I hold one embedder per (model_name, device) for the whole process.
+    Models are loaded lazily on first use and then shared by every service.
+    """
+
+    def __init__(self, factory: EmbedderFactory | None = None) -> None:
+        self._factory = factory or _default_factory
+        self._lock = threading.Lock()
+        self._embedders: dict[tuple[str, str], Embedder] = {}
+        self._stats: dict[tuple[str, str], dict[str, Any]] = {}
+
+    @staticmethod
+    def _key(model_name: str | None, device: str | None) -> tuple[str, str]:
+        return (model_name or settings.embedding_model, device or settings.embedding_device or 'auto')
+
+    def get(self, model_name: str | None = None, device: str | None = None) -> Embedder:
+        key = self._key(model_name, device)
+
+        emb = self._embedders.get(key)
+        if emb is not None:
+            return emb
+
+        with self._lock:
+            emb = self._embedders.get(key)
+            if emb is None:
+                emb = self._wrap(self._load(key))
+                self._embedders[key] = emb
+        return emb
+
+    def _load(self, key: tuple[str, str]) -> Embedder:
+        model_name, device = key
+        logger.info('Loading embedding model', extra={'model': model_name, 'device': device})
+
+        rss_before = _rss_bytes()
+        t0 = time.perf_counter()
+        emb = self._factory(model_name, None if device == 'auto' else device)
+        load_time_s = time.perf_counter() - t0
+        rss_after = _rss_bytes()
+
+        self._stats[key] = {
+            'model': model_name,
+            'device': device,
+            'dim': getattr(emb, 'dim', None),
+            'load_time_s': round(load_time_s, 3),
+            'rss_delta_bytes': (
+                rss_after - rss_before if rss_before is not None and rss_after is not None else None
+            ),
+            'param_bytes': _param_bytes(emb),
+            'loaded_at': time.time(),
+        }
+
+        logger.info('Loaded embedding model', extra=self._stats[key])
+        return emb
+
+    def _wrap(self, emb: Embedder) -> Embedder:
+        # the layers callers actually talk to; the raw model stays underneath
+        if settings.embedding_micro_batching:
+            emb = MicroBatchingEmbedder(
+                emb,
+                max_batch_size=settings.embedding_batch_max_size,
+                max_wait_ms=settings.embedding_batch_max_wait_ms,
+            )
+
+        # cache goes outermost so only misses reach the batcher/model
+        if settings.embedding_cache_enabled:
+            emb = CachedEmbedder(
+                emb,
+                max_entries=settings.embedding_cache_max_entries,
+                disk=self._open_disk_cache(emb),
+            )
+        return emb
+
+    @staticmethod
+    def _open_disk_cache(emb: Embedder) -> DiskEmbeddingStore | None:
+        if not settings.embedding_cache_dir:
+            return None
+
+        # one sub-directory per model so switching models never mixes vectors
+        safe_name = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in emb.model_name)
+        try:
+            return DiskEmbeddingStore(
+                os.path.join(settings.embedding_cache_dir, safe_name),
+                model_name=emb.model_name,
+                dim=emb.dim,
+                capacity=settings.embedding_cache_disk_max_entries,
+            )
+        except Exception:
+            logger.warning('On-disk embedding cache unavailable; using memory tier only', exc_info=True)
+            return None
+
+    def clear(self) -> None:
+        with self._lock:
+            for emb in self._embedders.values():
+                close = getattr(emb, 'close', None)
+                if close is not None:
+                    close()
+            self._embedders.clear()
+            self._stats.clear()
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            models = []
+            for key, stats in self._stats.items():
+                m = dict(stats)
+                emb = self._embedders.get(key)
+                while emb is not None:
+                    if isinstance(emb, CachedEmbedder):
+                        m['cache'] = emb.metrics()
+                    elif isinstance(emb, MicroBatchingEmbedder):
+                        m['micro_batching'] = emb.metrics()
+                    emb = getattr(emb, 'inner', None)
+                models.append(m)
+        return {
+            'loaded_models': len(models),
+            'process_rss_bytes': _rss_bytes(),
+            'models': models,
+        }
+
+
+embedder_registry = EmbedderRegistry()
+register_metrics('embedders', embedder_registry.metrics)
+
+
+def get_embedder(model_name: str | None = None, device: str | None = None) -> Embedder:
+    """
+    Process-wide shared embedder. This is what services should use.
+    """
+    return embedder_registry.get(model_name, device)
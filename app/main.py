@@ -1,30 +1,84 @@
 from dotenv import load_dotenv
 load_dotenv() 
 
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from app.api.deps import aclose_services, close_services, flush_services, get_memory_service
 from app.api.v1 import router as v1_router
+from app.core.config import settings
+from app.core.executors import configure_threadpool
 from app.core.logging_config import setup_logging
 from app.db.base import Base
-from app.db.session import engine
+from app.db.session import SessionLocal, engine
+from app.db.upgrade import upgrade_schema
+from app.services.ingest_worker import IngestWorkerPool
+from app.services.memory_outbox import OutboxDrainer
 
 import app.models
 
 setup_logging()
 
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup
+    configure_threadpool()
+
     # auto-create tables for now. TODO move to Alembic once schema stabilizes.
     Base.metadata.create_all(bind=engine)
+    # ...which never adds columns to existing tables (e.g. memories.content_hash)
+    upgrade_schema(engine)
+
+    if settings.qdrant_ensure_on_startup:
+        # readiness is cached after this, so requests don't pay a get_collections round trip.
+        # Failing here is not fatal: the vector DB retries lazily on first use.
+        try:
+            get_memory_service().vector_db_svc.vdb.ensure_ready()
+        except Exception:
+            logger.warning('Qdrant readiness check at startup failed', exc_info=True)
+
+    ingest_workers: IngestWorkerPool | None = None
+    if settings.async_ingest:
+        ingest_workers = IngestWorkerPool(get_memory_service, SessionLocal)
+        ingest_workers.start()
+
+    outbox_drainer: OutboxDrainer | None = None
+    if settings.outbox_enabled and settings.outbox_drainer_in_app:
+        outbox_drainer = OutboxDrainer(
+            lambda: get_memory_service().vector_db_svc,
+            lambda: get_memory_service().kg,
+            SessionLocal,
+        )
+        outbox_drainer.start()
 
     yield
 
     # shutdown
-    # (nothing for now)
+    if ingest_workers is not None:
+        ingest_workers.stop()
+    if outbox_drainer is not None:
+        outbox_drainer.stop()
+
+    try:
+        # queued KG writes must reach the graph before the process goes away
+        flush_services()
+    except Exception:
+        logger.exception('Failed to flush buffered KG writes on shutdown')
+
+    try:
+        await aclose_services()
+    except Exception:
+        logger.warning('Failed to close async service clients on shutdown', exc_info=True)
+
+    try:
+        close_services()
+    except Exception:
+        logger.warning('Failed to close service clients on shutdown', exc_info=True)
 
 
 def create_app() -> FastAPI:
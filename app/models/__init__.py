@@ -1,3 +1,5 @@
 # import models here so metadata includes them when Base.metadata.create_all runs.
 from app.models.event import Event
-from app.models.memory import Memory
\ No newline at end of file
+from app.models.memory import Memory
+from app.models.ingest_job import IngestJob
+from app.models.memory_outbox import OutboxEntry
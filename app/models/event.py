@@ -4,7 +4,7 @@ from typing import TYPE_CHECKING
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.dialects.mysql import JSON as MYSQL_JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -19,6 +19,10 @@ class Event(Base):
     """
 
     __tablename__ = 'events'
+    __table_args__ = (
+        # an actor's events, newest first
+        Index('ix_events_actor_created', 'actor_type', 'actor_id', 'created_at'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     actor_type: Mapped[str] = mapped_column(String(50), default='user')
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class IngestJob(Base):
+    """
+    Durable work item for async ingestion: one row per event that still needs
+    qualification + indexing. Written in the same transaction as the event.
+    """
+
+    __tablename__ = 'ingest_jobs'
+    __table_args__ = (
+        Index('ix_ingest_jobs_status_available', 'status', 'available_at'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    event_id: Mapped[int] = mapped_column(
+        ForeignKey('events.id', ondelete='CASCADE'),
+        nullable=False,
+        unique=True,
+    )
+
+    # pending -> processing -> done | failed (pending again while retries are left)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default='pending')
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    available_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
+    claim_token: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    locked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
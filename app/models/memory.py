@@ -3,7 +3,7 @@ from typing import TYPE_CHECKING
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Text, func
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.dialects.mysql import JSON as MYSQL_JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -18,6 +18,15 @@ class Memory(Base):
     """
 
     __tablename__ = 'memories'
+    __table_args__ = (
+        # list_memories: WHERE scope = ? AND type = ? ORDER BY id DESC (keyset on id)
+        Index('ix_memories_scope_type_id', 'scope', 'type', 'id'),
+        # list_memories with only ?type=
+        Index('ix_memories_type_id', 'type', 'id'),
+        Index('ix_memories_key', 'key'),
+        # exact dedup: content_hash IN (...) before any embedding / ANN search
+        Index('ix_memories_content_hash', 'content_hash'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
@@ -26,6 +35,8 @@ class Memory(Base):
     key: Mapped[str] = mapped_column(String(128), nullable=False)
     value: Mapped[dict] = mapped_column(MYSQL_JSON, nullable=False, default=dict)
     confidence: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    # sha256 of actor + type + key + canonical value (see exact_dedup.content_hash); NULL on older rows
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     assertion_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     decay: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
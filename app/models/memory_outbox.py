@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class OutboxEntry(Base):
+    """
+    Pending side effect of a stored memory: index it in Qdrant and the KG.
+    Written in the same transaction as the Memory row, drained by OutboxDrainer.
+    """
+
+    __tablename__ = 'memory_outbox'
+    __table_args__ = (
+        Index('ix_memory_outbox_status_available', 'status', 'available_at'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    memory_id: Mapped[int] = mapped_column(
+        ForeignKey('memories.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True,
+    )
+
+    # pending -> processing -> done | failed (pending again while retries are left)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default='pending')
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    available_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
+    claim_token: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    locked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
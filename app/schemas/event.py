@@ -2,7 +2,14 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from pydantic import BaseModel, ConfigDict
+from typing import TYPE_CHECKING, Literal, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.schemas.memory import MemoryOut
+
+if TYPE_CHECKING:
+    from app.models.event import Event
 
 
 class EventCreate(BaseModel):
@@ -12,6 +19,10 @@ class EventCreate(BaseModel):
     payload: dict = {}
 
 
+# Anything with actor_type / actor_id can act as a memory's source event (ORM row or request item).
+EventLike = Union['Event', EventCreate]
+
+
 class EventOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -22,3 +33,41 @@ class EventOut(BaseModel):
     payload: dict
 
     created_at: datetime
+
+    # set in async ingest mode: memories are produced later by background workers
+    processing_status: str | None = None
+
+
+class EventStatusOut(BaseModel):
+    event_id: int
+    status: Literal['pending', 'processing', 'done', 'failed']
+    attempts: int = 0
+    error: str | None = None
+
+    memories: list[MemoryOut] = []
+
+
+class BulkEventsIn(BaseModel):
+    events: list[EventCreate] = Field(min_length=1)
+
+
+class BulkEventItemOut(BaseModel):
+    index: int
+    status: Literal['processed', 'skipped', 'failed']
+    event_id: int | None = None
+    memories_created: int = 0
+    duplicates: int = 0
+    error: str | None = None
+
+
+class BulkEventsOut(BaseModel):
+    total: int
+    processed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    memories_created: int = 0
+
+    elapsed_s: float
+    events_per_s: float
+
+    items: list[BulkEventItemOut]
@@ -15,3 +15,8 @@ class QualifiedMemory(BaseModel):
 class MemoryQualification(BaseModel):
     model_config = ConfigDict(extra='forbid')
     memories: list[QualifiedMemory] = Field(default_factory=list)
+
+class BatchQualificationItem(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+    id: str
+    memories: list[QualifiedMemory] = Field(default_factory=list)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class MemoryCreate(BaseModel):
@@ -33,3 +33,42 @@ class MemoryOut(BaseModel):
     superseded_by_memory_id: int | None = None
     created_at: datetime
     event_id: int
+
+
+class MemoryListItemOut(BaseModel):
+    """
+    I am a MemoryOut whose `value` may be projected away (GET /v1/memories?include_value=false).
+    Serialize with exclude_unset so a skipped value is omitted rather than sent as null.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    type: str
+    scope: str
+    key: str
+    value: dict | None = None
+    confidence: float
+
+    assertion_count: int
+    decay: float
+    superseded_by_memory_id: int | None = None
+    created_at: datetime
+    event_id: int
+
+
+class MemorySearchIn(BaseModel):
+    query: str = Field(min_length=1)
+
+    actor_type: str | None = None
+    actor_id: str | None = None
+    type: str | None = None
+    scope: str | None = None
+
+    k: int = Field(default=10, ge=1, le=100)
+    min_score: float | None = Field(default=None, ge=-1.0, le=1.0)
+
+
+class MemorySearchHit(BaseModel):
+    score: float
+    memory: MemoryOut
@@ -18,3 +18,6 @@ class MessageOut(BaseModel):
     output_text: str | None = None
 
     memories_created: int = 0
+
+    # 'pending' when the message was queued for async processing
+    processing_status: str | None = None
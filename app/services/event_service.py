@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 import logging
 
+from app.db.bulk import insert_returning_ids
 from app.models.event import Event
 from app.schemas.event import EventCreate
 
@@ -10,7 +11,10 @@ logger = logging.getLogger(__name__)
 
 class EventService:
 
-    def create_event(self, db: Session, data: EventCreate) -> Event:
+    def create_event(self, db: Session, data: EventCreate, commit: bool = True) -> Event:
+        """
+        With commit=False I only flush (so evt.id is set) and leave the transaction to the caller.
+        """
         logger.debug(
             'Creating event',
             extra={
@@ -30,8 +34,11 @@ class EventService:
 
         try:
             db.add(evt)
-            db.commit()
-            db.refresh(evt)
+            if commit:
+                db.commit()
+                db.refresh(evt)
+            else:
+                db.flush()
         except Exception:
             logger.exception('Failed to create event in DB')
             raise
@@ -46,6 +53,33 @@ class EventService:
         )
         return evt
 
+    def create_events(self, db: Session, items: list[EventCreate]) -> list[int]:
+        """
+        Bulk variant of create_event: one multi-row INSERT, no refresh.
+        Returns the new event ids in input order. The caller commits.
+        """
+        if not items:
+            return []
+
+        rows = [
+            {
+                'actor_type': d.actor_type,
+                'actor_id': d.actor_id,
+                'text': d.text,
+                'payload': d.payload or {},
+            }
+            for d in items
+        ]
+
+        try:
+            ids = insert_returning_ids(db, Event, rows)
+        except Exception:
+            logger.exception('Failed to bulk insert events', extra={'count': len(items)})
+            raise
+
+        logger.debug('Bulk created events', extra={'count': len(ids)})
+        return ids
+
     def get_event(self, db: Session, event_id: int) -> Event | None:
         logger.debug(
             'Fetching event',
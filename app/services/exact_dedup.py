@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.memory import Memory
+from app.schemas.event import EventLike
+
+
+def content_hash(actor: EventLike | None, m_type: str | None, key: str | None, value: dict | None) -> str:
+    """
+    sha256 over canonical JSON of the dedup scope (actor, type, key) plus the value:
+    byte-identical re-assertions by the same actor hash the same regardless of dict order.
+    """
+    doc = {
+        'actor_type': getattr(actor, 'actor_type', None),
+        'actor_id': getattr(actor, 'actor_id', None),
+        'type': m_type,
+        'key': key,
+        'value': value or {},
+    }
+    canonical = json.dumps(doc, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ExactDedup:
+    """
+    I answer "is this exact memory already stored?" without an embedding or an ANN search:
+    an in-process LRU of content_hash -> memory_id, then one indexed SELECT for the misses.
+    Only near-duplicates (no exact hit) go on to the vector path.
+
+    Rows written before content_hash existed have it NULL and are only found by the vector path.
+    """
+
+    def __init__(self, max_entries: int = 100_000) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._lru: OrderedDict[str, int] = OrderedDict()
+
+        self._lookups = 0
+        self._lru_hits = 0
+        self._db_hits = 0
+
+    def lookup_many(self, db: Session | None, hashes: list[str]) -> dict[str, int]:
+        """
+        Returns {content_hash: memory_id} for the hashes that are already stored.
+        Without a session only the LRU is consulted.
+        """
+        found: dict[str, int] = {}
+        with self._lock:
+            for h in hashes:
+                memory_id = self._lru.get(h)
+                if memory_id is not None:
+                    self._lru.move_to_end(h)
+                    found[h] = memory_id
+
+        missing = list({h for h in hashes if h not in found})
+        from_db: dict[str, int] = {}
+        if db is not None and missing:
+            stmt = (
+                select(Memory.content_hash, func.min(Memory.id))
+                .where(Memory.content_hash.in_(missing))
+                .group_by(Memory.content_hash)
+            )
+            from_db = {h: int(mid) for h, mid in db.execute(stmt).all()}
+            self.remember(from_db)
+            found.update(from_db)
+
+        with self._lock:
+            self._lookups += len(hashes)
+            self._db_hits += sum(1 for h in hashes if h in from_db)
+            self._lru_hits += sum(1 for h in hashes if h in found and h not in from_db)
+        return found
+
+    def remember(self, pairs: dict[str, int]) -> None:
+        """
+        Record committed (content_hash, memory_id) pairs; never call this before the commit.
+        """
+        with self._lock:
+            for h, memory_id in pairs.items():
+                self._lru[h] = memory_id
+                self._lru.move_to_end(h)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            hits = self._lru_hits + self._db_hits
+            return {
+                'entries': len(self._lru),
+                'lookups': self._lookups,
+                'lru_hits': self._lru_hits,
+                'db_hits': self._db_hits,
+                'misses': self._lookups - hits,
+                'hit_rate': round(hits / self._lookups, 4) if self._lookups else 0.0,
+            }
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import logging
+import uuid
+from datetime import timedelta
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.util import utcnow
+from app.models.ingest_job import IngestJob
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueue:
+    """
+    I am the DB-backed (durable) queue behind async ingestion.
+    Jobs are claimed with a per-claim token, so several workers (threads or processes)
+    can poll the same table without double-processing.
+    """
+
+    def enqueue(self, db: Session, event_id: int) -> IngestJob:
+        """
+        Add a job for the event. No commit: the caller commits it together with the event.
+        """
+        now = utcnow()
+        job = IngestJob(event_id=event_id, status='pending', attempts=0, available_at=now)
+        db.add(job)
+        return job
+
+    def claim(self, db: Session, limit: int) -> list[IngestJob]:
+        now = utcnow()
+        token = uuid.uuid4().hex
+
+        # jobs stuck in 'processing' past the lock timeout belong to a dead worker
+        stale_before = now - timedelta(seconds=settings.ingest_stale_lock_s)
+        db.execute(
+            update(IngestJob)
+            .where(IngestJob.status == 'processing', IngestJob.locked_at < stale_before)
+            .values(status='pending', claim_token=None, locked_at=None)
+        )
+
+        q = (
+            select(IngestJob.id)
+            .where(IngestJob.status == 'pending', IngestJob.available_at <= now)
+            .order_by(IngestJob.id)
+            .limit(limit)
+        )
+        if db.get_bind().dialect.name == 'mysql':
+            q = q.with_for_update(skip_locked=True)
+        ids = list(db.execute(q).scalars())
+
+        if not ids:
+            db.commit()
+            return []
+
+        # the status guard makes the claim safe even where SKIP LOCKED isn't available
+        db.execute(
+            update(IngestJob)
+            .where(IngestJob.id.in_(ids), IngestJob.status == 'pending')
+            .values(
+                status='processing',
+                claim_token=token,
+                locked_at=now,
+                attempts=IngestJob.attempts + 1,
+            )
+        )
+        db.commit()
+
+        return list(db.execute(select(IngestJob).where(IngestJob.claim_token == token)).scalars())
+
+    def complete(self, db: Session, job_ids: list[int], token: str | None) -> None:
+        """
+        Mark jobs done, but only while `token` still holds them: after a stale-lock reclaim
+        another worker owns the job and a slow one must not touch it.
+        """
+        if not job_ids:
+            return
+        db.execute(
+            update(IngestJob)
+            .where(IngestJob.id.in_(job_ids), IngestJob.claim_token == token)
+            .values(status='done', last_error=None, claim_token=None, locked_at=None)
+        )
+        db.commit()
+
+    def fail(self, db: Session, job: IngestJob, error: str, token: str | None) -> None:
+        """
+        Retry with exponential backoff until ingest_max_attempts, then park as failed.
+        Like complete(), only while `token` still holds the job.
+        """
+        # read before the commit expires the job
+        job_id, event_id, attempts = job.id, job.event_id, int(job.attempts or 0)
+        give_up = attempts >= settings.ingest_max_attempts
+        delay = settings.ingest_retry_backoff_s * (2 ** max(0, attempts - 1))
+
+        result = db.execute(
+            update(IngestJob)
+            .where(IngestJob.id == job_id, IngestJob.claim_token == token)
+            .values(
+                status='failed' if give_up else 'pending',
+                last_error=error[:2000],
+                claim_token=None,
+                locked_at=None,
+                available_at=utcnow() + timedelta(seconds=delay),
+            )
+        )
+        db.commit()
+        if result.rowcount == 0:
+            logger.warning('Ingest job was reclaimed by another worker', extra={'job_id': job_id})
+            return
+
+        logger.warning(
+            'Ingest job failed',
+            extra={'job_id': job_id, 'event_id': event_id, 'attempts': attempts, 'gave_up': give_up},
+        )
+
+    def get_for_event(self, db: Session, event_id: int) -> IngestJob | None:
+        return db.execute(select(IngestJob).where(IngestJob.event_id == event_id)).scalar_one_or_none()
+
+    def depth(self, db: Session) -> dict[str, int]:
+        rows = db.execute(select(IngestJob.status, func.count()).group_by(IngestJob.status)).all()
+        return {status: int(n) for status, n in rows}
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.bulk import insert_returning_ids
+from app.models.memory import Memory
+from app.schemas.event import BulkEventItemOut, BulkEventsOut, EventCreate, EventLike
+from app.schemas.llm import QualifiedMemory
+from app.services.event_service import EventService
+from app.services.memory_service import MemoryService, QualifyRequest
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Staged:
+    """One chunk whose events are persisted and whose qualification is in flight."""
+
+    indexes: list[int]
+    event_ids: list[int]
+    items: list[EventCreate]
+    # per event: (future of its qualify_many group, position inside that group)
+    futures: list[tuple[Future[list[list[QualifiedMemory] | Exception]], int]] = field(default_factory=list)
+
+
+@dataclass
+class _Indexed:
+    """Memories of one chunk upserted without waiting, still to be checked against the vector DB."""
+
+    mems: list[Memory]
+    vectors: list[list[float]]
+    events: list[EventLike | None]
+
+
+class BulkIngestService:
+    """
+    I ingest many events at once (backfills). Per chunk of `bulk_chunk_size` events:
+    - one multi-row INSERT for the events,
+    - LLM qualification on a bounded thread pool (overlapping with the previous chunk's writes),
+      `qualify_batch_size` events per LLM call,
+    - one batched embed for every qualified memory of the chunk,
+    - one multi-row INSERT for the new memories and one commit,
+    - one multi-point Qdrant upsert and batched nGQL for the KG.
+    """
+
+    def __init__(self, memory_svc: MemoryService, event_svc: EventService | None = None) -> None:
+        self.memory_svc = memory_svc
+        self.event_svc = event_svc or EventService()
+
+    def ingest(self, db: Session, items: list[EventCreate]) -> BulkEventsOut:
+        t0 = time.perf_counter()
+        results = [BulkEventItemOut(index=i, status='failed') for i in range(len(items))]
+        chunk_size = max(1, settings.bulk_chunk_size)
+
+        logger.info('Bulk ingest start', extra={'events': len(items), 'chunk_size': chunk_size})
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, settings.bulk_llm_concurrency),
+            thread_name_prefix='bulk-qualify',
+        ) as pool:
+            pending: _Staged | None = None
+            # with QDRANT_BULK_WAIT=false, a chunk's points are checked one chunk later
+            unverified: _Indexed | None = None
+            for start in range(0, len(items), chunk_size):
+                staged = self._stage_chunk(db, start, items[start : start + chunk_size], pool, results)
+                # while this chunk is being qualified, write out the previous one
+                if pending is not None:
+                    indexed = self._write_chunk(db, pending, results)
+                    self._verify_indexed(unverified)
+                    unverified = indexed
+                pending = staged
+            if pending is not None:
+                self._verify_indexed(self._write_chunk(db, pending, results))
+            self._verify_indexed(unverified)
+
+        elapsed = time.perf_counter() - t0
+        out = BulkEventsOut(
+            total=len(items),
+            processed=sum(1 for r in results if r.status == 'processed'),
+            skipped=sum(1 for r in results if r.status == 'skipped'),
+            failed=sum(1 for r in results if r.status == 'failed'),
+            memories_created=sum(r.memories_created for r in results),
+            elapsed_s=round(elapsed, 3),
+            events_per_s=round(len(items) / elapsed, 2) if elapsed > 0 else 0.0,
+            items=results,
+        )
+
+        logger.info(
+            'Bulk ingest done',
+            extra={k: v for k, v in out.model_dump().items() if k != 'items'},
+        )
+        return out
+
+    def _stage_chunk(
+        self,
+        db: Session,
+        start: int,
+        chunk: list[EventCreate],
+        pool: ThreadPoolExecutor,
+        results: list[BulkEventItemOut],
+    ) -> _Staged | None:
+        indexes = list(range(start, start + len(chunk)))
+        try:
+            event_ids = self.event_svc.create_events(db, chunk)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.exception('Bulk ingest: event insert failed', extra={'chunk_start': start})
+            for i in indexes:
+                results[i].error = f'event insert failed: {e}'
+            return None
+
+        staged = _Staged(indexes=indexes, event_ids=event_ids, items=chunk)
+        # only plain values cross the thread boundary; the session stays on this thread
+        reqs = [
+            QualifyRequest(
+                actor_type=item.actor_type,
+                actor_id=item.actor_id,
+                text=item.text,
+                payload=item.payload,
+                event_id=eid,
+            )
+            for eid, item in zip(event_ids, chunk)
+        ]
+        # one task per qualify_batch_size events, so batched prompts still run concurrently
+        group = max(1, settings.qualify_batch_size)
+        for g in range(0, len(reqs), group):
+            fut = pool.submit(self.memory_svc.qualify_many, reqs[g : g + group])
+            staged.futures.extend((fut, pos) for pos in range(len(reqs[g : g + group])))
+
+        for idx, eid in zip(indexes, event_ids):
+            results[idx].event_id = eid
+        return staged
+
+    def _verify_indexed(self, indexed: _Indexed | None) -> None:
+        if indexed is None:
+            return
+        try:
+            self.memory_svc.vector_db_svc.repair_missing(indexed.mems, indexed.vectors, indexed.events)
+        except Exception:
+            logger.exception('Bulk ingest: vector consistency check failed', extra={'memories': len(indexed.mems)})
+
+    def _write_chunk(self, db: Session, staged: _Staged, results: list[BulkEventItemOut]) -> _Indexed | None:
+        """
+        Returns what was upserted to the vector DB without waiting (QDRANT_BULK_WAIT=false), to be
+        checked by _verify_indexed() later; None otherwise.
+        """
+        mem_svc = self.memory_svc
+        vdb_svc = mem_svc.vector_db_svc
+
+        # (result index, event id, event item, qualified memory, type, scope, key)
+        candidates: list[tuple[int, int, EventCreate, QualifiedMemory, str, str, str]] = []
+        for idx, eid, item, (fut, pos) in zip(staged.indexes, staged.event_ids, staged.items, staged.futures):
+            try:
+                qualified = fut.result()[pos]
+                if isinstance(qualified, Exception):
+                    raise qualified
+            except Exception as e:
+                logger.warning('Bulk ingest: qualification failed', extra={'event_id': eid}, exc_info=True)
+                results[idx].error = f'qualification failed: {e}'
+                continue
+
+            results[idx].status = 'processed' if (item.text or item.payload) else 'skipped'
+            for m in qualified:
+                candidates.append((idx, eid, item, m, *mem_svc.normalize_qualified(m)))
+
+        if not candidates:
+            return
+
+        try:
+            rows: list[dict] = []
+            new: list[tuple[int, EventCreate, list[float]]] = []
+            increments: dict[int, int] = {}
+            # exact copies by content hash, then one batch search for the rest of the chunk;
+            # copies across events of the chunk are caught locally
+            matches, vectors, hashes = mem_svc.dedup(
+                db, [(item, m_type, key, m.value or {}) for _, _, item, m, m_type, _, key in candidates]
+            )
+
+            row_of: dict[int, int] = {}
+            for i, ((idx, eid, item, m, m_type, m_scope, key), vector, dup) in enumerate(
+                zip(candidates, vectors, matches)
+            ):
+                if dup is not None:
+                    if dup.memory_id is not None:
+                        increments[dup.memory_id] = increments.get(dup.memory_id, 0) + 1
+                    else:
+                        rows[row_of[dup.batch_index]]['assertion_count'] += 1
+                    results[idx].duplicates += 1
+                    continue
+
+                row_of[i] = len(rows)
+                rows.append(
+                    {
+                        'type': m_type,
+                        'scope': m_scope,
+                        'key': key,
+                        'value': m.value or {},
+                        'confidence': float(m.confidence or 0.0),
+                        'content_hash': hashes[i],
+                        'assertion_count': 0,
+                        'decay': 0.0,
+                        'event_id': eid,
+                    }
+                )
+                new.append((idx, item, vector))
+            memory_ids = insert_returning_ids(db, Memory, rows)
+            if mem_svc.outbox is not None:
+                mem_svc.outbox.add_many(db, memory_ids)
+            mem_svc.increment_assertion_counts(db, increments)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.exception('Bulk ingest: memory write failed', extra={'events': len(staged.event_ids)})
+            for idx in {c[0] for c in candidates}:
+                results[idx].status = 'failed'
+                results[idx].error = f'memory write failed: {e}'
+                results[idx].duplicates = 0
+            return
+
+        # transient objects: enough for the Qdrant payload and the KG, no SELECT needed
+        mems = [Memory(id=mid, **row) for mid, row in zip(memory_ids, rows)]
+        mem_svc.remember_written(mems)
+        for idx, _, _ in new:
+            results[idx].memories_created += 1
+
+        if mem_svc.outbox is not None:
+            # indexing happens in the outbox drainer
+            return
+
+        vectors = [v for _, _, v in new]
+        events: list[EventLike | None] = [item for _, item, _ in new]
+        upserted = False
+        try:
+            vdb_svc.upsert_memories(mems, vectors, events)
+            upserted = True
+        except Exception:
+            logger.exception('Bulk ingest: vector upsert failed', extra={'memories': len(mems)})
+
+        try:
+            mem_svc.kg.upsert_memories([(mem, item) for mem, (_, item, _) in zip(mems, new)])
+        except Exception:
+            logger.exception('Bulk ingest: KG upsert failed', extra={'memories': len(mems)})
+
+        if upserted and not settings.qdrant_bulk_wait:
+            return _Indexed(mems=mems, vectors=vectors, events=events)
+        return None
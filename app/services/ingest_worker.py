@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import register_metrics
+from app.models.event import Event
+from app.models.ingest_job import IngestJob
+from app.services.ingest_queue import IngestQueue
+from app.services.memory_service import MemoryService, QualifyRequest
+
+logger = logging.getLogger(__name__)
+
+
+class IngestWorkerPool:
+    """
+    I run a fixed number of background threads that drain the ingest queue:
+    claim a few jobs, qualify + store + index their events, mark them done (or retry later).
+    """
+
+    def __init__(
+        self,
+        memory_svc_factory: Callable[[], MemoryService],
+        session_factory: Callable[[], Session],
+        *,
+        workers: int | None = None,
+        queue: IngestQueue | None = None,
+    ) -> None:
+        self._memory_svc_factory = memory_svc_factory
+        self._session_factory = session_factory
+        self.workers = max(1, workers or settings.ingest_workers)
+        self.queue = queue or IngestQueue()
+
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._processed = 0
+        self._failed = 0
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f'ingest-worker-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+
+        register_metrics('ingest_queue', self.metrics)
+        logger.info('Ingest workers started', extra={'workers': self.workers})
+
+    def stop(self, timeout_s: float = 10.0) -> None:
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=timeout_s)
+        self._threads = []
+        logger.info('Ingest workers stopped')
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            db = self._session_factory()
+            try:
+                jobs = self.queue.claim(db, settings.ingest_claim_batch)
+                if not jobs:
+                    self._stop.wait(settings.ingest_poll_interval_s)
+                    continue
+                self.process_jobs(db, jobs)
+            except Exception:
+                logger.exception('Ingest worker loop failed')
+                db.rollback()
+                self._stop.wait(settings.ingest_poll_interval_s)
+            finally:
+                db.close()
+
+    def process_jobs(self, db: Session, jobs: list[IngestJob]) -> None:
+        memory_svc = self._memory_svc_factory()
+        # one claim, one token; read it before store_qualified() commits and expires the jobs
+        token = jobs[0].claim_token if jobs else None
+        events = {
+            e.id: e for e in db.query(Event).filter(Event.id.in_([j.event_id for j in jobs])).all()
+        }
+
+        # one qualify_many over the claimed batch: with qualify_batch_size > 1 this packs the
+        # events into fewer LLM calls. Errors come back per event so the job gets retried
+        # instead of failing closed.
+        live = [job for job in jobs if job.event_id in events]
+        qualified_by_job = dict(
+            zip(
+                (job.id for job in live),
+                memory_svc.qualify_many([QualifyRequest.from_event(events[job.event_id]) for job in live]),
+            )
+        )
+
+        done: list[int] = []
+        for job in jobs:
+            evt = events.get(job.event_id)
+            if evt is None:
+                # event was deleted; nothing left to do
+                done.append(job.id)
+                continue
+
+            try:
+                qualified = qualified_by_job[job.id]
+                if isinstance(qualified, Exception):
+                    raise qualified
+                if qualified:
+                    memory_svc.store_qualified(db, evt, qualified)
+                done.append(job.id)
+            except Exception as e:
+                db.rollback()
+                logger.exception('Ingest job processing failed', extra={'job_id': job.id, 'event_id': job.event_id})
+                self.queue.fail(db, job, f'{type(e).__name__}: {e}', token)
+                with self._lock:
+                    self._failed += 1
+
+        self.queue.complete(db, done, token)
+        with self._lock:
+            self._processed += len(done)
+
+    def metrics(self) -> dict[str, Any]:
+        db = self._session_factory()
+        try:
+            depth = self.queue.depth(db)
+        finally:
+            db.close()
+
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'processed': self._processed,
+                'failed_attempts': self._failed,
+                'jobs_by_status': depth,
+            }
@@ -3,10 +3,13 @@ from __future__ import annotations
 import logging
 from typing import Any
 
+from app.core.config import settings
+from app.core.metrics import register_metrics
 from app.integrations.kg.base import GraphDB
 from app.integrations.kg.nebula_graph import NebulaGraphDB
-from app.models.event import Event
 from app.models.memory import Memory
+from app.schemas.event import EventLike
+from app.services.kg_writer import KGBatchWriter
 
 logger = logging.getLogger(__name__)
 
@@ -16,11 +19,51 @@ class KGService:
     I translate SQL memories into graph nodes/edges.
     """
 
-    def __init__(self, graph: GraphDB | None = None) -> None:
+    def __init__(self, graph: GraphDB | None = None, writer: KGBatchWriter | None = None) -> None:
         self.graph = graph or NebulaGraphDB()
 
-    def upsert_memory(self, mem: Memory, event: Event | None = None) -> None:
-        mem_vid = f'memory:{mem.id}'
+        # with a writer, upserts are queued and coalesced across memories instead of written inline
+        if writer is None and settings.kg_batch_enabled:
+            writer = KGBatchWriter(
+                self.graph,
+                max_items=settings.kg_batch_max_items,
+                window_ms=settings.kg_batch_window_ms,
+                max_pending=settings.kg_batch_max_pending,
+                recent_vids=settings.kg_recent_vids,
+            )
+        self.writer = writer
+        if self.writer is not None:
+            register_metrics('kg_writer', self.writer.metrics)
+
+    def _write(
+        self,
+        nodes: list[tuple[str, str, dict[str, Any]]],
+        edges: list[tuple[str, str, str]],
+        *,
+        sync: bool = False,
+    ) -> None:
+        if self.writer is not None and not sync:
+            self.writer.add(nodes, edges)
+        else:
+            self.graph.upsert_many(nodes, edges)
+
+    def flush(self) -> None:
+        """
+        I push out writes still queued in the batch writer (no-op without one).
+        """
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.graph.close()
+
+    def upsert_memory(self, mem: Memory, event: EventLike | None = None) -> None:
+        """
+        I write the Memory vertex, its Actor + HAS_MEMORY edge and Entity + ABOUT edges
+        in ONE graph request (see _graph_ops / GraphDB.upsert_many).
+        """
         try:
             logger.debug(
                 'KG upsert_memory start',
@@ -30,10 +73,33 @@ class KGService:
                 },
             )
 
-            self.graph.upsert_node(
+            nodes, edges = self._graph_ops(mem, event)
+            self._write(nodes, edges)
+
+            logger.info(
+                'KG upsert_memory done',
+                extra={'memory_id': getattr(mem, 'id', None), 'nodes': len(nodes), 'edges': len(edges)},
+            )
+
+        except Exception:
+            logger.exception(
+                'KG upsert_memory failed', extra={'memory_id': getattr(mem, 'id', None)})
+            raise
+
+    def _graph_ops(
+        self,
+        mem: Memory,
+        event: EventLike | None,
+    ) -> tuple[list[tuple[str, str, dict[str, Any]]], list[tuple[str, str, str]]]:
+        """
+        The nodes/edges for one memory, as data. Nodes come before the edges that reference them.
+        """
+        mem_vid = f'memory:{mem.id}'
+        nodes: list[tuple[str, str, dict[str, Any]]] = [
+            (
                 mem_vid,
-                label='Memory',
-                props={
+                'Memory',
+                {
                     'memory_id': mem.id,
                     'type': mem.type,
                     'scope': mem.scope,
@@ -41,45 +107,52 @@ class KGService:
                     'confidence': mem.confidence,
                 },
             )
-            logger.debug('KG upserted Memory node', extra={'vid': mem_vid, 'label': 'Memory'})
-
-            if event is not None:
-                actor_vid = f'actor:{event.actor_type}:{event.actor_id}'
-                self.graph.upsert_node(
-                    actor_vid,
-                    label='Actor',
-                    props={'actor_type': event.actor_type, 'actor_id': event.actor_id},
-                )
-                logger.debug(
-                    'KG upserted Actor node')
-
-                self.graph.upsert_edge(actor_vid, 'HAS_MEMORY', mem_vid)
-                logger.debug(
-                    'KG upserted edge')
-
-            entities = self._extract_entities(mem)
-            logger.debug('KG extracted entities')
-
-            for ent in entities:
-                ent_name = ent.get('name') or ''
-                ent_type = ent.get('entity_type') or 'unknown'
-                ent_vid = f'entity:{ent_type}:{str(ent_name).lower()}'
-
-                self.graph.upsert_node(ent_vid, label='Entity', props=ent)
-                logger.debug(
-                    'KG upserted Entity node')
-
-                self.graph.upsert_edge(mem_vid, 'ABOUT', ent_vid)
-                logger.debug(
-                    'KG upserted edge')
-
-            logger.info('KG upsert_memory done')
+        ]
+        edges: list[tuple[str, str, str]] = []
+
+        if event is not None:
+            actor_vid = f'actor:{event.actor_type}:{event.actor_id}'
+            nodes.append((actor_vid, 'Actor', {'actor_type': event.actor_type, 'actor_id': event.actor_id}))
+            edges.append((actor_vid, 'HAS_MEMORY', mem_vid))
+
+        for ent in self._extract_entities(mem):
+            ent_name = ent.get('name') or ''
+            ent_type = ent.get('entity_type') or 'unknown'
+            ent_vid = f'entity:{ent_type}:{str(ent_name).lower()}'
+            nodes.append((ent_vid, 'Entity', ent))
+            edges.append((mem_vid, 'ABOUT', ent_vid))
+
+        return nodes, edges
+
+    def upsert_memories(self, items: list[tuple[Memory, EventLike | None]], *, sync: bool = False) -> None:
+        """
+        Batch variant of upsert_memory(). Shared vertices (actors, popular entities) are
+        written once per batch, and everything goes through graph.upsert_many().
+        `sync=True` bypasses the batch writer: the write has happened (or raised) when I return.
+        """
+        if not items:
+            return
+
+        nodes: dict[str, tuple[str, str, dict[str, Any]]] = {}
+        edges: dict[tuple[str, str, str], None] = {}
+        for mem, event in items:
+            n, e = self._graph_ops(mem, event)
+            for node in n:
+                nodes.setdefault(node[0], node)
+            for edge in e:
+                edges.setdefault(edge, None)
 
+        try:
+            self._write(list(nodes.values()), list(edges), sync=sync)
         except Exception:
-            logger.exception(
-                'KG upsert_memory failed')
+            logger.exception('KG upsert_memories failed', extra={'memories': len(items)})
             raise
 
+        logger.info(
+            'KG upsert_memories done',
+            extra={'memories': len(items), 'nodes': len(nodes), 'edges': len(edges)},
+        )
+
     def _extract_entities(self, mem: Memory) -> list[dict[str, Any]]:
         # I keep it dumb and safe for now. Later we can do LLM-assisted entity linking.
         entities: list[dict[str, Any]] = []
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app.integrations.kg.base import GraphDB
+
+logger = logging.getLogger(__name__)
+
+Node = tuple[str, str, dict[str, Any]]
+Edge = tuple[str, str, str]
+
+# vertices whose props are fully determined by their VID, so re-writing them is pure waste
+_SHARED_LABELS = ('Actor', 'Entity')
+
+
+class KGBatchWriter:
+    """
+    I collect KG vertex/edge writes from many memories and flush them together.
+
+    - Pending writes are deduplicated by VID / (src, type, dst) until the next flush.
+    - A flush happens when max_items writes are pending or window_ms after the first one
+      arrived, whichever comes first (background thread), or on an explicit flush().
+    - Actor/Entity VIDs written recently are remembered (LRU) and not written again.
+    - add() blocks while max_pending writes are queued, so a slow graph slows producers
+      down instead of growing memory without bound.
+    - A failed flush is put back and retried up to max_attempts times, then dropped.
+    """
+
+    def __init__(
+        self,
+        graph: GraphDB,
+        *,
+        max_items: int = 500,
+        window_ms: float = 200.0,
+        max_pending: int = 10_000,
+        recent_vids: int = 10_000,
+        max_attempts: int = 3,
+    ) -> None:
+        self.graph = graph
+        self.max_items = max(1, int(max_items))
+        self.window_s = max(0.0, float(window_ms)) / 1000.0
+        self.max_pending = max(self.max_items, int(max_pending))
+        self.recent_vids = max(0, int(recent_vids))
+        self.max_attempts = max(1, int(max_attempts))
+
+        self._cond = threading.Condition()
+        self._nodes: dict[str, Node] = {}
+        self._edges: dict[Edge, None] = {}
+        self._first_at: float | None = None
+        self._attempts = 0
+
+        # only the flushing thread touches the graph; keeps batches ordered
+        self._write_lock = threading.Lock()
+        self._recent: OrderedDict[str, None] = OrderedDict()
+
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+        self._flushes = 0
+        self._written_nodes = 0
+        self._written_edges = 0
+        self._skipped_recent = 0
+        self._deduped = 0
+        self._failures = 0
+        self._dropped = 0
+        self._blocked_s = 0.0
+
+    def _pending(self) -> int:
+        return len(self._nodes) + len(self._edges)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('KGBatchWriter is closed')
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='kg-batch-writer', daemon=True)
+                self._thread.start()
+
+    def add(self, nodes: list[Node], edges: list[Edge]) -> None:
+        self._ensure_started()
+
+        with self._cond:
+            if self._pending() >= self.max_pending:
+                t0 = time.perf_counter()
+                while self._pending() >= self.max_pending and not self._closed:
+                    self._cond.notify_all()
+                    self._cond.wait()
+                self._blocked_s += time.perf_counter() - t0
+
+            for node in nodes:
+                vid, label, _ = node
+                if label in _SHARED_LABELS and vid in self._recent:
+                    self._skipped_recent += 1
+                    continue
+                if vid in self._nodes:
+                    self._deduped += 1
+                self._nodes[vid] = node
+
+            for edge in edges:
+                if edge in self._edges:
+                    self._deduped += 1
+                self._edges[edge] = None
+
+            if self._first_at is None and self._pending():
+                self._first_at = time.monotonic()
+            if self._pending() >= self.max_items:
+                self._cond.notify_all()
+
+    def _take(self) -> tuple[list[Node], list[Edge], int]:
+        # caller holds self._cond
+        nodes, edges, attempts = list(self._nodes.values()), list(self._edges), self._attempts
+        self._nodes, self._edges, self._first_at, self._attempts = {}, {}, None, 0
+        self._cond.notify_all()  # wake producers blocked on backpressure
+        return nodes, edges, attempts
+
+    def _write(self, nodes: list[Node], edges: list[Edge], attempts: int) -> None:
+        if not nodes and not edges:
+            return
+        try:
+            self.graph.upsert_many(nodes, edges)
+        except Exception:
+            self._failures += 1
+            if attempts + 1 >= self.max_attempts:
+                self._dropped += len(nodes) + len(edges)
+                logger.exception(
+                    'KG batch flush failed, dropping batch',
+                    extra={'nodes': len(nodes), 'edges': len(edges), 'attempts': attempts + 1},
+                )
+                return
+
+            logger.warning(
+                'KG batch flush failed, will retry',
+                exc_info=True,
+                extra={'nodes': len(nodes), 'edges': len(edges), 'attempts': attempts + 1},
+            )
+            with self._cond:
+                # newer pending writes for the same VID win over the failed ones
+                for node in nodes:
+                    self._nodes.setdefault(node[0], node)
+                for edge in edges:
+                    self._edges.setdefault(edge, None)
+                self._attempts = max(self._attempts, attempts + 1)
+                if self._first_at is None:
+                    self._first_at = time.monotonic()
+            raise
+
+        self._flushes += 1
+        self._written_nodes += len(nodes)
+        self._written_edges += len(edges)
+        if self.recent_vids:
+            for vid, label, _ in nodes:
+                if label in _SHARED_LABELS:
+                    self._recent[vid] = None
+                    self._recent.move_to_end(vid)
+            while len(self._recent) > self.recent_vids:
+                self._recent.popitem(last=False)
+
+        logger.debug('KG batch flushed', extra={'nodes': len(nodes), 'edges': len(edges)})
+
+    def flush(self) -> None:
+        """
+        I write everything pending right now, in the calling thread. Raises if the write fails
+        (the batch stays queued for the background thread unless it ran out of attempts).
+        """
+        with self._write_lock:
+            with self._cond:
+                nodes, edges, attempts = self._take()
+            self._write(nodes, edges, attempts)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed:
+                    pending = self._pending()
+                    if pending >= self.max_items:
+                        break
+                    if pending and self._first_at is not None:
+                        left = self._first_at + self.window_s - time.monotonic()
+                        if left <= 0:
+                            break
+                        self._cond.wait(left)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+
+            try:
+                self.flush()
+            except Exception:
+                # already logged + requeued; back off a little so a dead graph isn't hammered
+                time.sleep(min(1.0, self.window_s * 5 or 0.1))
+
+    def close(self) -> None:
+        """
+        I stop the background thread and flush what is left.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('KG batch writer: final flush failed')
+
+    def metrics(self) -> dict[str, Any]:
+        with self._cond:
+            pending = self._pending()
+        return {
+            'pending': pending,
+            'flushes': self._flushes,
+            'written_nodes': self._written_nodes,
+            'written_edges': self._written_edges,
+            'deduped': self._deduped,
+            'skipped_recent': self._skipped_recent,
+            'failures': self._failures,
+            'dropped': self._dropped,
+            'producer_blocked_s': round(self._blocked_s, 3),
+        }
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from datetime import timedelta
+from typing import Any, Callable
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import register_metrics
+from app.db.util import utcnow
+from app.models.event import Event
+from app.models.memory import Memory
+from app.models.memory_outbox import OutboxEntry
+from app.services.kg_service import KGService
+from app.services.vectordb_service import VectorDBService
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryOutbox:
+    """
+    I am the memory_outbox table: "this memory still has to reach Qdrant and the KG".
+    Rows are added without committing, so they land in the same transaction as the memory,
+    and are claimed with a per-claim token like ingest jobs.
+    """
+
+    def add_many(self, db: Session, memory_ids: list[int]) -> None:
+        if not memory_ids:
+            return
+        now = utcnow()
+        db.execute(
+            insert(OutboxEntry),
+            [
+                {'memory_id': mid, 'status': 'pending', 'attempts': 0, 'available_at': now, 'created_at': now}
+                for mid in memory_ids
+            ],
+        )
+
+    def claim(self, db: Session, limit: int) -> list[OutboxEntry]:
+        now = utcnow()
+        token = uuid.uuid4().hex
+
+        stale_before = now - timedelta(seconds=settings.outbox_stale_lock_s)
+        db.execute(
+            update(OutboxEntry)
+            .where(OutboxEntry.status == 'processing', OutboxEntry.locked_at < stale_before)
+            .values(status='pending', claim_token=None, locked_at=None)
+        )
+
+        q = (
+            select(OutboxEntry.id)
+            .where(OutboxEntry.status == 'pending', OutboxEntry.available_at <= now)
+            .order_by(OutboxEntry.id)
+            .limit(limit)
+        )
+        if db.get_bind().dialect.name == 'mysql':
+            q = q.with_for_update(skip_locked=True)
+        ids = list(db.execute(q).scalars())
+
+        if not ids:
+            db.commit()
+            return []
+
+        db.execute(
+            update(OutboxEntry)
+            .where(OutboxEntry.id.in_(ids), OutboxEntry.status == 'pending')
+            .values(
+                status='processing',
+                claim_token=token,
+                locked_at=now,
+                attempts=OutboxEntry.attempts + 1,
+            )
+        )
+        db.commit()
+
+        return list(db.execute(select(OutboxEntry).where(OutboxEntry.claim_token == token)).scalars())
+
+    def complete(self, db: Session, entry_ids: list[int], token: str | None) -> None:
+        """
+        Mark entries done, but only while `token` still holds them: after a stale-lock reclaim
+        another drainer owns the rows and a slow one must not touch them.
+        """
+        if not entry_ids:
+            return
+        db.execute(
+            update(OutboxEntry)
+            .where(OutboxEntry.id.in_(entry_ids), OutboxEntry.claim_token == token)
+            .values(status='done', last_error=None, claim_token=None, locked_at=None, processed_at=utcnow())
+        )
+        db.commit()
+
+    def fail(self, db: Session, entry: OutboxEntry, error: str, token: str | None) -> None:
+        """
+        Retry with exponential backoff until outbox_max_attempts, then park as failed.
+        Like complete(), only while `token` still holds the entry.
+        """
+        # read before the commit expires the entry
+        entry_id, memory_id, attempts = entry.id, entry.memory_id, int(entry.attempts or 0)
+        give_up = attempts >= settings.outbox_max_attempts
+        delay = settings.outbox_retry_backoff_s * (2 ** max(0, attempts - 1))
+
+        result = db.execute(
+            update(OutboxEntry)
+            .where(OutboxEntry.id == entry_id, OutboxEntry.claim_token == token)
+            .values(
+                status='failed' if give_up else 'pending',
+                last_error=error[:2000],
+                claim_token=None,
+                locked_at=None,
+                available_at=utcnow() + timedelta(seconds=delay),
+            )
+        )
+        db.commit()
+        if result.rowcount == 0:
+            logger.warning('Outbox entry was reclaimed by another drainer', extra={'entry_id': entry_id})
+            return
+
+        logger.warning(
+            'Outbox entry failed',
+            extra={'entry_id': entry_id, 'memory_id': memory_id, 'attempts': attempts, 'gave_up': give_up},
+        )
+
+    def lag(self, db: Session) -> dict[str, Any]:
+        """
+        How far Qdrant/KG trail MySQL: rows by status and the age of the oldest undrained row.
+        """
+        by_status = {
+            status: int(n)
+            for status, n in db.execute(select(OutboxEntry.status, func.count()).group_by(OutboxEntry.status)).all()
+        }
+        oldest = db.execute(
+            select(func.min(OutboxEntry.created_at)).where(OutboxEntry.status.in_(('pending', 'processing')))
+        ).scalar()
+        return {
+            'entries_by_status': by_status,
+            'oldest_pending_age_s': round((utcnow() - oldest).total_seconds(), 3) if oldest is not None else 0.0,
+        }
+
+
+class OutboxDrainer:
+    """
+    I drain memory_outbox in batches: one multi-point Qdrant upsert and one KG batch per claim,
+    then mark the rows done. If the batch write fails I retry its entries one by one, so a single
+    bad memory only delays itself.
+    """
+
+    def __init__(
+        self,
+        vector_db_svc_factory: Callable[[], VectorDBService],
+        kg_factory: Callable[[], KGService],
+        session_factory: Callable[[], Session],
+        *,
+        workers: int | None = None,
+        outbox: MemoryOutbox | None = None,
+    ) -> None:
+        self._vector_db_svc_factory = vector_db_svc_factory
+        self._kg_factory = kg_factory
+        self._session_factory = session_factory
+        self.workers = max(1, workers or settings.outbox_drainers)
+        self.outbox = outbox or MemoryOutbox()
+
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._drained = 0
+        self._failed = 0
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f'outbox-drainer-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+
+        register_metrics('outbox', self.metrics)
+        logger.info('Outbox drainers started', extra={'workers': self.workers})
+
+    def stop(self, timeout_s: float = 10.0) -> None:
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=timeout_s)
+        self._threads = []
+        logger.info('Outbox drainers stopped')
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            db = self._session_factory()
+            try:
+                if not self.drain_once(db):
+                    self._stop.wait(settings.outbox_poll_interval_s)
+            except Exception:
+                logger.exception('Outbox drainer loop failed')
+                db.rollback()
+                self._stop.wait(settings.outbox_poll_interval_s)
+            finally:
+                db.close()
+
+    def drain_once(self, db: Session) -> int:
+        """
+        Claim one batch and push it out. Returns the number of entries claimed.
+        """
+        entries = self.outbox.claim(db, settings.outbox_batch_size)
+        if not entries:
+            return 0
+        token = entries[0].claim_token
+
+        rows = db.execute(
+            select(Memory, Event)
+            .join(Event, Event.id == Memory.event_id)
+            .where(Memory.id.in_([e.memory_id for e in entries]))
+        ).all()
+        by_id = {mem.id: (mem, evt) for mem, evt in rows}
+
+        # memory deleted since: nothing left to index
+        live = [e for e in entries if e.memory_id in by_id]
+        done = [e.id for e in entries if e.memory_id not in by_id]
+
+        try:
+            self._write([by_id[e.memory_id] for e in live])
+            done.extend(e.id for e in live)
+        except Exception:
+            logger.warning('Outbox batch write failed; retrying entries one by one', exc_info=True)
+            for entry in live:
+                try:
+                    self._write([by_id[entry.memory_id]])
+                    done.append(entry.id)
+                except Exception as e:
+                    self.outbox.fail(db, entry, f'{type(e).__name__}: {e}', token)
+                    with self._lock:
+                        self._failed += 1
+
+        self.outbox.complete(db, done, token)
+        with self._lock:
+            self._drained += len(done)
+
+        logger.debug('Outbox batch drained', extra={'claimed': len(entries), 'done': len(done)})
+        return len(entries)
+
+    def _write(self, items: list[tuple[Memory, Event]]) -> None:
+        if not items:
+            return
+        mems = [m for m, _ in items]
+        events = [e for _, e in items]
+        self._vector_db_svc_factory().upsert_memories(mems, events=events)
+        # not through KGBatchWriter: it retries and then drops, and a row marked done must be in the graph
+        self._kg_factory().upsert_memories(items, sync=True)
+
+    def metrics(self) -> dict[str, Any]:
+        db = self._session_factory()
+        try:
+            lag = self.outbox.lag(db)
+        finally:
+            db.close()
+
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'drained': self._drained,
+                'failed_attempts': self._failed,
+                **lag,
+            }
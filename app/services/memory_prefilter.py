@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import numpy as np
+
+from app.core.config import settings
+from app.integrations.vector.base import Embedder
+
+logger = logging.getLogger(__name__)
+
+# Rule A of MEMORY_QUALIFIER_SYSTEM: explicit asks to remember/store/save (incl. the misspellings it lists).
+# A trigger always goes to the LLM, whatever the other rules say.
+_REMEMBER_RE = re.compile(
+    r"\b(rem+e?m?be?r\w*|memori[sz]e\w*|sav(?:e|ed|ing)|store|note (?:that|this|down)|don'?t forget|keep in mind)\b",
+    re.IGNORECASE,
+)
+
+# bare acknowledgements / chit-chat that never carry a durable signal
+_ACKS = frozenset(
+    {
+        'ok', 'okay', 'k', 'kk', 'ok thanks', 'okay thanks', 'ok thank you', 'thanks', 'thank you', 'thx', 'ty',
+        'thanks a lot', 'many thanks', 'cool', 'great', 'nice', 'perfect', 'awesome', 'sure', 'yes', 'yep', 'yeah',
+        'no', 'nope', 'got it', 'sounds good', 'np', 'no problem', 'lol', 'haha', 'hi', 'hello', 'hey', 'bye',
+        'good', 'alright', 'right', 'fine', 'done', 'noted',
+    }
+)
+
+_PUNCT_RE = re.compile(r'[^\w\s]+', re.UNICODE)
+
+
+@dataclass(frozen=True)
+class PreFilterDecision:
+    skip: bool
+    reason: str
+
+
+class CentroidClassifier:
+    """
+    I am the optional "is this worth an LLM call" classifier: two centroids (memory / not memory)
+    over event-text embeddings, fitted from labeled examples. Skip when the event is clearly
+    closer to the not-memory centroid (margin below threshold).
+    """
+
+    def __init__(self, embedder: Embedder, examples: Iterable[tuple[str, bool]], *, threshold: float) -> None:
+        self.embedder = embedder
+        self.threshold = float(threshold)
+
+        examples = list(examples)
+        pos = [t for t, label in examples if label]
+        neg = [t for t, label in examples if not label]
+        if not pos or not neg:
+            raise ValueError('CentroidClassifier needs both memory and non-memory examples')
+
+        self._pos = self._centroid(embedder.embed_many(pos))
+        self._neg = self._centroid(embedder.embed_many(neg))
+
+    @staticmethod
+    def _centroid(vectors: list[list[float]]) -> np.ndarray:
+        m = np.asarray(vectors, dtype=np.float32)
+        m /= np.linalg.norm(m, axis=1, keepdims=True) + 1e-12
+        c = m.mean(axis=0)
+        return c / (np.linalg.norm(c) + 1e-12)
+
+    def margin(self, text: str) -> float:
+        v = np.asarray(self.embedder.embed(text), dtype=np.float32)
+        v /= np.linalg.norm(v) + 1e-12
+        return float(v @ self._pos - v @ self._neg)
+
+    def is_non_memory(self, text: str) -> bool:
+        return self.margin(text) < self.threshold
+
+
+def load_labeled_examples(path: str) -> list[tuple[str, bool]]:
+    """
+    JSONL with {"text": ..., "memory": true|false} per line (plus optional actor_type / payload).
+    """
+    return [(row.get('text') or '', bool(row['memory'])) for row in load_labeled_events(path)]
+
+
+def load_labeled_events(path: str) -> list[dict[str, Any]]:
+    out: list[dict[str, Any]] = []
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                out.append(json.loads(line))
+    return out
+
+
+class MemoryPreFilter:
+    """
+    I run before the LLM qualifier and short-circuit events that are obviously not memories.
+
+    Order matters and errs towards calling the LLM:
+    1. explicit remember/save triggers  -> always qualify
+    2. configured actor types (system)  -> skip (our own replies)
+    3. structured payload present       -> qualify (tool output is the LLM's call)
+    4. bare acknowledgements            -> skip
+    5. too short to hold a fact         -> skip
+    6. optional embedding classifier    -> skip when clearly non-memory
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool | None = None,
+        skip_actor_types: Iterable[str] | None = None,
+        min_chars: int | None = None,
+        min_words: int | None = None,
+        classifier: CentroidClassifier | None = None,
+    ) -> None:
+        self.enabled = settings.prefilter_enabled if enabled is None else enabled
+        if skip_actor_types is None:
+            skip_actor_types = [a for a in settings.prefilter_skip_actor_types.split(',') if a.strip()]
+        self.skip_actor_types = {a.strip().lower() for a in skip_actor_types}
+        self.min_chars = settings.prefilter_min_chars if min_chars is None else min_chars
+        self.min_words = settings.prefilter_min_words if min_words is None else min_words
+        self.classifier = classifier
+
+        self._lock = threading.Lock()
+        self._checked = 0
+        self._skipped: dict[str, int] = {}
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return ' '.join(_PUNCT_RE.sub(' ', text.lower()).split())
+
+    def decide(self, *, actor_type: str | None, text: str | None, payload: dict | None) -> PreFilterDecision:
+        if not self.enabled:
+            return PreFilterDecision(False, 'disabled')
+
+        text = text or ''
+        if _REMEMBER_RE.search(text):
+            return PreFilterDecision(False, 'trigger')
+
+        if (actor_type or '').lower() in self.skip_actor_types:
+            return PreFilterDecision(True, 'actor')
+
+        if payload:
+            return PreFilterDecision(False, 'payload')
+
+        norm = self._normalize(text)
+        if norm in _ACKS:
+            return PreFilterDecision(True, 'ack')
+
+        if len(norm) < self.min_chars or len(norm.split()) < self.min_words:
+            return PreFilterDecision(True, 'short')
+
+        if self.classifier is not None:
+            try:
+                if self.classifier.is_non_memory(text):
+                    return PreFilterDecision(True, 'classifier')
+            except Exception:
+                logger.warning('Pre-filter classifier failed; letting event through', exc_info=True)
+
+        return PreFilterDecision(False, 'pass')
+
+    def check(self, *, actor_type: str | None, text: str | None, payload: dict | None) -> PreFilterDecision:
+        """
+        decide() + bookkeeping for /v1/metrics.
+        """
+        d = self.decide(actor_type=actor_type, text=text, payload=payload)
+        with self._lock:
+            self._checked += 1
+            if d.skip:
+                self._skipped[d.reason] = self._skipped.get(d.reason, 0) + 1
+        return d
+
+    def evaluate(self, events: Iterable[dict[str, Any]]) -> dict[str, Any]:
+        """
+        I score the filter against labeled events ({"text", "memory", "actor_type"?, "payload"?}).
+        A false negative is a labeled memory that the filter would have skipped.
+        """
+        total = positives = skipped = false_negatives = 0
+        misses: list[str] = []
+        for ev in events:
+            total += 1
+            is_memory = bool(ev['memory'])
+            positives += is_memory
+            d = self.decide(actor_type=ev.get('actor_type', 'user'), text=ev.get('text'), payload=ev.get('payload'))
+            if d.skip:
+                skipped += 1
+                if is_memory:
+                    false_negatives += 1
+                    misses.append(ev.get('text') or '')
+
+        return {
+            'total': total,
+            'skipped': skipped,
+            'avoided_rate': round(skipped / total, 4) if total else 0.0,
+            'false_negatives': false_negatives,
+            'false_negative_rate': round(false_negatives / positives, 4) if positives else 0.0,
+            'missed': misses,
+        }
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            checked = self._checked
+            skipped = dict(self._skipped)
+        avoided = sum(skipped.values())
+        return {
+            'enabled': self.enabled,
+            'checked': checked,
+            'llm_calls_avoided': avoided,
+            'avoided_rate': round(avoided / checked, 4) if checked else 0.0,
+            'skipped_by_reason': skipped,
+            'classifier': self.classifier is not None,
+        }
@@ -1,281 +1,864 @@
 from __future__ import annotations
 
 import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
 
+from sqlalchemy import RowMapping, Select, func, select, update
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.executors import run_blocking
+from app.db.bulk import insert_returning_ids
 from app.models.event import Event
 from app.models.memory import Memory
 from app.schemas import event
-from app.schemas.llm import MemoryQualification
+from app.schemas.event import EventCreate, EventLike
+from app.schemas.llm import BatchQualificationItem, MemoryQualification, QualifiedMemory
 from app.schemas.memory import MemoryCreate
+from app.core.metrics import register_metrics
+from app.integrations.llm.base import LLMClient
+from app.integrations.llm.cache import (
+    InMemoryQualificationBackend,
+    QualificationCache,
+    SqliteQualificationBackend,
+)
 from app.integrations.llm.ollama_client import OllamaClient, LLMJSONError
-from app.integrations.llm.prompt import MEMORY_QUALIFIER_SYSTEM, build_memory_qualifier_user_prompt
+from app.integrations.llm.prompt import (
+    MEMORY_QUALIFIER_BATCH_SYSTEM,
+    MEMORY_QUALIFIER_SYSTEM,
+    build_memory_qualifier_batch_user_prompt,
+    build_memory_qualifier_user_prompt,
+)
 from app.schemas.vectodb import VectorDBUpsertItem
+from app.services.event_service import EventService
+from app.services.exact_dedup import ExactDedup, content_hash
 from app.services.kg_service import KGService
-from app.services.vectordb_service import VectorDBService
+from app.services.memory_outbox import MemoryOutbox
+from app.services.memory_prefilter import CentroidClassifier, MemoryPreFilter, load_labeled_examples
+from app.services.vectordb_service import DuplicateOf, VectorDBService
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class QualifyRequest:
+    """The plain values qualification needs from an event (safe to hand to other threads)."""
+
+    actor_type: str
+    actor_id: str
+    text: str | None
+    payload: dict | None
+    event_id: int | None = None
+
+    @classmethod
+    def from_event(cls, event: Event) -> 'QualifyRequest':
+        return cls(
+            actor_type=event.actor_type,
+            actor_id=event.actor_id,
+            text=event.text,
+            payload=event.payload,
+            event_id=getattr(event, 'id', None),
+        )
+
+
+@dataclass
+class MemoryWritePlan:
+    """New memory rows (with their vectors, same order) and assertion-count bumps for duplicates."""
+
+    rows: list[dict[str, Any]] = field(default_factory=list)
+    vectors: list[list[float]] = field(default_factory=list)
+    increments: dict[int, int] = field(default_factory=dict)
+
+
 class MemoryService:
     """
     I keep memory writes here. Processing logic lives here too.
     """
 
-    def __init__(self) -> None:
-        self.llm = OllamaClient()
-        self.vector_db_svc = VectorDBService()
+    def __init__(
+        self,
+        llm: LLMClient | None = None,
+        vector_db_svc: VectorDBService | None = None,
+        kg: KGService | None = None,
+        qualification_cache: QualificationCache | None = None,
+        prefilter: MemoryPreFilter | None = None,
+        outbox: MemoryOutbox | None = None,
+        exact_dedup: ExactDedup | None = None,
+    ) -> None:
+        self.llm = llm or OllamaClient()
+        self.vector_db_svc = vector_db_svc or VectorDBService()
         self.vector_upsert_item = VectorDBUpsertItem()
-        self.kg = KGService()
+        self.kg = kg or KGService()
 
-        logger.debug('Ollama client to qualify memories from incoming event')
+        self.qualification_cache = qualification_cache or self._build_qualification_cache(self.llm)
+        if self.qualification_cache is not None:
+            register_metrics('qualification_cache', self.qualification_cache.metrics)
 
-    def _store_memory_in_db(self, db: Session, event: Event, m_type, m_scope, key, m, qual) -> Memory:
-        mem = Memory(
-                type=m_type,
-                scope=m_scope,
-                key=key,
-                value=m.value or {},
-                confidence=float(m.confidence or 0.0),
-                event=event,
-            )
-            
-        event.memories.append(mem)
+        self.prefilter = prefilter or self._build_prefilter(self.vector_db_svc)
+        register_metrics('prefilter', self.prefilter.metrics)
 
-        try:
-            db.add(mem)
-            db.commit()
-            db.refresh(mem)
-        except Exception:
-            logger.exception(
-                'Failed to store qualified memory',
-                extra={
-                    'event_id': getattr(event, 'id', None),
-                    'type': qual.type,
-                    'scope': mem.scope,
-                    'key': qual.key,
-                },
-            )
-            raise
+        # with an outbox, Qdrant/KG indexing is recorded in the memory's transaction and done by
+        # OutboxDrainer instead of inline (and best-effort) on the request path
+        self.outbox = outbox or (MemoryOutbox() if settings.outbox_enabled else None)
 
-        logger.debug(
-            'Stored qualified memory',
-            extra={
-                'event_id': getattr(event, 'id', None),
-                'memory_id': getattr(mem, 'id', None),
-                'type': mem.type,
-                'scope': mem.scope,
-                'key': mem.key,
-            },
+        self.exact_dedup = exact_dedup or (
+            ExactDedup(settings.exact_dedup_lru_entries) if settings.exact_dedup_enabled else None
         )
-        return mem
-    
+        if self.exact_dedup is not None:
+            register_metrics('exact_dedup', self.exact_dedup.metrics)
 
-    def _update_memory_assertion_count(self, db: Session, memory_id: int) -> None:
-        try:
-            mem = db.query(Memory).filter(Memory.id == memory_id).one()
-            mem.assertion_count += 1
-            db.commit()
-            db.refresh(mem)
-        except Exception:
-            db.rollback()
-            logger.exception(
-                'Failed to update assertion count for memory',
-                extra={'memory_id': memory_id},
+        logger.debug('Ollama client to qualify memories from incoming event')
+
+    @staticmethod
+    def _build_qualification_cache(llm: LLMClient) -> QualificationCache | None:
+        backend_name = (settings.qualification_cache_backend or 'none').lower()
+        if backend_name == 'none':
+            return None
+
+        if backend_name == 'sqlite':
+            backend = SqliteQualificationBackend(
+                settings.qualification_cache_path,
+                max_entries=settings.qualification_cache_max_entries,
+                ttl_s=settings.qualification_cache_ttl_s,
             )
-            raise
+        elif backend_name == 'memory':
+            backend = InMemoryQualificationBackend(
+                max_entries=settings.qualification_cache_max_entries,
+                ttl_s=settings.qualification_cache_ttl_s,
+            )
+        else:
+            raise ValueError(f'Unknown qualification cache backend: {backend_name}')
 
-        logger.info(
-            'Assertion count incremented',
-            extra={
-                'memory_id': memory_id,
-                'new_assertion_count': mem.assertion_count,
-                'key': mem.key,
-                'type': mem.type,
-                'scope': mem.scope,
-            },
-        )
+        return QualificationCache(backend, model=getattr(llm, 'model', type(llm).__name__))
 
+    @staticmethod
+    def _build_prefilter(vector_db_svc: VectorDBService) -> MemoryPreFilter:
+        classifier = None
+        if settings.prefilter_enabled and settings.prefilter_classifier_examples:
+            try:
+                classifier = CentroidClassifier(
+                    vector_db_svc.embedder,
+                    load_labeled_examples(settings.prefilter_classifier_examples),
+                    threshold=settings.prefilter_classifier_threshold,
+                )
+            except Exception:
+                # heuristics alone are still useful; don't take the service down over the classifier
+                logger.exception('Failed to build pre-filter classifier; continuing without it')
+        return MemoryPreFilter(classifier=classifier)
 
+    def increment_assertion_counts(self, db: Session, counts: dict[int, int]) -> None:
+        """
+        Atomic `assertion_count = assertion_count + n` per memory; no SELECT, no commit.
+        """
+        for memory_id, n in counts.items():
+            db.execute(
+                update(Memory)
+                .where(Memory.id == memory_id)
+                .values(assertion_count=Memory.assertion_count + n)
+            )
 
-    def list_memories(self, db: Session, scope: str | None = None, type: str | None = None) -> list[Memory]:
+    # columns I return from list endpoints; `value` is the heavy one and can be projected away
+    _LIST_COLUMNS = (
+        Memory.id,
+        Memory.type,
+        Memory.scope,
+        Memory.key,
+        Memory.confidence,
+        Memory.assertion_count,
+        Memory.decay,
+        Memory.superseded_by_memory_id,
+        Memory.created_at,
+        Memory.event_id,
+    )
+
+    @classmethod
+    def list_query(
+        cls,
+        scope: str | None,
+        type: str | None,
+        before_id: int | None,
+        include_value: bool,
+    ) -> Select:
+        """
+        The SELECT behind list_memories (no LIMIT). db_script/explain_indexes.py EXPLAINs this exact
+        statement, so keep index-relevant changes here.
+        """
+        cols = cls._LIST_COLUMNS + (Memory.value,) if include_value else cls._LIST_COLUMNS
+        stmt = select(*cols)
+        if scope:
+            stmt = stmt.where(Memory.scope == scope)
+        if type:
+            stmt = stmt.where(Memory.type == type)
+        if before_id is not None:
+            stmt = stmt.where(Memory.id < before_id)
+        return stmt.order_by(Memory.id.desc())
+
+    def list_memories(
+        self,
+        db: Session,
+        scope: str | None = None,
+        type: str | None = None,
+        *,
+        before_id: int | None = None,
+        limit: int | None = None,
+        include_value: bool = True,
+    ) -> tuple[list[RowMapping], int | None]:
         """
-        Utility method to list memories with optional filtering. Useful for debugging and inspection.
+        Keyset-paginated listing, newest first. Returns (rows, next_cursor); pass next_cursor back
+        as before_id to get the following page. next_cursor is None on the last page.
+
+        Rows are plain column mappings, not ORM objects, so nothing is identity-mapped or lazily loaded.
         """
+        limit = min(limit or settings.memories_page_default, settings.memories_page_max)
 
         logger.debug(
             'Listing memories',
             extra={
                 'scope': scope,
                 'type': type,
+                'before_id': before_id,
+                'limit': limit,
+                'include_value': include_value,
             },
         )
 
         try:
-            q = db.query(Memory)
-            if scope:
-                q = q.filter(Memory.scope == scope)
-            if type:
-                q = q.filter(Memory.type == type)
-            items = q.order_by(Memory.id.desc()).all()
+            # one extra row tells me whether another page exists without a COUNT
+            stmt = self.list_query(scope, type, before_id, include_value).limit(limit + 1)
+            items = list(db.execute(stmt).mappings().all())
         except Exception:
             logger.exception('Failed to list memories from DB')
             raise
 
-        logger.debug('Listed memories', extra={'count': len(items)})
-        return items
-
-    def process_event_to_memories(self, db: Session, event: Event) -> list[Memory]:
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = items[-1]['id']
+
+        logger.debug('Listed memories', extra={'count': len(items), 'next_cursor': next_cursor})
+        return items, next_cursor
+
+    def iter_memories(
+        self,
+        db: Session,
+        scope: str | None = None,
+        type: str | None = None,
+        *,
+        before_id: int | None = None,
+        include_value: bool = True,
+        page_size: int | None = None,
+    ) -> Iterator[RowMapping]:
         """
-        Flow:
-        - If LLM is enabled: qualify + store if is_memory=true
-        - If LLM is disabled: fall back to a simple 'episode' session memory
+        I walk every matching row page by page (for exports). Each page is its own short keyset query,
+        so memory stays bounded by page_size no matter how big the table is.
+        """
+        cursor = before_id
+        while True:
+            items, cursor = self.list_memories(
+                db,
+                scope=scope,
+                type=type,
+                before_id=cursor,
+                limit=page_size or settings.memories_page_max,
+                include_value=include_value,
+            )
+            yield from items
+            if cursor is None:
+                return
 
-        Rules:
+    @staticmethod
+    def normalize_qualified(m: QualifiedMemory) -> tuple[str, str, str]:
+        """
+        Returns (type, scope, key) with our storage rules applied:
         - episode scope is always forced to session
+        - blank keys get an auto key
         """
-        logger.debug(
-            'Processing event to memories',
-            extra={
-                'event_id': getattr(event, 'id', None),
-                'actor_type': getattr(event, 'actor_type', None),
-                'actor_id': getattr(event, 'actor_id', None),
-                'has_text': bool(getattr(event, 'text', None)),
-                'has_payload': bool(getattr(event, 'payload', None)),
-                'use_llm_qualifier': settings.use_llm_qualifier,
-            },
-        )
+        m_type = m.type
+        m_scope = m.scope or 'profile'
+        if m_type == 'episode':
+            m_scope = 'session'
+
+        key = (m.key or '').strip()
+        if not key:
+            key = f'{m_type}_auto'
 
-        if not event.text and not event.payload:
+        return m_type, m_scope, key
+
+    def _qualify_without_llm(
+        self, req: QualifyRequest
+    ) -> tuple[list[QualifiedMemory] | None, str | None]:
+        """
+        Everything qualify() can answer without the LLM: empty events, the fallback when the LLM is off,
+        the pre-filter and the cache. Returns (memories, None) when answered, else (None, cache_key).
+        """
+        if not req.text and not req.payload:
             logger.debug(
                 'Event has no text and no payload; skipping',
-                extra={'event_id': getattr(event, 'id', None)},
+                extra={'event_id': req.event_id},
             )
-            return []
+            return [], None
 
         # Fallback path (keeps system usable even when LLM is off)
         if not settings.use_llm_qualifier:
             logger.debug(
                 'LLM qualifier disabled; using fallback episode memory',
-                extra={'event_id': getattr(event, 'id', None)},
+                extra={'event_id': req.event_id},
             )
+            return [
+                QualifiedMemory(
+                    type='episode',
+                    scope='session',
+                    key='event_summary',
+                    value={'text': req.text, 'payload': req.payload or {}},
+                    confidence=0.3,
+                )
+            ], None
 
-            mem = self._store_memory_in_db(db, event,
-                type='episode',
-                scope='session',
-                key='event_summary',
-                value={'text': event.text, 'payload': event.payload or {}},
-                confidence=0.3,
-                source_event_id=event.id,
+        decision = self.prefilter.check(actor_type=req.actor_type, text=req.text, payload=req.payload)
+        if decision.skip:
+            logger.debug(
+                'Pre-filter skipped LLM qualification',
+                extra={'event_id': req.event_id, 'reason': decision.reason},
+            )
+            return [], None
+
+        cache_key = None
+        if self.qualification_cache is not None:
+            cache_key = self.qualification_cache.key(
+                actor_type=req.actor_type, actor_id=req.actor_id, text=req.text, payload=req.payload
             )
-            return [mem]
+            cached = self.qualification_cache.get(cache_key)
+            if cached is not None:
+                logger.debug(
+                    'Memory qualification cache hit',
+                    extra={'event_id': req.event_id, 'memories': len(cached)},
+                )
+                return cached, None
+
+        return None, cache_key
+
+    def qualify(
+        self,
+        *,
+        actor_type: str,
+        actor_id: str,
+        text: str | None,
+        payload: dict | None,
+        event_id: int | None = None,
+    ) -> list[QualifiedMemory]:
+        """
+        Qualification only (LLM or fallback). No DB access, so this is safe to run on worker threads.
+        Raises on LLM / validation errors; callers decide whether to fail closed.
+        """
+        req = QualifyRequest(actor_type=actor_type, actor_id=actor_id, text=text, payload=payload, event_id=event_id)
+        answered, cache_key = self._qualify_without_llm(req)
+        if answered is not None:
+            return answered
+
+        return self._qualify_one(req, cache_key)
 
+    def _qualify_one(self, req: QualifyRequest, cache_key: str | None) -> list[QualifiedMemory]:
+        raw = self.llm.generate_json(MEMORY_QUALIFIER_SYSTEM, self._qualifier_prompt(req), timeout_s=30)
+        return self._accept_qualification(req, raw, cache_key)
+
+    async def _aqualify_one(self, req: QualifyRequest, cache_key: str | None) -> list[QualifiedMemory]:
+        raw = await self.llm.agenerate_json(MEMORY_QUALIFIER_SYSTEM, self._qualifier_prompt(req), timeout_s=30)
+        return self._accept_qualification(req, raw, cache_key)
+
+    @staticmethod
+    def _qualifier_prompt(req: QualifyRequest) -> str:
         user_prompt = build_memory_qualifier_user_prompt(
-            actor_type=event.actor_type,
-            actor_id=event.actor_id,
-            text=event.text,
-            payload=event.payload or {},
+            actor_type=req.actor_type,
+            actor_id=req.actor_id,
+            text=req.text,
+            payload=req.payload or {},
         )
 
         logger.debug(
             'Built memory qualifier user prompt',
             extra={
-                'event_id': getattr(event, 'id', None),
+                'event_id': req.event_id,
                 'prompt_preview': user_prompt[:500],
             },
         )
+        return user_prompt
+
+    def _accept_qualification(self, req: QualifyRequest, raw: Any, cache_key: str | None) -> list[QualifiedMemory]:
+        qual = MemoryQualification.model_validate(raw)
+
+        if cache_key is not None:
+            self.qualification_cache.put(cache_key, qual.memories)
+
+        logger.debug(
+            'Memory qualification result',
+            extra={
+                'event_id': req.event_id,
+                'memories': len(qual.memories),
+            },
+        )
+        return qual.memories
+
+    def qualify_many(self, reqs: list[QualifyRequest]) -> list[list[QualifiedMemory] | Exception]:
+        """
+        qualify() for many events, packing up to `qualify_batch_size` LLM-bound events into one call.
+        The result is aligned with `reqs`; an item that could not be qualified holds its exception.
+
+        A batch answer is validated per item: a missing, duplicated or malformed entry falls back to a
+        single-event call for that event only. If the whole batch call fails, every event falls back.
+        """
+        out: list[list[QualifiedMemory] | Exception | None] = [None] * len(reqs)
+        todo: list[tuple[int, str | None]] = []
+        for i, req in enumerate(reqs):
+            try:
+                answered, cache_key = self._qualify_without_llm(req)
+            except Exception as e:
+                out[i] = e
+                continue
+            if answered is not None:
+                out[i] = answered
+            else:
+                todo.append((i, cache_key))
+
+        batch_size = max(1, settings.qualify_batch_size)
+        for start in range(0, len(todo), batch_size):
+            group = todo[start : start + batch_size]
+            parsed = self._qualify_batch([reqs[i] for i, _ in group]) if len(group) > 1 else {}
+
+            for pos, (i, cache_key) in enumerate(group):
+                memories = parsed.get(pos)
+                if memories is None:
+                    try:
+                        out[i] = self._qualify_one(reqs[i], cache_key)
+                    except Exception as e:
+                        out[i] = e
+                    continue
+
+                if cache_key is not None:
+                    self.qualification_cache.put(cache_key, memories)
+                out[i] = memories
+
+        return out  # type: ignore[return-value]
+
+    def _qualify_batch(self, reqs: list[QualifyRequest]) -> dict[int, list[QualifiedMemory]]:
+        """
+        One LLM call for several events. Returns {position in reqs: memories} for the entries that
+        validated; anything absent from the dict needs a single-event retry.
+        """
+        user_prompt = build_memory_qualifier_batch_user_prompt(
+            [(f'e{pos}', r.actor_type, r.actor_id, r.text, r.payload or {}) for pos, r in enumerate(reqs)]
+        )
 
         try:
-            raw = self.llm.generate_json(MEMORY_QUALIFIER_SYSTEM, user_prompt, timeout_s=30)
-            qual = MemoryQualification.model_validate(raw)
-        except LLMJSONError:
-            logger.exception(
-                'LLM returned non-JSON / unusable JSON for memory qualification',
-                extra={'event_id': getattr(event, 'id', None)},
-            )
-            return []
+            raw = self.llm.generate_json(MEMORY_QUALIFIER_BATCH_SYSTEM, user_prompt, timeout_s=30 + 10 * len(reqs))
         except Exception:
-            logger.exception(
-                'Memory qualification failed (LLM call or validation error)',
-                extra={'event_id': getattr(event, 'id', None)},
-            )
+            logger.warning('Batched qualification call failed; falling back to single calls', exc_info=True)
+            return {}
+
+        results = raw.get('results') if isinstance(raw, dict) and set(raw) == {'results'} else None
+        if not isinstance(results, list):
+            logger.warning('Batched qualification returned an unexpected shape', extra={'events': len(reqs)})
+            return {}
+
+        parsed: dict[int, list[QualifiedMemory]] = {}
+        seen: set[str] = set()
+        for entry in results:
+            try:
+                item = BatchQualificationItem.model_validate(entry)
+            except Exception:
+                logger.debug('Invalid batch qualification entry', exc_info=True)
+                continue
+
+            if not (item.id.startswith('e') and item.id[1:].isdigit() and int(item.id[1:]) < len(reqs)):
+                continue
+            pos = int(item.id[1:])
+
+            if item.id in seen:
+                # ambiguous answer for this event: retry it alone
+                parsed.pop(pos, None)
+                continue
+            seen.add(item.id)
+            parsed[pos] = item.memories
+
+        logger.debug(
+            'Batched qualification result',
+            extra={'events': len(reqs), 'parsed': len(parsed), 'fallbacks': len(reqs) - len(parsed)},
+        )
+        return parsed
+
+    def qualify_event(self, event: Event) -> list[QualifiedMemory]:
+        req = QualifyRequest.from_event(event)
+        answered, cache_key = self._qualify_without_llm(req)
+        if answered is not None:
+            return answered
+        return self._qualify_one(req, cache_key)
+
+    async def aqualify_event(self, event: Event) -> list[QualifiedMemory]:
+        """
+        qualify_event() for async callers: the pre-checks run on the ingest pool (the pre-filter
+        may embed, the cache may hit sqlite), the LLM wait holds no thread at all.
+        """
+        req = QualifyRequest.from_event(event)
+        answered, cache_key = await run_blocking('ingest', self._qualify_without_llm, req)
+        if answered is not None:
+            return answered
+        return await self._aqualify_one(req, cache_key)
+
+    def search_memories(
+        self,
+        db: Session,
+        *,
+        query: str,
+        actor_type: str | None = None,
+        actor_id: str | None = None,
+        type: str | None = None,
+        scope: str | None = None,
+        k: int = 10,
+        min_score: float | None = None,
+    ) -> list[tuple[float, Memory]]:
+        """
+        Semantic retrieval: one embed, one Qdrant search (filters applied in Qdrant),
+        one SQL `IN` query to hydrate rows. Returns (score, memory) best-first.
+        """
+        filters = {
+            'actor_type': actor_type,
+            'actor_id': actor_id,
+            'type': type,
+            'scope': scope,
+        }
+
+        hits = self.vector_db_svc.search_memories(query, filters=filters, limit=k, min_score=min_score)
+        if not hits:
             return []
 
+        ids = [memory_id for memory_id, _ in hits]
+        try:
+            rows = {m.id: m for m in db.query(Memory).filter(Memory.id.in_(ids)).all()}
+        except Exception:
+            logger.exception('Failed to hydrate memory search hits from DB')
+            raise
+
+        # Qdrant order wins; points whose SQL row is gone are dropped.
+        out = [(score, rows[memory_id]) for memory_id, score in hits if memory_id in rows]
+
         logger.debug(
-            'Memory qualification result',
+            'Searched memories',
+            extra={'k': k, 'hits': len(hits), 'returned': len(out)},
+        )
+        return out
+
+    def process_event_to_memories(self, db: Session, event: Event) -> list[Memory]:
+        """
+        Flow:
+        - If LLM is enabled: qualify + store if is_memory=true
+        - If LLM is disabled: fall back to a simple 'episode' session memory
+
+        Rules:
+        - episode scope is always forced to session
+        """
+        logger.debug(
+            'Processing event to memories',
             extra={
                 'event_id': getattr(event, 'id', None),
-                'is_memory': getattr(qual, 'is_memory', None),
-                'type': getattr(qual, 'type', None),
-                'scope': getattr(qual, 'scope', None),
-                'key': getattr(qual, 'key', None),
-                'confidence': getattr(qual, 'confidence', None),
+                'actor_type': getattr(event, 'actor_type', None),
+                'actor_id': getattr(event, 'actor_id', None),
+                'has_text': bool(getattr(event, 'text', None)),
+                'has_payload': bool(getattr(event, 'payload', None)),
+                'use_llm_qualifier': settings.use_llm_qualifier,
             },
         )
 
-        if len(qual.memories) == 0:
+        try:
+            qualified = self.qualify_event(event)
+        except Exception as e:
+            self._log_qualification_failure(event, e)
+            return []
+
+        if len(qualified) == 0:
             logger.debug('Qualification says not a memory; skipping', extra={'event_id': getattr(event, 'id', None)})
             return []
-        
 
-        logger.debug('Event is qualified as memory', extra={'event_id': getattr(event, 'id', None)})
-        memories: list[Memory] = []
-        for m in qual.memories:
-            # send memory to vectordb and if its not duplicate only then save. 
-            existing_memory_id = self.vector_db_svc.find_duplicate(
-                key=m.key,
-                value=m.value or {},
-                min_score=0.95,
+        return self.store_qualified(db, event, qualified)
+
+    async def aprocess_event_to_memories(self, db: Session, event: Event) -> list[Memory]:
+        """
+        process_event_to_memories() for async routes. Same rules; storing runs on the ingest pool.
+        """
+        try:
+            qualified = await self.aqualify_event(event)
+        except Exception as e:
+            self._log_qualification_failure(event, e)
+            return []
+
+        if len(qualified) == 0:
+            logger.debug('Qualification says not a memory; skipping', extra={'event_id': getattr(event, 'id', None)})
+            return []
+
+        return await run_blocking('ingest', self.store_qualified, db, event, qualified)
+
+    @staticmethod
+    def _raise_llm_errors() -> bool:
+        # do NOT hide LLM issues during integration tests.
+        return os.getenv('RUN_LLM_TESTS', 'false').lower() in ('1', 'true', 'yes')
+
+    @staticmethod
+    def _log_qualification_failure(event: Event, e: Exception) -> None:
+        if isinstance(e, LLMJSONError):
+            logger.error(
+                'LLM returned non-JSON / unusable JSON for memory qualification',
+                exc_info=e,
+                extra={'event_id': getattr(event, 'id', None)},
             )
+        else:
+            logger.error(
+                'Memory qualification failed (LLM call or validation error)',
+                exc_info=e,
+                extra={'event_id': getattr(event, 'id', None)},
+            )
+
+    def dedup(
+        self,
+        db: Session | None,
+        items: list[tuple[EventLike | None, str, str, dict]],
+    ) -> tuple[list[DuplicateOf | None], list[list[float] | None], list[str]]:
+        """
+        Dedup (actor, type, key, value) items in two tiers:
+        - exact: content hash against the LRU / memories.content_hash, and against earlier items,
+        - near: embed only what is left and run one scoped batch search (find_duplicates()).
+        Returns per item the duplicate it repeats (None if new), its vector (None when it never
+        needed one) and its content hash. A batch_index always points at an earlier new item.
+        """
+        hashes = [content_hash(actor, m_type, key, value) for actor, m_type, key, value in items]
+        exact = self.exact_dedup.lookup_many(db, hashes) if self.exact_dedup is not None else {}
+
+        matches: list[DuplicateOf | None] = [None] * len(items)
+        first: dict[str, int] = {}
+        for i, h in enumerate(hashes):
+            if h in exact:
+                matches[i] = DuplicateOf(memory_id=exact[h])
+            elif h in first:
+                matches[i] = DuplicateOf(batch_index=first[h])
+            else:
+                first[h] = i
+
+        vectors: list[list[float] | None] = [None] * len(items)
+        todo = list(first.values())
+        if todo:
+            embedded = self.vector_db_svc.embed_memories([(items[i][2], items[i][3]) for i in todo])
+            scopes = [VectorDBService.dedup_scope(*items[i][:3]) for i in todo]
+            near = self.vector_db_svc.find_duplicates(embedded, scopes=scopes, min_score=0.95)
+            for i, vector, dup in zip(todo, embedded, near):
+                vectors[i] = vector
+                if dup is not None and dup.batch_index is not None:
+                    dup = DuplicateOf(batch_index=todo[dup.batch_index])
+                matches[i] = dup
+
+        # an exact copy of an item that turned out to be a near-duplicate repeats what that one repeats
+        for i, dup in enumerate(matches):
+            if dup is not None and dup.batch_index is not None and matches[dup.batch_index] is not None:
+                matches[i] = matches[dup.batch_index]
+
+        return matches, vectors, hashes
+
+    def plan_writes(
+        self,
+        qualified: list[QualifiedMemory],
+        actor: EventLike | None = None,
+        db: Session | None = None,
+    ) -> MemoryWritePlan:
+        """
+        Everything store_qualified() decides before touching MySQL (beyond the content-hash lookup):
+        dedup the memories among `actor`'s memories of the same type and key, and split them into
+        new rows vs assertion-count bumps.
+        """
+        plan = MemoryWritePlan()
+        normalized = [self.normalize_qualified(m) for m in qualified]
+        matches, vectors, hashes = self.dedup(
+            db, [(actor, m_type, key, m.value or {}) for m, (m_type, _, key) in zip(qualified, normalized)]
+        )
 
-            if existing_memory_id:
+        row_of: dict[int, int] = {}
+        for i, (m, (m_type, m_scope, key), dup) in enumerate(zip(qualified, normalized, matches)):
+            if dup is not None and dup.memory_id is not None:
                 logger.info(
                     'Memory already exists. Update assertion count',
-                    extra={'memory_id': existing_memory_id},
+                    extra={'memory_id': dup.memory_id},
                 )
-                self._update_memory_assertion_count(db, existing_memory_id)
+                plan.increments[dup.memory_id] = plan.increments.get(dup.memory_id, 0) + 1
                 continue
 
-            # if self.vector_upsert_item.memory_exists:
-            #     logger.info(
-            #         'Memory already exists. Update assertion count for the memory in DB',
-            #         extra={'memory_id': self.vector_upsert_item.existing_memory_id},
-            #     )
-            #     self._update_memory_assertion_count(db, self.vector_upsert_item.existing_memory_id)
-            #     continue  # skip storing this memory since it's a duplicate in VDB
-
-            # since there is no exisitng memory in VDB, we can go ahead and store this memory in DB and update 
-            # VDB with memory_id after storing in DB.
-            m_type = m.type
-            m_scope = m.scope or 'profile'
-            if m_type == 'episode':
-                m_scope = 'session'
-
-            key = (m.key or '').strip()
-            if not key:
-                key = f'{m_type}_auto'
-
-            mem = self._store_memory_in_db(db, event, m_type, m_scope, key, m, qual)
-            memories.append(mem)
-            try:
-                self.vector_db_svc.upsert_memory(mem)
-                logger.debug('Upserted memory to vector DB')
-            except Exception:
-                logger.exception(
-                    'Failed to upsert memory to vector DB',
-                    extra={'memory_id': getattr(mem, 'id', None)},
-                )
-                # for now not sur if i should stop the flow here or be ok with memory not being in VDB. 
-                # TODO: revisit later
+            if dup is not None:
+                # same memory twice in one output: one row, asserted once more
+                plan.rows[row_of[dup.batch_index]]['assertion_count'] += 1
+                continue
+
+            row_of[i] = len(plan.rows)
+            plan.rows.append(
+                {
+                    'type': m_type,
+                    'scope': m_scope,
+                    'key': key,
+                    'value': m.value or {},
+                    'confidence': float(m.confidence or 0.0),
+                    'content_hash': hashes[i],
+                    'assertion_count': 0,
+                    'decay': 0.0,
+                }
+            )
+            plan.vectors.append(vectors[i])
+        return plan
+
+    def remember_written(self, memories: list[Memory]) -> None:
+        """
+        After commit: the new rows' hashes go into the exact-dedup LRU.
+        """
+        if self.exact_dedup is not None:
+            self.exact_dedup.remember({m.content_hash: int(m.id) for m in memories if m.content_hash})
+
+    def write_planned(self, db: Session, event_id: int, plan: MemoryWritePlan) -> list[Memory]:
+        """
+        I add the plan's writes to the caller's transaction: one multi-row INSERT for the new
+        memories (ids via RETURNING / lastrowid, no refresh), their outbox rows, and atomic
+        assertion_count bumps for duplicates. Nothing is committed here.
+
+        Returns transient Memory objects carrying the inserted values; they never expire on commit,
+        so indexing and responses don't need another SELECT.
+        """
+        # the server's NOW(), like the column default: created_at stays in the DB session's timezone
+        now = db.scalar(select(func.now())) if plan.rows else None
+        rows = [{**row, 'event_id': event_id, 'created_at': now} for row in plan.rows]
+        memory_ids = insert_returning_ids(db, Memory, rows)
+        if self.outbox is not None:
+            self.outbox.add_many(db, memory_ids)
+        self.increment_assertion_counts(db, plan.increments)
+
+        return [
+            Memory(id=mid, superseded_by_memory_id=None, **row) for mid, row in zip(memory_ids, rows)
+        ]
+
+    def index_new(self, memories: list[Memory], vectors: list[list[float]], event: EventLike) -> None:
+        """
+        After commit: push new memories to the vector DB and the KG (unless the outbox does it).
+        Failures are logged, not raised: the rows are committed already.
+        """
+        if not memories or self.outbox is not None:
+            return
+
+        try:
+            self.vector_db_svc.upsert_memories(memories, vectors, [event] * len(memories))
+            logger.debug('Upserted memories to vector DB', extra={'memories': len(memories)})
+        except Exception:
+            logger.exception(
+                'Failed to upsert memories to vector DB',
+                extra={'memory_ids': [m.id for m in memories]},
+            )
 
+        try:
+            self.kg.upsert_memories([(m, event) for m in memories])
+            logger.debug('Upserted graph after vector DB')
+        except Exception:
+            logger.exception('KG upsert failed', extra={'memory_ids': [m.id for m in memories]})
+
+    def store_qualified(self, db: Session, event: Event, qualified: list[QualifiedMemory]) -> list[Memory]:
+        """
+        Dedup + persist qualified memories for an existing event in ONE commit, then index them.
+        """
+        logger.debug('Event is qualified as memory', extra={'event_id': getattr(event, 'id', None)})
+        plan = self.plan_writes(qualified, event, db)
+        # plain copies: the ORM event expires on commit, indexing shouldn't reload it
+        event_id = event.id
+        source = EventCreate.model_construct(actor_type=event.actor_type, actor_id=event.actor_id)
+
+        try:
+            memories = self.write_planned(db, event_id, plan)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception('Failed to store qualified memories', extra={'event_id': event_id})
+            raise
+
+        self.remember_written(memories)
+        self.index_new(memories, plan.vectors, source)
+        return memories
+
+    def write_event(
+        self,
+        db: Session,
+        data: EventCreate,
+        qualified: list[QualifiedMemory],
+        *,
+        event_svc: EventService,
+        before_commit: Callable[[Event, list[Memory]], None] | None = None,
+    ) -> tuple[Event, list[Memory]]:
+        """
+        The whole per-event write set as one unit of work: the event, its new memories, outbox rows,
+        duplicate bumps (and whatever `before_commit` adds, e.g. a reply event) in a single commit.
+        Either all of it lands or none of it does. A failed dedup stores the event without memories,
+        except with RUN_LLM_TESTS set, where it is raised like a failed qualification.
+        """
+        plan = MemoryWritePlan()
+        if qualified:
             try:
-                self.kg.upsert_memory(mem,event)
-                logger.debug('Upserted graph after vector DB')
+                plan = self.plan_writes(qualified, data, db)
             except Exception:
-                logger.exception(
-                    'KG upsert failed',
-                    extra={'memory_id': getattr(mem, 'id', None)},
-                )
-        return memories
\ No newline at end of file
+                # dedup needs the vector DB; without it keep the event, drop the memories (as before)
+                logger.exception('Dedup/embedding failed; storing the event without memories')
+                if self._raise_llm_errors():
+                    raise
+
+        try:
+            evt = event_svc.create_event(db, data, commit=False)
+            memories = self.write_planned(db, evt.id, plan)
+            if before_commit is not None:
+                before_commit(evt, memories)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception('Failed to write event and memories', extra={'actor_id': data.actor_id})
+            raise
+
+        self.remember_written(memories)
+        self.index_new(memories, plan.vectors, data)
+        return evt, memories
+
+    def ingest_event(
+        self,
+        db: Session,
+        data: EventCreate,
+        *,
+        event_svc: EventService,
+        before_commit: Callable[[Event, list[Memory]], None] | None = None,
+    ) -> tuple[Event, list[Memory]]:
+        """
+        Qualify first (no transaction is held across the LLM call), then write_event().
+        A failed qualification still stores the event without memories, except with RUN_LLM_TESTS set:
+        then the LLM error is raised so integration tests fail on the real cause.
+        """
+        try:
+            qualified = self.qualify_event(data)
+        except Exception as e:
+            self._log_qualification_failure(data, e)
+            if self._raise_llm_errors():
+                raise
+            qualified = []
+        return self.write_event(db, data, qualified, event_svc=event_svc, before_commit=before_commit)
+
+    async def aingest_event(
+        self,
+        db: Session,
+        data: EventCreate,
+        *,
+        event_svc: EventService,
+        before_commit: Callable[[Event, list[Memory]], None] | None = None,
+    ) -> tuple[Event, list[Memory]]:
+        try:
+            qualified = await self.aqualify_event(data)
+        except Exception as e:
+            self._log_qualification_failure(data, e)
+            if self._raise_llm_errors():
+                raise
+            qualified = []
+        return await run_blocking(
+            'ingest', self.write_event, db, data, qualified, event_svc=event_svc, before_commit=before_commit
+        )
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.integrations.vector.base import Embedder
+from app.integrations.vector.qdrant_db import QdrantVectorDB
+from app.integrations.vector.registry import get_embedder
+from app.models.event import Event
+from app.models.memory import Memory
+from app.schemas.event import EventCreate
+from app.services.vectordb_service import VectorDBService
+
+logger = logging.getLogger(__name__)
+
+# rough per-row cost of one in-flight batch besides the vector: ORM row, JSON value, payload dict
+_ROW_OVERHEAD_BYTES = 4096
+# a Python list of floats costs ~32 bytes per element (8 byte pointer + 24 byte float)
+_FLOAT_BYTES = 32
+
+
+@dataclass
+class ReindexCheckpoint:
+    alias: str
+    target: str
+    model: str
+    dim: int
+    last_id: int = 0
+    rows: int = 0
+    elapsed_s: float = 0.0
+    done: bool = False
+
+    @classmethod
+    def load(cls, path: str) -> ReindexCheckpoint | None:
+        try:
+            with open(path, encoding='utf-8') as fh:
+                return cls(**json.load(fh))
+        except FileNotFoundError:
+            return None
+
+    def save(self, path: str) -> None:
+        # write + rename, so a crash mid-write never leaves a torn checkpoint behind
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(asdict(self), fh)
+        os.replace(tmp, path)
+
+
+@dataclass
+class ReindexReport:
+    alias: str
+    target: str
+    rows: int
+    elapsed_s: float
+    rows_per_s: float
+    batch_rows: int
+    resumed_from: int = 0
+    swapped: bool = False
+    previous: str | None = None
+    errors: list[str] = field(default_factory=list)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')[:48]
+
+
+class ReindexService:
+    """
+    I rebuild the memories collection from MySQL: stream Memory rows by keyset on id, embed them in
+    large batches with the (possibly new) embedding model, upsert them into a fresh collection sized
+    for that model, then atomically point the alias the app uses at it.
+
+    Progress is checkpointed after every batch, so a killed job resumes where it stopped.
+    Batch size is capped by a memory budget so the job never holds more than ~budget in flight.
+
+    Rows written while the job runs are picked up by the final keyset pass right before the swap;
+    anything written between that pass and the swap is only in the old collection.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        embedder: Embedder | None = None,
+        alias: str | None = None,
+        target: str | None = None,
+        checkpoint_path: str | None = None,
+        batch_rows: int | None = None,
+        memory_budget_mb: float | None = None,
+        vdb_factory: Callable[[Embedder, str], QdrantVectorDB] | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.embedder = embedder or get_embedder()
+        self.alias = alias or settings.qdrant_collection
+        self.checkpoint_path = checkpoint_path or os.path.join(
+            settings.reindex_checkpoint_dir, f'{_slug(self.alias)}.json'
+        )
+        self._target = target
+        self._vdb_factory = vdb_factory or (lambda emb, name: QdrantVectorDB(embedder=emb, collection=name))
+
+        budget = settings.reindex_memory_budget_mb if memory_budget_mb is None else memory_budget_mb
+        wanted = settings.reindex_batch_rows if batch_rows is None else batch_rows
+        self.batch_rows = self.rows_for_budget(self.embedder.dim, budget, wanted)
+
+    @staticmethod
+    def rows_for_budget(dim: int, budget_mb: float, wanted: int) -> int:
+        per_row = dim * _FLOAT_BYTES + _ROW_OVERHEAD_BYTES
+        return max(1, min(int(wanted), int(budget_mb * 1024 * 1024) // per_row))
+
+    def _new_target(self) -> str:
+        return f'{self.alias}_{_slug(self.embedder.model_name)}_{self.embedder.dim}_{int(time.time())}'
+
+    def _start(self, resume: bool) -> ReindexCheckpoint:
+        cp = ReindexCheckpoint.load(self.checkpoint_path) if resume else None
+        if (
+            cp is not None
+            and not cp.done
+            and cp.alias == self.alias
+            and cp.model == self.embedder.model_name
+            and cp.dim == self.embedder.dim
+            and (self._target is None or cp.target == self._target)
+        ):
+            logger.info('Resuming reindex', extra={'target': cp.target, 'last_id': cp.last_id, 'rows': cp.rows})
+            return cp
+
+        return ReindexCheckpoint(
+            alias=self.alias,
+            target=self._target or self._new_target(),
+            model=self.embedder.model_name,
+            dim=self.embedder.dim,
+        )
+
+    def _fetch(self, db: Session, after_id: int) -> list[tuple[Memory, str | None, str | None]]:
+        stmt = (
+            select(Memory, Event.actor_type, Event.actor_id)
+            .outerjoin(Event, Event.id == Memory.event_id)
+            .where(Memory.id > after_id)
+            .order_by(Memory.id)
+            .limit(self.batch_rows)
+        )
+        return [tuple(r) for r in db.execute(stmt).all()]
+
+    def _points(self, rows: list[tuple[Memory, str | None, str | None]]) -> list[tuple[int, list[float], dict]]:
+        mems = [m for m, _, _ in rows]
+        vectors = self.embedder.embed_many([VectorDBService.memory_text(m.key, m.value) for m in mems])
+
+        points = []
+        for (mem, actor_type, actor_id), vector in zip(rows, vectors):
+            # the actor came with the row; don't let _memory_payload lazy-load mem.event per row
+            actor = EventCreate(actor_type=actor_type, actor_id=actor_id) if actor_type is not None else None
+            payload = VectorDBService._memory_payload(mem, actor)
+            points.append((int(mem.id), vector, payload))
+        return points
+
+    def run(self, *, resume: bool = True, swap: bool = True, replace_collection: bool = False) -> ReindexReport:
+        cp = self._start(resume)
+        resumed_from = cp.rows
+        vdb = self._vdb_factory(self.embedder, cp.target)
+        vdb.ensure_ready()
+
+        started = time.monotonic()
+        base_elapsed = cp.elapsed_s
+        db = self.session_factory()
+        try:
+            while True:
+                rows = self._fetch(db, cp.last_id)
+                if not rows:
+                    break
+
+                vdb.upsert_many(self._points(rows))
+
+                cp.last_id = int(rows[-1][0].id)
+                cp.rows += len(rows)
+                cp.elapsed_s = base_elapsed + time.monotonic() - started
+                cp.save(self.checkpoint_path)
+
+                # keep the identity map from growing with every batch
+                db.expunge_all()
+
+                done_now = cp.rows - resumed_from
+                logger.info(
+                    'Reindex progress',
+                    extra={
+                        'target': cp.target,
+                        'rows': cp.rows,
+                        'last_id': cp.last_id,
+                        'rows_per_s': round(done_now / max(time.monotonic() - started, 1e-9), 1),
+                    },
+                )
+        finally:
+            db.close()
+
+        elapsed = time.monotonic() - started
+        report = ReindexReport(
+            alias=self.alias,
+            target=cp.target,
+            rows=cp.rows,
+            elapsed_s=round(elapsed, 3),
+            rows_per_s=round((cp.rows - resumed_from) / elapsed, 1) if elapsed > 0 else 0.0,
+            batch_rows=self.batch_rows,
+            resumed_from=resumed_from,
+        )
+
+        # fire-and-forget upserts (QDRANT_BULK_WAIT=false) may still be applying
+        indexed = self._wait_for_count(vdb, cp.rows)
+        if indexed < cp.rows:
+            report.errors.append(f'target has {indexed} points, expected {cp.rows}; not swapping')
+            logger.error('Reindex target is incomplete', extra={'target': cp.target, 'indexed': indexed})
+            return report
+
+        if swap:
+            report.previous = vdb.swap_alias(self.alias, cp.target, replace_collection=replace_collection)
+            report.swapped = True
+
+        cp.done = True
+        cp.save(self.checkpoint_path)
+
+        logger.info('Reindex finished', extra=asdict(report))
+        return report
+
+    @staticmethod
+    def _wait_for_count(vdb: QdrantVectorDB, expected: int, timeout_s: float = 60.0) -> int:
+        deadline = time.monotonic() + timeout_s
+        while True:
+            n = vdb.count()
+            if n >= expected or time.monotonic() >= deadline:
+                return n
+            time.sleep(0.5)
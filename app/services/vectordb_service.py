@@ -2,25 +2,43 @@ from __future__ import annotations
 
 import json
 import logging
+from dataclasses import dataclass
 from typing import Any
 
-from app.integrations.vector.embedder import SentenceTransformerEmbedder
+import numpy as np
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.integrations.vector.base import Embedder
 from app.integrations.vector.qdrant_db import QdrantVectorDB
+from app.integrations.vector.registry import get_embedder
+from app.models.event import Event
 from app.models.memory import Memory
+from app.schemas.event import EventLike
 from app.schemas.vectodb import VectorDBUpsertItem
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class DuplicateOf:
+    """An existing memory (memory_id) or an earlier item of the same batch (batch_index)."""
+
+    memory_id: int | None = None
+    batch_index: int | None = None
+
+
 class VectorDBService:
     """
     I handle vector DB operations for memories.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, embedder: Embedder | None = None, vdb: QdrantVectorDB | None = None) -> None:
         try:
-            self.vdb = QdrantVectorDB()
-            self.embedder = SentenceTransformerEmbedder()
+            # one shared model for both the service and the Qdrant wrapper
+            self.embedder = embedder or get_embedder()
+            self.vdb = vdb or QdrantVectorDB(embedder=self.embedder)
 
             logger.debug(
                 'Initialized VectorDBService',
@@ -30,22 +48,60 @@ class VectorDBService:
             logger.exception('Failed to initialize VectorDBService')
             raise
 
+    @staticmethod
+    def memory_text(key: str | None, value: dict | None) -> str:
+        # This is THE text format we embed memories with; dedup and upsert must agree on it.
+        return f'{(key or "").strip()}\n{json.dumps(value or {}, ensure_ascii=False)}'
+
     def _memory_as_text(self, mem: Memory) -> str:
-        # Must match your upsert embedding text format.
-        return f'{mem.key}\n{json.dumps(mem.value or {}, ensure_ascii=False)}'
-    
+        return self.memory_text(mem.key, mem.value)
+
+    def embed_memory(self, key: str | None, value: dict | None) -> list[float]:
+        """
+        Embed a memory once; the vector can then go to find_duplicate() and upsert_memory().
+        """
+        return self.embedder.embed(self.memory_text(key, value))
+
+    def embed_memories(self, items: list[tuple[str | None, dict | None]]) -> list[list[float]]:
+        """
+        Batched embed_memory(): one encode call for all (key, value) pairs.
+        """
+        return self.embedder.embed_many([self.memory_text(k, v) for k, v in items])
+
+    @staticmethod
+    def dedup_scope(
+        actor: EventLike | None,
+        m_type: str | None,
+        key: str | None,
+    ) -> dict[str, Any]:
+        """
+        The payload filter a duplicate has to match: same actor, same memory type, same key.
+        Without it a near-identical memory of another user would count as a repeat.
+        """
+        return {
+            'actor_type': getattr(actor, 'actor_type', None),
+            'actor_id': getattr(actor, 'actor_id', None),
+            'type': m_type,
+            'key': key,
+        }
+
     def find_duplicate(
         self,
         *,
         key: str | None,
         value: dict,
         min_score: float = 0.95,
+        vector: list[float] | None = None,
+        scope: dict[str, Any] | None = None,
     ) -> int | None:
         """
         Returns existing memory_id if duplicate found, else None.
+        `scope` (see dedup_scope()) restricts the search to the same actor/type/key.
         """
-        query = f'{(key or "").strip()}\n{json.dumps(value or {}, ensure_ascii=False)}'
-        hits = self.vdb.search(query, limit=1, min_score=min_score)
+        if vector is None:
+            vector = self.embed_memory(key, value)
+
+        hits = self.vdb.search(vector=vector, limit=1, min_score=min_score, filters=scope)
 
         if not hits:
             return None
@@ -54,13 +110,160 @@ class VectorDBService:
         return payload.get('memory_id')
 
 
-    def upsert_memory(self, mem: Memory) -> None:
+    def find_duplicates(
+        self,
+        vectors: list[list[float]],
+        *,
+        scopes: list[dict[str, Any] | None] | None = None,
+        min_score: float = 0.95,
+    ) -> list[DuplicateOf | None]:
+        """
+        find_duplicate() for a whole batch of embedded memories:
+        - one Qdrant batch search for all vectors (existing memories), each restricted by its scope,
+        - then the vectors are compared with each other locally, so two copies of the same memory
+          in one batch (e.g. the same LLM output twice) don't both get written.
+        A later item only ever points at an earlier one with the same scope, and only at one that
+        is itself new.
+        """
+        if not vectors:
+            return []
+        if scopes is None:
+            scopes = [None] * len(vectors)
+
+        hits = self.vdb.search_many(vectors, limit=1, min_score=min_score, filters=scopes)
+        out: list[DuplicateOf | None] = []
+        for h in hits:
+            memory_id = (h[0].get('payload') or {}).get('memory_id') if h else None
+            out.append(DuplicateOf(memory_id=int(memory_id)) if memory_id else None)
+
+        m = np.asarray(vectors, dtype=np.float32)
+        m /= np.linalg.norm(m, axis=1, keepdims=True) + 1e-12
+        sims = m @ m.T
+
+        kept: list[int] = []
+        for i in range(len(vectors)):
+            if out[i] is not None:
+                continue
+            match = next((j for j in kept if scopes[j] == scopes[i] and sims[i, j] >= min_score), None)
+            if match is None:
+                kept.append(i)
+            else:
+                out[i] = DuplicateOf(batch_index=match)
+        return out
+
+    def upsert_memory(
+        self,
+        mem: Memory,
+        vector: list[float] | None = None,
+        event: EventLike | None = None,
+    ) -> None:
         """
         Upsert DB Memory into VDB (mem.id is the point_id).
+        Pass the vector from find_duplicate() to skip re-embedding the same text, and the
+        source event so the point carries actor_type/actor_id for filtered search (without it
+        I fall back to mem.event).
         """
-        text = f'{mem.key}\n{json.dumps(mem.value or {}, ensure_ascii=False)}'
-        vector = self.embedder.embed(text)
+        if vector is None:
+            vector = self.embed_memory(mem.key, mem.value)
 
+        self.vdb.upsert(
+            point_id=int(mem.id),
+            vector=vector,
+            payload=self._memory_payload(mem, event),
+        )
+
+    def upsert_memories(
+        self,
+        mems: list[Memory],
+        vectors: list[list[float]] | None = None,
+        events: list[EventLike | None] | None = None,
+    ) -> None:
+        """
+        Bulk upsert_memory(): one batched embed (if vectors aren't given) and one multi-point upsert.
+        """
+        if not mems:
+            return
+        if vectors is None:
+            vectors = self.embed_memories([(m.key, m.value) for m in mems])
+        if events is None:
+            events = [None] * len(mems)
+
+        self.vdb.upsert_many(
+            [(int(m.id), v, self._memory_payload(m, e)) for m, v, e in zip(mems, vectors, events)]
+        )
+
+    def repair_missing(
+        self,
+        mems: list[Memory],
+        vectors: list[list[float]],
+        events: list[EventLike | None],
+    ) -> int:
+        """
+        The later consistency check for fire-and-forget upserts (QDRANT_BULK_WAIT=false): find the
+        points that never landed and upsert them again, waiting this time. Returns how many were missing.
+        """
+        if not mems:
+            return 0
+        missing = set(self.vdb.missing_points([int(m.id) for m in mems]))
+        if not missing:
+            return 0
+
+        self.vdb.upsert_many(
+            [
+                (int(m.id), v, self._memory_payload(m, e))
+                for m, v, e in zip(mems, vectors, events)
+                if int(m.id) in missing
+            ],
+            wait=True,
+        )
+        logger.warning('Re-upserted memories missing from the vector DB', extra={'points': len(missing)})
+        return len(missing)
+
+    def backfill_actor_fields(self, db: Session, *, batch_rows: int = 1000) -> int:
+        """
+        Upgrade step for points written before dedup was scoped by actor: copy actor_type/actor_id
+        from each memory's source event into its point, so dedup_scope() filters can match it.
+        Streams memories by keyset on id; points that already carry an actor (or are not in the
+        collection) are left alone, so re-running it is cheap. Returns how many points were updated.
+        """
+        updated = 0
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(Memory.id, Event.actor_type, Event.actor_id)
+                .join(Event, Event.id == Memory.event_id)
+                .where(Memory.id > last_id)
+                .order_by(Memory.id)
+                .limit(max(1, batch_rows))
+            ).all()
+            if not rows:
+                break
+            last_id = int(rows[-1][0])
+
+            points = self.vdb.retrieve_many([int(mid) for mid, _, _ in rows])
+            updates = [
+                (int(mid), {'actor_type': actor_type, 'actor_id': actor_id})
+                for mid, actor_type, actor_id in rows
+                if int(mid) in points and 'actor_id' not in points[int(mid)]['payload']
+            ]
+            self.vdb.set_payload_many(updates, wait=True)
+            updated += len(updates)
+
+        logger.info('Backfilled actor fields on vector DB points', extra={'points': updated})
+        return updated
+
+    @staticmethod
+    def _source_event(mem: Memory) -> Event | None:
+        # a memory always has a source event; load it unless the row is detached and it isn't loaded
+        state = sa_inspect(mem)
+        if 'event' in state.unloaded and state.session is None:
+            return None
+        return mem.event
+
+    @classmethod
+    def _memory_payload(cls, mem: Memory, event: EventLike | None = None) -> dict[str, Any]:
+        if event is None:
+            event = cls._source_event(mem)
         payload = {
             'type': mem.type,
             'scope': mem.scope,
@@ -70,12 +273,31 @@ class VectorDBService:
             'source_event_id': mem.event_id,
             'memory_id': int(mem.id),
         }
+        if event is not None:
+            payload['actor_type'] = event.actor_type
+            payload['actor_id'] = event.actor_id
+        return payload
 
-        self.vdb.upsert(
-            point_id=int(mem.id),
-            vector=vector,
-            payload=payload,
-        )
+    def search_memories(
+        self,
+        query: str,
+        *,
+        filters: dict[str, Any] | None = None,
+        limit: int = 10,
+        min_score: float | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Semantic retrieval: one embed + one filtered Qdrant search.
+        Returns (memory_id, score) best-first.
+        """
+        vector = self.embedder.embed(query)
+        hits = self.vdb.search(vector=vector, limit=limit, min_score=min_score, filters=filters)
+
+        out: list[tuple[int, float]] = []
+        for h in hits:
+            memory_id = (h.get('payload') or {}).get('memory_id') or h.get('id')
+            out.append((int(memory_id), float(h['score'])))
+        return out
 
 
     def _vdb_upsert_memory(self, mem: Memory) -> VectorDBUpsertItem:
@@ -93,10 +315,11 @@ class VectorDBService:
         }
 
         try:
-            query = self._memory_as_text(mem)
+            # embed once; the same vector is used for the search and the upsert below.
+            vector = self.embedder.embed(self._memory_as_text(mem))
 
             # threshold here needs to be strict. ok to have duplicate memoroes in DB but not ok to miss any. 
-            hits = self.vdb.search(query, limit=1, min_score=0.95)
+            hits = self.vdb.search(vector=vector, limit=1, min_score=0.95)
 
             if hits:
                 best = hits[0]
@@ -120,8 +343,6 @@ class VectorDBService:
                 return VectorDBUpsertItem(existing_memory_id=existing_memory_id, memory_exists=True)
 
             # No hit => upsert new point.
-            vector = self.embedder.embed(query)
-
             payload = {
                 'type': mem.type,
                 'scope': mem.scope,
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Copy actor_type / actor_id from MySQL events onto existing Qdrant memory points.
+
+Dedup only matches points whose payload carries the same actor as the new memory. Points written
+before that had no actor fields, so run this once after upgrading (the app can keep running).
+Re-running it is safe: points that already carry an actor are skipped.
+
+Usage examples:
+  python db_script/backfill_actor_payload.py
+  python db_script/backfill_actor_payload.py --batch-rows 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.models  # noqa: E402,F401
+from app.core.config import settings  # noqa: E402
+from app.services.vectordb_service import VectorDBService  # noqa: E402
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Backfill actor fields on Qdrant memory points from MySQL")
+    p.add_argument("--url", default=os.getenv("DATABASE_URL"), help="SQLAlchemy URL (defaults to the app settings)")
+    p.add_argument("--batch-rows", type=int, default=1000)
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    engine = create_engine(args.url or settings.database_url, pool_pre_ping=True)
+    db = sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+    try:
+        updated = VectorDBService().backfill_actor_fields(db, batch_rows=args.batch_rows)
+    finally:
+        db.close()
+
+    print(json.dumps({"points_updated": updated}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
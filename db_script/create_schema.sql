@@ -8,6 +8,7 @@ CREATE TABLE IF NOT EXISTS memories (
   `key` VARCHAR(128) NOT NULL,
   value JSON NOT NULL,
   confidence DOUBLE NOT NULL DEFAULT 0.0,
+  content_hash VARCHAR(64) NULL,
 
   assertion_count INT NOT NULL DEFAULT 0,
   decay DOUBLE NOT NULL DEFAULT 0.0,
@@ -19,8 +20,10 @@ CREATE TABLE IF NOT EXISTS memories (
     FOREIGN KEY (superseded_by_memory_id) REFERENCES memories(id)
     ON DELETE SET NULL,
 
-  INDEX idx_memories_type_scope (type, scope),
-  INDEX idx_memories_key (`key`),
+  INDEX ix_memories_scope_type_id (scope, type, id),
+  INDEX ix_memories_type_id (type, id),
+  INDEX ix_memories_key (`key`),
+  INDEX ix_memories_content_hash (content_hash),
   INDEX idx_memories_superseded_by (superseded_by_memory_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -40,7 +43,75 @@ CREATE TABLE IF NOT EXISTS events (
     FOREIGN KEY (memory_id) REFERENCES memories(id)
     ON DELETE SET NULL,
 
-  INDEX idx_events_actor (actor_type, actor_id),
+  INDEX ix_events_actor_created (actor_type, actor_id, created_at),
   INDEX idx_events_created_at (created_at),
   INDEX idx_events_memory_id (memory_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+
+-- Upgrading an existing database (the ORM's create_all never alters existing tables):
+--   ALTER TABLE memories
+--     DROP INDEX idx_memories_type_scope, DROP INDEX idx_memories_key,
+--     ADD INDEX ix_memories_scope_type_id (scope, type, id),
+--     ADD INDEX ix_memories_type_id (type, id),
+--     ADD INDEX ix_memories_key (`key`);
+--   ALTER TABLE events
+--     DROP INDEX idx_events_actor,
+--     ADD INDEX ix_events_actor_created (actor_type, actor_id, created_at);
+--   ALTER TABLE memories
+--     ADD COLUMN content_hash VARCHAR(64) NULL AFTER confidence,
+--     ADD INDEX ix_memories_content_hash (content_hash);
+-- Run `python db_script/explain_indexes.py` afterwards to check the query plans.
+
+
+-- Durable queue for async ingestion (ASYNC_INGEST=true): one job per event still to be processed.
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+  id BIGINT PRIMARY KEY AUTO_INCREMENT,
+
+  event_id BIGINT NOT NULL,
+  status VARCHAR(16) NOT NULL DEFAULT 'pending',
+  attempts INT NOT NULL DEFAULT 0,
+  last_error TEXT NULL,
+
+  available_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  claim_token VARCHAR(64) NULL,
+  locked_at DATETIME NULL,
+
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  CONSTRAINT uq_ingest_jobs_event UNIQUE (event_id),
+  CONSTRAINT fk_ingest_jobs_event
+    FOREIGN KEY (event_id) REFERENCES events(id)
+    ON DELETE CASCADE,
+
+  INDEX ix_ingest_jobs_status_available (status, available_at),
+  INDEX ix_ingest_jobs_claim_token (claim_token)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+
+-- Transactional outbox (OUTBOX_ENABLED=true): one row per memory still to be indexed in Qdrant + the KG,
+-- written in the memory's transaction and drained by OutboxDrainer.
+CREATE TABLE IF NOT EXISTS memory_outbox (
+  id BIGINT PRIMARY KEY AUTO_INCREMENT,
+
+  memory_id BIGINT NOT NULL,
+  status VARCHAR(16) NOT NULL DEFAULT 'pending',
+  attempts INT NOT NULL DEFAULT 0,
+  last_error TEXT NULL,
+
+  available_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  claim_token VARCHAR(64) NULL,
+  locked_at DATETIME NULL,
+
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  processed_at DATETIME NULL,
+
+  CONSTRAINT fk_memory_outbox_memory
+    FOREIGN KEY (memory_id) REFERENCES memories(id)
+    ON DELETE CASCADE,
+
+  INDEX ix_memory_outbox_status_available (status, available_at),
+  INDEX ix_memory_outbox_memory_id (memory_id),
+  INDEX ix_memory_outbox_claim_token (claim_token)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Run the memory outbox drainer as its own process.
+
+Use this with OUTBOX_ENABLED=true and OUTBOX_DRAINER_IN_APP=false, so API workers only write
+MySQL and this process pushes memories to Qdrant and NebulaGraph.
+
+Usage examples:
+  python db_script/drain_outbox.py              # drain until Ctrl-C
+  python db_script/drain_outbox.py --once       # drain what is pending now, print the lag, exit
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.models  # noqa: E402,F401
+from app.db.session import SessionLocal  # noqa: E402
+from app.services.kg_service import KGService  # noqa: E402
+from app.services.memory_outbox import MemoryOutbox, OutboxDrainer  # noqa: E402
+from app.services.vectordb_service import VectorDBService  # noqa: E402
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Drain memory_outbox into Qdrant and the KG")
+    p.add_argument("--workers", type=int, default=None, help="drainer threads (defaults to OUTBOX_DRAINERS)")
+    p.add_argument("--once", action="store_true", help="drain until the outbox is empty, then exit")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    vdb_svc = VectorDBService()
+    kg = KGService()
+    drainer = OutboxDrainer(lambda: vdb_svc, lambda: kg, SessionLocal, workers=args.workers)
+
+    try:
+        if args.once:
+            db = SessionLocal()
+            try:
+                while drainer.drain_once(db):
+                    pass
+                print(json.dumps(MemoryOutbox().lag(db), indent=2))
+            finally:
+                db.close()
+            return 0
+
+        stop = threading.Event()
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+        drainer.start()
+        stop.wait()
+        drainer.stop()
+        return 0
+    finally:
+        kg.flush()
+        kg.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
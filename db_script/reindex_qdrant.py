@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Rebuild the Qdrant memories collection from MySQL (re-embed after a model change, or after losing Qdrant).
+
+I stream memories by keyset on id, embed them with the chosen model, write them into a new
+collection and then point the alias the app uses (QDRANT_COLLECTION) at it. Progress is
+checkpointed, so re-running the same command resumes a killed job.
+
+Usage examples:
+  python db_script/reindex_qdrant.py --model sentence-transformers/all-mpnet-base-v2
+  python db_script/reindex_qdrant.py --batch-rows 5000 --memory-budget-mb 512
+  python db_script/reindex_qdrant.py --replace-collection   # first run, when "memories" is still a collection
+
+--replace-collection deletes the old collection before creating the alias. Stop the app first:
+a running app recreates the collection in that window and the swap fails (re-run to finish it).
+
+After the swap, restart the app with EMBEDDING_MODEL set to the model used here.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+from dataclasses import asdict
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.models  # noqa: E402,F401
+from app.core.config import settings  # noqa: E402
+from app.integrations.vector.registry import get_embedder  # noqa: E402
+from app.services.reindex_service import ReindexService  # noqa: E402
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Re-embed all memories into a new Qdrant collection and swap the alias")
+    p.add_argument("--url", default=os.getenv("DATABASE_URL"), help="SQLAlchemy URL (defaults to the app settings)")
+    p.add_argument("--model", default=None, help="embedding model (defaults to EMBEDDING_MODEL)")
+    p.add_argument("--device", default=None)
+    p.add_argument("--alias", default=None, help="alias the app reads (defaults to QDRANT_COLLECTION)")
+    p.add_argument("--target", default=None, help="name of the new collection (generated if omitted)")
+    p.add_argument("--batch-rows", type=int, default=None)
+    p.add_argument("--memory-budget-mb", type=float, default=None)
+    p.add_argument("--checkpoint", default=None, help="checkpoint file (defaults to REINDEX_CHECKPOINT_DIR/<alias>.json)")
+    p.add_argument("--no-resume", action="store_true", help="ignore an existing checkpoint and start over")
+    p.add_argument("--no-swap", action="store_true", help="build the collection but leave the alias alone")
+    p.add_argument("--replace-collection", action="store_true",
+                   help="delete a real collection named like the alias before creating the alias "
+                        "(stop the app first)")
+    p.add_argument("--drop-previous", action="store_true", help="delete the collection the alias pointed to before")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    engine = create_engine(args.url or settings.database_url, pool_pre_ping=True)
+    session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    job = ReindexService(
+        session_factory,
+        embedder=get_embedder(args.model, args.device),
+        alias=args.alias,
+        target=args.target,
+        checkpoint_path=args.checkpoint,
+        batch_rows=args.batch_rows,
+        memory_budget_mb=args.memory_budget_mb,
+    )
+    print(f"reindexing into alias {job.alias!r}, {job.batch_rows} rows per batch (checkpoint: {job.checkpoint_path})")
+
+    report = job.run(
+        resume=not args.no_resume,
+        swap=not args.no_swap,
+        replace_collection=args.replace_collection,
+    )
+    print(json.dumps(asdict(report), indent=2))
+    if report.errors:
+        return 1
+
+    if args.drop_previous and report.swapped and report.previous and report.previous != report.target:
+        from app.integrations.vector.qdrant_db import QdrantVectorDB
+
+        QdrantVectorDB(embedder=job.embedder, collection=report.previous).client.delete_collection(
+            collection_name=report.previous
+        )
+        print(f"dropped previous collection {report.previous!r}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
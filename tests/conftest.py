@@ -1,16 +1,22 @@
 from __future__ import annotations
 
 import os
-from typing import Generator
+from typing import Any, Callable, Generator
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.db.base import Base
 from app.db.session import get_db
+from app.integrations.llm.base import LLMClient
 from app.main import create_app
+from app.services.kg_service import KGService
+from app.services.memory_service import MemoryService
+from app.services.vectordb_service import VectorDBService
+from tests.fakes import FakeEmbedder, FakeGraph, FakeLLM, FakeVectorDB
 
 
 def _mysql_test_url() -> str:
@@ -61,3 +67,60 @@ def app_client(db_session: Session) -> Generator[TestClient, None, None]:
         yield c
 
     app.dependency_overrides.clear()
+
+
+@pytest.fixture()
+def sqlite_engine() -> Engine:
+    # one shared connection, so every session (and thread) sees the same in-memory database
+    engine = create_engine(
+        'sqlite+pysqlite:///:memory:',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture()
+def sqlite_session_factory(sqlite_engine: Engine) -> sessionmaker:
+    return sessionmaker(bind=sqlite_engine, autoflush=False, autocommit=False)
+
+
+@pytest.fixture()
+def sqlite_db(sqlite_session_factory: sessionmaker) -> Generator[Session, None, None]:
+    db = sqlite_session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture()
+def make_memory_svc() -> Callable[..., MemoryService]:
+    """
+    I build MemoryServices on the in-memory fakes; pass llm / vdb / graph / embedder / kg to swap one
+    out and anything else straight to MemoryService.
+    """
+
+    def make(
+        llm: LLMClient | None = None,
+        *,
+        vdb: FakeVectorDB | None = None,
+        graph: FakeGraph | None = None,
+        embedder: FakeEmbedder | None = None,
+        kg: KGService | None = None,
+        **kwargs: Any,
+    ) -> MemoryService:
+        return MemoryService(
+            llm=llm or FakeLLM({}),
+            vector_db_svc=VectorDBService(embedder=embedder or FakeEmbedder(), vdb=vdb or FakeVectorDB()),
+            kg=kg or KGService(graph=graph or FakeGraph()),
+            **kwargs,
+        )
+
+    return make
+
+
+@pytest.fixture()
+def memory_svc(make_memory_svc: Callable[..., MemoryService]) -> MemoryService:
+    return make_memory_svc()
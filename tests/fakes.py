@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any
+
+import numpy as np
+
+from app.integrations.kg.base import GraphDB
+from app.integrations.llm.base import LLMClient
+from app.integrations.vector.base import Embedder
+
+
+class FakeEmbedder(Embedder):
+    """Deterministic unit vectors: same text -> same vector, different text -> ~orthogonal."""
+
+    model_name = 'fake-embedder'
+    dim = 32
+
+    def __init__(self) -> None:
+        self.encoded: list[str] = []
+
+    def embed(self, text: str) -> list[float]:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        self.encoded.extend(texts)
+        out = []
+        for t in texts:
+            seed = int.from_bytes(hashlib.sha256(t.encode('utf-8')).digest()[:4], 'little')
+            v = np.random.default_rng(seed).normal(size=self.dim)
+            out.append((v / np.linalg.norm(v)).tolist())
+        return out
+
+
+class FakeVectorDB:
+    """In-memory stand-in for QdrantVectorDB (cosine on normalized vectors)."""
+
+    def __init__(self) -> None:
+        self.points: dict[int, tuple[list[float], dict]] = {}
+        self.upsert_calls = 0
+        self.search_calls = 0
+        self.search_batch_calls = 0
+
+    def ensure_ready(self) -> None:
+        return None
+
+    def upsert(self, point_id: int, vector: list[float], payload: dict) -> None:
+        self.upsert_many([(point_id, vector, payload)])
+
+    def upsert_many(self, points: list[tuple[int, list[float], dict]], *, wait: bool | None = None) -> None:
+        self.upsert_calls += 1
+        for pid, vec, payload in points:
+            self.points[int(pid)] = (vec, payload)
+
+    def missing_points(self, point_ids: list[int]) -> list[int]:
+        return [int(pid) for pid in point_ids if int(pid) not in self.points]
+
+    def retrieve_many(self, point_ids: list[int], *, with_payload: bool = True) -> dict[int, dict[str, Any]]:
+        return {
+            int(pid): {'id': str(pid), 'payload': dict(self.points[int(pid)][1]) if with_payload else {}}
+            for pid in point_ids
+            if int(pid) in self.points
+        }
+
+    def set_payload_many(self, updates: list[tuple[int, dict[str, Any]]], *, wait: bool | None = None) -> None:
+        for pid, payload in updates:
+            vec, old = self.points[int(pid)]
+            self.points[int(pid)] = (vec, {**old, **payload})
+
+    def search(
+        self,
+        query: str | None = None,
+        *,
+        vector: list[float] | None = None,
+        limit: int = 3,
+        min_score: float | None = None,
+        filters: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        self.search_calls += 1
+        q = np.asarray(vector)
+        wanted = {k: v for k, v in (filters or {}).items() if v is not None}
+        scored = sorted(
+            (
+                (float(np.dot(q, np.asarray(v))), pid, p)
+                for pid, (v, p) in self.points.items()
+                if all(p.get(k) == val for k, val in wanted.items())
+            ),
+            reverse=True,
+        )
+        hits = []
+        for score, pid, payload in scored[:limit]:
+            if min_score is not None and score < min_score:
+                continue
+            hits.append({'id': str(pid), 'score': score, 'payload': payload})
+        return hits
+
+
+    def search_many(
+        self,
+        vectors: list[list[float]],
+        *,
+        limit: int = 1,
+        min_score: float | None = None,
+        filters: list[dict[str, Any] | None] | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        self.search_batch_calls += 1
+        before = self.search_calls
+        filters = filters or [None] * len(vectors)
+        out = [self.search(vector=v, limit=limit, min_score=min_score, filters=f) for v, f in zip(vectors, filters)]
+        self.search_calls = before
+        return out
+
+
+class FakeGraph(GraphDB):
+    def __init__(self) -> None:
+        self.nodes: dict[str, tuple[str, dict]] = {}
+        self.edges: set[tuple[str, str, str]] = set()
+        self.requests = 0
+
+    def upsert_node(self, node_id: str, label: str, props: dict[str, Any]) -> None:
+        self.requests += 1
+        self.nodes[node_id] = (label, props)
+
+    def upsert_edge(self, src_id: str, edge_type: str, dst_id: str, props: dict[str, Any] | None = None) -> None:
+        self.requests += 1
+        self.edges.add((src_id, edge_type, dst_id))
+
+    def upsert_many(self, nodes, edges) -> None:
+        self.requests += 1
+        for node_id, label, props in nodes:
+            self.nodes[node_id] = (label, props)
+        for e in edges:
+            self.edges.add(tuple(e))
+
+    def get_node(self, node_id: str) -> dict[str, Any] | None:
+        n = self.nodes.get(node_id)
+        return {'id': node_id, 'vertex': str(n)} if n else None
+
+    def neighbors(self, node_id: str, edge_type: str | None = None) -> list[dict[str, Any]]:
+        return [
+            {'edge': et, 'dst': dst}
+            for src, et, dst in self.edges
+            if src == node_id and (edge_type is None or et == edge_type)
+        ]
+
+
+class FakeLLM(LLMClient):
+    """Returns canned qualifications keyed by a substring of the user prompt."""
+
+    def __init__(self, rules: dict[str, Any]) -> None:
+        self.rules = rules
+        self.calls = 0
+
+    def generate_json(self, system_prompt: str, user_prompt: str, timeout_s: int = 30) -> Any:
+        self.calls += 1
+        for needle, result in self.rules.items():
+            if needle in user_prompt:
+                if isinstance(result, Exception):
+                    raise result
+                return result
+        return {'memories': []}
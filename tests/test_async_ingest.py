@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.ingest_job import IngestJob
+from app.models.memory import Memory
+from app.schemas.event import EventCreate
+from app.services.event_service import EventService
+from app.services.ingest_queue import IngestQueue
+from app.services.ingest_worker import IngestWorkerPool
+from tests.fakes import FakeLLM
+
+
+def _enqueue(db: Session, text: str) -> int:
+    evt = EventService().create_event(db, EventCreate(actor_id='u1', text=text), commit=False)
+    IngestQueue().enqueue(db, evt.id)
+    db.commit()
+    return evt.id
+
+
+def test_worker_processes_queued_event(sqlite_session_factory, make_memory_svc, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'use_llm_qualifier', True)
+    llm = FakeLLM(
+        {
+            'remember': {
+                'memories': [
+                    {'type': 'fact', 'scope': 'profile', 'key': 'fact.personal.identity',
+                     'value': {'name': 'R'}, 'confidence': 0.95},
+                ]
+            }
+        }
+    )
+    svc = make_memory_svc(llm)
+    pool = IngestWorkerPool(lambda: svc, sqlite_session_factory, workers=1)
+
+    db = sqlite_session_factory()
+    event_id = _enqueue(db, 'please remember my name is R')
+
+    jobs = pool.queue.claim(db, 10)
+    assert [j.event_id for j in jobs] == [event_id]
+    # a second claim must not hand out the same job
+    assert pool.queue.claim(db, 10) == []
+
+    pool.process_jobs(db, jobs)
+
+    job = pool.queue.get_for_event(db, event_id)
+    assert job.status == 'done'
+    assert job.attempts == 1
+    assert db.query(Memory).filter(Memory.event_id == event_id).count() == 1
+    db.close()
+
+
+def test_failed_job_is_retried_then_parked(sqlite_session_factory, make_memory_svc, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'use_llm_qualifier', True)
+    monkeypatch.setattr(settings, 'ingest_max_attempts', 2)
+    monkeypatch.setattr(settings, 'ingest_retry_backoff_s', 0.0)
+
+    svc = make_memory_svc(FakeLLM({'flaky': RuntimeError('ollama timeout')}))
+    pool = IngestWorkerPool(lambda: svc, sqlite_session_factory, workers=1)
+
+    db = sqlite_session_factory()
+    event_id = _enqueue(db, 'flaky message')
+
+    pool.process_jobs(db, pool.queue.claim(db, 10))
+    assert pool.queue.get_for_event(db, event_id).status == 'pending'
+
+    pool.process_jobs(db, pool.queue.claim(db, 10))
+    job = db.query(IngestJob).filter(IngestJob.event_id == event_id).one()
+    db.refresh(job)
+    assert job.status == 'failed'
+    assert 'ollama timeout' in (job.last_error or '')
+    db.close()
+
+
+def test_slow_worker_leaves_a_reclaimed_job_alone(sqlite_session_factory) -> None:
+    queue = IngestQueue()
+    db = sqlite_session_factory()
+    event_id = _enqueue(db, 'anything')
+
+    [job] = queue.claim(db, 10)
+    job_id, token = job.id, job.claim_token
+    # the lock went stale and another worker took the job over
+    db.execute(update(IngestJob).values(status='processing', claim_token='other'))
+    db.commit()
+
+    queue.complete(db, [job_id], token)
+    queue.fail(db, job, 'late failure', token)
+
+    job = queue.get_for_event(db, event_id)
+    db.refresh(job)
+    assert (job.status, job.claim_token, job.last_error) == ('processing', 'other', None)
+    db.close()
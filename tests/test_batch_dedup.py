@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.memory import Memory
+from app.schemas.event import EventCreate
+from app.schemas.llm import QualifiedMemory
+from app.services.event_service import EventService
+from app.services.vectordb_service import DuplicateOf, VectorDBService
+from tests.fakes import FakeEmbedder, FakeVectorDB
+
+
+def _qm(key: str, value: dict) -> QualifiedMemory:
+    return QualifiedMemory(type='fact', scope='profile', key=key, value=value, confidence=0.9)
+
+
+def test_find_duplicates_checks_store_and_batch_in_one_search() -> None:
+    vdb = FakeVectorDB()
+    svc = VectorDBService(embedder=FakeEmbedder(), vdb=vdb)
+    stored = svc.embed_memory('fact.a', {'v': 1})
+    vdb.upsert(7, stored, {'memory_id': 7})
+
+    vectors = svc.embed_memories(
+        [('fact.a', {'v': 1}), ('fact.b', {'v': 2}), ('fact.c', {'v': 3}), ('fact.b', {'v': 2})]
+    )
+    matches = svc.find_duplicates(vectors)
+
+    assert matches == [DuplicateOf(memory_id=7), None, None, DuplicateOf(batch_index=1)]
+    assert vdb.search_batch_calls == 1 and vdb.search_calls == 0
+
+
+def test_same_memory_twice_in_one_output_is_written_once(sqlite_db: Session, make_memory_svc) -> None:
+    db = sqlite_db
+    vdb = FakeVectorDB()
+    svc = make_memory_svc(vdb=vdb)
+    evt = EventService().create_event(db, EventCreate(actor_id='u1', text='x'))
+    mems = svc.store_qualified(db, evt, [_qm('fact.a', {'v': 1}), _qm('fact.b', {'v': 2}), _qm('fact.a', {'v': 1})])
+
+    assert [m.key for m in mems] == ['fact.a', 'fact.b']
+    assert list(db.execute(select(Memory.key, Memory.assertion_count).order_by(Memory.id))) == [
+        ('fact.a', 1),
+        ('fact.b', 0),
+    ]
+    assert vdb.search_batch_calls == 1
+
+
+def test_dedup_is_scoped_to_actor_type_and_key() -> None:
+    vdb = FakeVectorDB()
+    svc = VectorDBService(embedder=FakeEmbedder(), vdb=vdb)
+    u1 = EventCreate(actor_id='u1', text='x')
+    u2 = EventCreate(actor_id='u2', text='x')
+    stored = svc.embed_memory('fact.a', {'v': 1})
+    vdb.upsert(7, stored, {'memory_id': 7, **VectorDBService.dedup_scope(u1, 'fact', 'fact.a')})
+
+    vectors = svc.embed_memories([('fact.a', {'v': 1})] * 4)
+    scopes = [
+        VectorDBService.dedup_scope(u1, 'fact', 'fact.a'),
+        VectorDBService.dedup_scope(u2, 'fact', 'fact.a'),
+        VectorDBService.dedup_scope(u2, 'preference', 'fact.a'),
+        VectorDBService.dedup_scope(u2, 'fact', 'fact.a'),
+    ]
+    matches = svc.find_duplicates(vectors, scopes=scopes)
+
+    # another user's identical memory is not a repeat, neither is another type
+    assert matches == [DuplicateOf(memory_id=7), None, None, DuplicateOf(batch_index=1)]
+
+
+def test_backfill_gives_legacy_points_their_actor(sqlite_db: Session) -> None:
+    vdb = FakeVectorDB()
+    svc = VectorDBService(embedder=FakeEmbedder(), vdb=vdb)
+    evt = EventService().create_event(sqlite_db, EventCreate(actor_type='user', actor_id='u1', text='x'))
+    mem = Memory(type='fact', scope='profile', key='fact.a', value={'v': 1}, event_id=evt.id)
+    sqlite_db.add(mem)
+    sqlite_db.commit()
+
+    # a point written before actor fields existed: no actor, so no scoped search can find it
+    vector = svc.embed_memory('fact.a', {'v': 1})
+    legacy = {k: v for k, v in svc._memory_payload(mem, evt).items() if k not in ('actor_type', 'actor_id')}
+    vdb.upsert(mem.id, vector, legacy)
+    scope = VectorDBService.dedup_scope(evt, 'fact', 'fact.a')
+    assert svc.find_duplicates([vector], scopes=[scope]) == [None]
+
+    assert svc.backfill_actor_fields(sqlite_db, batch_rows=1) == 1
+    assert svc.find_duplicates([vector], scopes=[scope]) == [DuplicateOf(memory_id=mem.id)]
+    # already backfilled: nothing left to do
+    assert svc.backfill_actor_fields(sqlite_db) == 0
+
+
+def test_payload_falls_back_to_the_memory_source_event(sqlite_db: Session) -> None:
+    evt = EventService().create_event(sqlite_db, EventCreate(actor_type='agent', actor_id='a7', text='x'))
+    mem = Memory(type='fact', scope='profile', key='fact.a', value={}, event_id=evt.id)
+    sqlite_db.add(mem)
+    sqlite_db.commit()
+
+    payload = VectorDBService._memory_payload(mem)
+    assert (payload['actor_type'], payload['actor_id']) == ('agent', 'a7')
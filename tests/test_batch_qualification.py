@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+import pytest
+
+from app.core.config import settings
+from app.integrations.llm.base import LLMClient
+from app.integrations.llm.prompt import MEMORY_QUALIFIER_BATCH_SYSTEM
+from app.services.memory_service import QualifyRequest
+
+
+def _mem(key: str) -> dict:
+    return {'type': 'fact', 'scope': 'profile', 'key': key, 'value': {}, 'confidence': 0.9}
+
+
+class BatchLLM(LLMClient):
+    """
+    Answers batch prompts per `### event <id>` block. Texts containing 'garble' get a malformed
+    entry, 'drop' gets no entry at all; single-event prompts always work.
+    """
+
+    def __init__(self) -> None:
+        self.batch_calls = 0
+        self.single_calls = 0
+
+    def generate_json(self, system_prompt: str, user_prompt: str, timeout_s: int = 30) -> Any:
+        if system_prompt == MEMORY_QUALIFIER_BATCH_SYSTEM:
+            self.batch_calls += 1
+            results = []
+            for eid, body in re.findall(r'### event (\w+)\n(.*?)(?=\n\n### event |\Z)', user_prompt, re.S):
+                if 'garble' in body:
+                    results.append({'id': eid, 'memories': [{'type': 'nonsense'}]})
+                elif 'drop' not in body:
+                    results.append({'id': eid, 'memories': [_mem(f'fact.batch.{eid}')]})
+            return {'results': results}
+
+        self.single_calls += 1
+        return {'memories': [_mem('fact.single.one')]}
+
+
+def _req(text: str, event_id: int) -> QualifyRequest:
+    return QualifyRequest(actor_type='user', actor_id='u1', text=text, payload=None, event_id=event_id)
+
+
+def test_batch_parses_per_event_and_falls_back_per_item(monkeypatch: pytest.MonkeyPatch, make_memory_svc) -> None:
+    monkeypatch.setattr(settings, 'use_llm_qualifier', True)
+    monkeypatch.setattr(settings, 'qualify_batch_size', 4)
+    llm = BatchLLM()
+
+    out = make_memory_svc(llm).qualify_many(
+        [
+            _req('my name is Ann', 1),
+            _req('ok', 2),  # pre-filter: never reaches the LLM
+            _req('please garble this one', 3),
+            _req('we use mysql 8', 4),
+            _req('please drop this one', 5),
+        ]
+    )
+
+    assert llm.batch_calls == 1
+    assert llm.single_calls == 2  # the malformed and the missing entry
+    assert [m.key for m in out[0]] == ['fact.batch.e0']
+    assert out[1] == []
+    assert [m.key for m in out[2]] == ['fact.single.one']
+    assert [m.key for m in out[3]] == ['fact.batch.e2']
+    assert [m.key for m in out[4]] == ['fact.single.one']
+
+
+def test_failed_batch_call_falls_back_to_single_calls(monkeypatch: pytest.MonkeyPatch, make_memory_svc) -> None:
+    monkeypatch.setattr(settings, 'use_llm_qualifier', True)
+    monkeypatch.setattr(settings, 'qualify_batch_size', 8)
+
+    class BrokenBatch(BatchLLM):
+        def generate_json(self, system_prompt: str, user_prompt: str, timeout_s: int = 30) -> Any:
+            if system_prompt == MEMORY_QUALIFIER_BATCH_SYSTEM:
+                self.batch_calls += 1
+                return {'memories': []}  # wrong envelope
+            return super().generate_json(system_prompt, user_prompt, timeout_s)
+
+    llm = BrokenBatch()
+    out = make_memory_svc(llm).qualify_many([_req('my name is Ann', 1), _req('I live in Oslo', 2)])
+
+    assert (llm.batch_calls, llm.single_calls) == (1, 2)
+    assert all(not isinstance(r, Exception) and len(r) == 1 for r in out)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import Callable
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.event import Event
+from app.models.memory import Memory
+from app.schemas.event import EventCreate
+from app.services.ingest_service import BulkIngestService
+from app.services.memory_service import MemoryService
+from tests.fakes import FakeGraph, FakeLLM, FakeVectorDB
+
+
+def _mem(key: str, value: dict) -> dict:
+    return {'type': 'preference', 'scope': 'profile', 'key': key, 'value': value, 'confidence': 0.9}
+
+
+def test_bulk_ingest_reports_per_item_status(
+    sqlite_db: Session,
+    make_memory_svc: Callable[..., MemoryService],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    db = sqlite_db
+    monkeypatch.setattr(settings, 'use_llm_qualifier', True)
+    monkeypatch.setattr(settings, 'bulk_chunk_size', 2)
+    # 'boom' must reach the (failing) LLM, not be dropped as too short
+    monkeypatch.setattr(settings, 'prefilter_enabled', False)
+
+    llm = FakeLLM(
+        {
+            'likes tea': {'memories': [_mem('preference.food.likes', {'items': ['tea']})]},
+            'boom': RuntimeError('ollama down'),
+        }
+    )
+    vdb = FakeVectorDB()
+    graph = FakeGraph()
+    memory_svc = make_memory_svc(llm, vdb=vdb, graph=graph)
+
+    events = [
+        EventCreate(actor_id='u1', text='I likes tea'),
+        EventCreate(actor_id='u1', text=''),
+        EventCreate(actor_id='u1', text='boom'),
+        EventCreate(actor_id='u1', text='nothing to remember'),
+        EventCreate(actor_id='u1', text='me too, likes tea'),
+    ]
+
+    out = BulkIngestService(memory_svc).ingest(db, events)
+
+    assert out.total == 5
+    assert [r.status for r in out.items] == ['processed', 'skipped', 'failed', 'processed', 'processed']
+    assert all(r.event_id for r in out.items)
+    assert out.items[0].memories_created == 1
+    # the same (key, value) of the same actor in a later chunk is a duplicate of the first one
+    assert out.items[4].duplicates == 1
+    assert out.memories_created == 1
+
+    assert db.query(Event).count() == 5
+    mems = db.query(Memory).all()
+    assert len(mems) == 1
+    assert mems[0].assertion_count == 1
+
+    assert list(vdb.points) == [mems[0].id]
+    assert f'memory:{mems[0].id}' in graph.nodes
+    assert ('actor:user:u1', 'HAS_MEMORY', f'memory:{mems[0].id}') in graph.edges
+
+
+class _LossyVectorDB(FakeVectorDB):
+    """Fire-and-forget writes that never get applied; only waited-for writes land."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.waited: list[int] = []
+
+    def upsert_many(self, points, *, wait=None) -> None:
+        if wait:
+            self.waited.extend(int(pid) for pid, _, _ in points)
+            super().upsert_many(points, wait=wait)
+
+
+def test_unacknowledged_upserts_are_checked_and_repaired(
+    sqlite_db: Session,
+    make_memory_svc: Callable[..., MemoryService],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    db = sqlite_db
+    monkeypatch.setattr(settings, 'use_llm_qualifier', True)
+    monkeypatch.setattr(settings, 'prefilter_enabled', False)
+    monkeypatch.setattr(settings, 'bulk_chunk_size', 1)
+    monkeypatch.setattr(settings, 'qdrant_bulk_wait', False)
+
+    vdb = _LossyVectorDB()
+    memory_svc = make_memory_svc(
+        FakeLLM({'tea': {'memories': [_mem('preference.drink', {'v': 'tea'})]},
+                 'coffee': {'memories': [_mem('preference.drink', {'v': 'coffee'})]}}),
+        vdb=vdb,
+    )
+
+    out = BulkIngestService(memory_svc).ingest(db, [EventCreate(actor_id='u1', text=t) for t in ('tea', 'coffee')])
+
+    ids = sorted(m.id for m in db.query(Memory).all())
+    assert out.memories_created == 2 and len(ids) == 2
+    # both chunks were found missing by missing_points() and re-upserted with wait=True
+    assert sorted(vdb.waited) == ids and sorted(vdb.points) == ids
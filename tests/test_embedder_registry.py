@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import threading
+
+from app.integrations.vector.base import Embedder
+from app.integrations.vector.registry import EmbedderRegistry
+
+
+class _FakeEmbedder(Embedder):
+    def __init__(self, model_name: str, device: str | None) -> None:
+        self.model_name = model_name
+        self.device = device
+        self.dim = 4
+
+    def embed(self, text: str) -> list[float]:
+        return [0.0] * self.dim
+
+
+def test_registry_loads_each_model_once() -> None:
+    loads: list[tuple[str, str | None]] = []
+
+    def factory(model_name: str, device: str | None) -> Embedder:
+        loads.append((model_name, device))
+        return _FakeEmbedder(model_name, device)
+
+    registry = EmbedderRegistry(factory=factory)
+
+    # I hammer it from several threads to make sure the lazy init doesn't race.
+    results: list[Embedder] = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('m1'))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(loads) == 1
+    assert all(r is results[0] for r in results)
+
+    registry.get('m1', 'cpu')
+    assert len(loads) == 2
+
+    metrics = registry.metrics()
+    assert metrics['loaded_models'] == 2
+    assert all(m['load_time_s'] >= 0 for m in metrics['models'])
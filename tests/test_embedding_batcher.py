@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.integrations.vector.base import Embedder
+from app.integrations.vector.batcher import MicroBatchingEmbedder
+
+
+class _CountingEmbedder(Embedder):
+    def __init__(self) -> None:
+        self.model_name = 'fake'
+        self.dim = 2
+        self.calls: list[int] = []
+
+    def embed(self, text: str) -> list[float]:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(len(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def test_concurrent_embeds_are_coalesced_and_routed_back() -> None:
+    inner = _CountingEmbedder()
+    batcher = MicroBatchingEmbedder(inner, max_batch_size=64, max_wait_ms=200)
+
+    texts = ['x' * i for i in range(20)]
+    results: dict[int, list[float]] = {}
+    barrier = threading.Barrier(len(texts))
+
+    def worker(i: int) -> None:
+        barrier.wait()
+        results[i] = batcher.embed(texts[i])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    # every caller gets its own vector back...
+    assert all(results[i] == [float(i), 1.0] for i in range(len(texts)))
+    # ...but the model saw far fewer forward passes than callers.
+    assert sum(inner.calls) == len(texts)
+    assert len(inner.calls) < len(texts)
+
+
+def test_max_batch_size_bounds_a_dispatch() -> None:
+    inner = _CountingEmbedder()
+    batcher = MicroBatchingEmbedder(inner, max_batch_size=4, max_wait_ms=50)
+
+    texts = ['x' * i for i in range(1, 11)]
+    results: dict[int, list[list[float]]] = {}
+
+    def worker(i: int) -> None:
+        # 3 + 3 + 3 + 1 texts: coalescing them would overshoot the batch size
+        results[i] = batcher.embed_many(texts[3 * i : 3 * i + 3])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    out = batcher.embed_many(texts)
+    batcher.close()
+
+    assert [v for i in range(4) for v in results[i]] == [[float(len(t)), 1.0] for t in texts]
+    assert out == [[float(len(t)), 1.0] for t in texts]
+    assert sum(inner.calls) == 20
+    assert all(n <= 4 for n in inner.calls)
+
+
+def test_embed_after_close_fails_instead_of_hanging() -> None:
+    batcher = MicroBatchingEmbedder(_CountingEmbedder(), max_batch_size=4, max_wait_ms=0)
+    assert batcher.embed('a') == [1.0, 1.0]
+    batcher.close()
+
+    with pytest.raises(RuntimeError, match='closed'):
+        batcher.embed('b')
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from app.integrations.vector.base import Embedder
+from app.integrations.vector.cache import CachedEmbedder, DiskEmbeddingStore
+
+
+class _CountingEmbedder(Embedder):
+    def __init__(self) -> None:
+        self.model_name = 'fake-model'
+        self.dim = 3
+        self.encoded: list[str] = []
+
+    def embed(self, text: str) -> list[float]:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        self.encoded.extend(texts)
+        return [[float(len(t)), 0.5, -1.0] for t in texts]
+
+
+def test_lru_hits_misses_and_eviction() -> None:
+    inner = _CountingEmbedder()
+    cache = CachedEmbedder(inner, max_entries=2)
+
+    a = cache.embed('preference.food.likes\n{}')
+    # whitespace around the text normalizes to the same cache entry
+    assert cache.embed('  preference.food.likes\n{}  ') == a
+    assert inner.encoded == ['preference.food.likes\n{}']
+
+    cache.embed_many(['b', 'c', 'c'])
+    assert inner.encoded[1:] == ['b', 'c']
+
+    m = cache.metrics()
+    assert m['hits'] == 1
+    assert m['size'] == 2
+    assert m['evictions'] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path) -> None:
+    directory = str(tmp_path / 'emb')
+
+    inner = _CountingEmbedder()
+    store = DiskEmbeddingStore(directory, model_name='fake-model', dim=3, capacity=4)
+    cache = CachedEmbedder(inner, max_entries=10, disk=store)
+    first = cache.embed('fact.personal.identity\n{"name": "x"}')
+    cache.close()
+
+    inner2 = _CountingEmbedder()
+    store2 = DiskEmbeddingStore(directory, model_name='fake-model', dim=3, capacity=4)
+    cache2 = CachedEmbedder(inner2, max_entries=10, disk=store2)
+    assert cache2.embed('fact.personal.identity\n{"name": "x"}') == first
+    assert inner2.encoded == []
+    assert cache2.metrics()['disk_hits'] == 1
+
+    # ring eviction: capacity is 4, so the oldest entry gets overwritten
+    for i in range(4):
+        cache2.embed(f'k{i}')
+    assert len(store2) == 4
+    cache2.close()
+
+    # a different model must not reuse the arena
+    store3 = DiskEmbeddingStore(directory, model_name='other-model', dim=3, capacity=4)
+    assert len(store3) == 0
+    store3.close()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Callable, Generator
+
+import pytest
+from sqlalchemy import Engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.event import Event
+from app.models.memory import Memory
+from app.schemas.event import EventCreate
+from app.services.event_service import EventService
+from app.services.memory_service import MemoryService
+from tests.fakes import FakeLLM, FakeVectorDB
+
+
+def _mem(key: str) -> dict:
+    return {'type': 'fact', 'scope': 'profile', 'key': key, 'value': {'v': key}, 'confidence': 0.9}
+
+
+@pytest.fixture()
+def env(
+    monkeypatch: pytest.MonkeyPatch,
+    sqlite_engine: Engine,
+    sqlite_session_factory: sessionmaker,
+    make_memory_svc: Callable[..., MemoryService],
+) -> Generator[tuple, None, None]:
+    monkeypatch.setattr(settings, 'use_llm_qualifier', True)
+    monkeypatch.setattr(settings, 'prefilter_enabled', False)
+
+    engine = sqlite_engine
+    statements: list[str] = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cur, stmt, *a: statements.append(stmt))
+    commits: list[int] = []
+    event.listen(engine, 'commit', lambda conn: commits.append(1))
+
+    vdb = FakeVectorDB()
+    svc = make_memory_svc(FakeLLM({'three': {'memories': [_mem('fact.a'), _mem('fact.b'), _mem('fact.c')]}}), vdb=vdb)
+    yield svc, sqlite_session_factory, statements, commits, vdb
+
+
+def test_event_and_memories_commit_once(env) -> None:
+    svc, session_factory, statements, commits, vdb = env
+    db = session_factory()
+
+    evt, mems = svc.ingest_event(db, EventCreate(actor_id='u1', text='three facts'), event_svc=EventService())
+    assert len(mems) == 3 and len(vdb.points) == 3
+    # created_at is the server's NOW(), the same value the column default would have stored
+    stored = dict(db.execute(select(Memory.id, Memory.created_at)).all())
+    assert [m.created_at for m in mems] == [stored[m.id] for m in mems]
+    assert all(isinstance(m.created_at, datetime) for m in mems)
+
+    # the same three facts again: all duplicates, bumped with atomic UPDATEs in the same single commit
+    statements.clear()
+    commits.clear()
+    _, again = svc.ingest_event(db, EventCreate(actor_id='u1', text='three facts'), event_svc=EventService())
+
+    assert again == []
+    assert len(commits) == 1
+    assert not any(s.lstrip().upper().startswith('SELECT') for s in statements)
+    assert sum('assertion_count + ' in s for s in statements) == 3
+    assert sorted(db.scalars(select(Memory.assertion_count))) == [1, 1, 1]
+    db.close()
+
+
+def test_failed_write_rolls_back_event_and_memories(env) -> None:
+    svc, session_factory, _, _, vdb = env
+    db = session_factory()
+
+    def boom(evt, memories) -> None:
+        raise RuntimeError('reply insert failed')
+
+    with pytest.raises(RuntimeError):
+        svc.ingest_event(db, EventCreate(actor_id='u1', text='three facts'), event_svc=EventService(), before_commit=boom)
+
+    assert db.scalar(select(func.count()).select_from(Event)) == 0
+    assert db.scalar(select(func.count()).select_from(Memory)) == 0
+    # nothing was indexed for rows that never committed
+    assert vdb.points == {}
+    db.close()
+
+
+def test_qualification_errors_surface_under_run_llm_tests(env, monkeypatch: pytest.MonkeyPatch) -> None:
+    svc, session_factory, _, _, _ = env
+    svc.llm = FakeLLM({'flaky': RuntimeError('ollama down')})
+    db = session_factory()
+
+    _, mems = svc.ingest_event(db, EventCreate(actor_id='u1', text='flaky'), event_svc=EventService())
+    assert mems == []
+
+    monkeypatch.setenv('RUN_LLM_TESTS', 'true')
+    with pytest.raises(RuntimeError, match='ollama down'):
+        svc.ingest_event(db, EventCreate(actor_id='u1', text='flaky'), event_svc=EventService())
+    db.close()
+
+
+def test_dedup_errors_surface_under_run_llm_tests(env, monkeypatch: pytest.MonkeyPatch) -> None:
+    svc, session_factory, _, _, vdb = env
+
+    def down(*args, **kwargs):
+        raise RuntimeError('qdrant down')
+
+    monkeypatch.setattr(vdb, 'search_many', down)
+    db = session_factory()
+
+    evt, mems = svc.ingest_event(db, EventCreate(actor_id='u1', text='three facts'), event_svc=EventService())
+    assert evt.id and mems == []
+
+    monkeypatch.setenv('RUN_LLM_TESTS', 'true')
+    with pytest.raises(RuntimeError, match='qdrant down'):
+        svc.ingest_event(db, EventCreate(actor_id='u1', text='three facts'), event_svc=EventService())
+    db.close()
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.memory import Memory
+from app.schemas.event import EventCreate
+from app.schemas.llm import QualifiedMemory
+from app.services.event_service import EventService
+from app.services.exact_dedup import ExactDedup, content_hash
+from tests.fakes import FakeEmbedder, FakeVectorDB
+
+
+class _CountingEmbedder(FakeEmbedder):
+    def __init__(self) -> None:
+        super().__init__()
+        self.texts = 0
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        self.texts += len(texts)
+        return super().embed_many(texts)
+
+
+def _qm(key: str, value: dict) -> QualifiedMemory:
+    return QualifiedMemory(type='fact', scope='profile', key=key, value=value, confidence=0.9)
+
+
+def test_content_hash_is_canonical_and_scoped() -> None:
+    u1 = EventCreate(actor_id='u1', text='x')
+    u2 = EventCreate(actor_id='u2', text='x')
+
+    assert content_hash(u1, 'fact', 'k', {'a': 1, 'b': 2}) == content_hash(u1, 'fact', 'k', {'b': 2, 'a': 1})
+    assert content_hash(u1, 'fact', 'k', {'a': 1}) != content_hash(u2, 'fact', 'k', {'a': 1})
+    assert content_hash(u1, 'fact', 'k', {'a': 1}) != content_hash(u1, 'preference', 'k', {'a': 1})
+
+
+def test_exact_repeats_skip_embedding_and_search(sqlite_db: Session, make_memory_svc) -> None:
+    db = sqlite_db
+    embedder = _CountingEmbedder()
+    vdb = FakeVectorDB()
+    svc = make_memory_svc(embedder=embedder, vdb=vdb, exact_dedup=ExactDedup())
+    evt = EventService().create_event(db, EventCreate(actor_id='u1', text='x'))
+
+    first = svc.store_qualified(db, evt, [_qm('fact.a', {'v': 1}), _qm('fact.b', {'v': 2})])
+    assert embedder.texts == 2 and vdb.search_batch_calls == 1
+
+    # byte-identical repeat: answered by the LRU; only the new memory pays for embedding + search
+    again = svc.store_qualified(db, evt, [_qm('fact.a', {'v': 1}), _qm('fact.c', {'v': 3})])
+    assert [m.key for m in again] == ['fact.c']
+    assert embedder.texts == 3 and vdb.search_batch_calls == 2
+    assert db.scalar(select(Memory.assertion_count).where(Memory.id == first[0].id)) == 1
+
+    # a fresh process (empty LRU) finds it through memories.content_hash instead
+    fresh = make_memory_svc(embedder=embedder, vdb=vdb, exact_dedup=ExactDedup())
+    assert fresh.store_qualified(db, evt, [_qm('fact.b', {'v': 2})]) == []
+    assert embedder.texts == 3
+    assert fresh.exact_dedup.metrics() == {
+        'entries': 1,
+        'lookups': 1,
+        'lru_hits': 0,
+        'db_hits': 1,
+        'misses': 0,
+        'hit_rate': 1.0,
+    }
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import executors
+from app.core.config import settings
+
+
+def test_pool_bounds_blocking_calls_and_keeps_loop_free(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'api_graph_concurrency', 2)
+    lock = threading.Lock()
+    running = peak = 0
+
+    def blocking_call(i: int) -> int:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return i
+
+    async def run() -> tuple[list[int], int, dict]:
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        t = asyncio.create_task(ticker())
+        calls = asyncio.gather(*(executors.run_blocking('graph', blocking_call, i) for i in range(6)))
+        await asyncio.sleep(0.01)
+        snapshot = executors.metrics()['graph']
+        out = await calls
+        t.cancel()
+        return out, ticks, snapshot
+
+    out, ticks, snapshot = asyncio.run(run())
+
+    assert out == list(range(6))
+    assert peak == 2
+    assert snapshot == {'size': 2, 'busy': 2, 'waiting': 4}
+    # the loop kept running while 6 x 50ms of blocking work went through 2 threads
+    assert ticks >= 10
+
+
+def test_unknown_pool_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        executors.pool_size('nope')
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.deps import get_memory_service
+from app.db.session import get_db
+from app.main import create_app
+from app.models.event import Event
+from app.models.memory import Memory
+from app.services.memory_service import MemoryService
+
+
+@pytest.fixture()
+def client(sqlite_session_factory: sessionmaker, memory_svc: MemoryService) -> Generator[TestClient, None, None]:
+    with sqlite_session_factory() as db:
+        evt = Event(actor_type='user', actor_id='u1', text='seed')
+        db.add(evt)
+        db.flush()
+        for i in range(7):
+            db.add(Memory(type='fact' if i % 2 else 'episode', scope='profile', key=f'k{i}',
+                          value={'i': i}, event_id=evt.id))
+        db.commit()
+
+    def override_get_db() -> Generator[Session, None, None]:
+        db = sqlite_session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = create_app()
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_memory_service] = lambda: memory_svc
+
+    # no `with`: skip the lifespan, which would talk to the real MySQL engine.
+    yield TestClient(app)
+
+    app.dependency_overrides.clear()
+
+
+def test_keyset_pages_cover_all_rows_once(client: TestClient) -> None:
+    seen: list[int] = []
+    cursor = None
+    while True:
+        params = {'limit': 3}
+        if cursor:
+            params['cursor'] = cursor
+        r = client.get('/v1/memories', params=params)
+        assert r.status_code == 200, r.text
+        seen.extend(m['id'] for m in r.json())
+        cursor = r.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 7
+
+
+def test_include_value_false_omits_value(client: TestClient) -> None:
+    r = client.get('/v1/memories', params={'include_value': 'false', 'type': 'fact'})
+    assert r.status_code == 200, r.text
+    items = r.json()
+    assert len(items) == 3
+    assert all('value' not in m for m in items)
+
+
+def test_ndjson_export_streams_everything(client: TestClient) -> None:
+    r = client.get('/v1/memories', params={'format': 'ndjson', 'limit': 2})
+    assert r.status_code == 200, r.text
+    assert r.headers['content-type'].startswith('application/x-ndjson')
+
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row['value']['i'] for row in rows] == list(range(6, -1, -1))
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from sqlalchemy import select, update
+
+from app.models.memory_outbox import OutboxEntry
+from app.schemas.event import EventCreate
+from app.schemas.llm import QualifiedMemory
+from app.services.event_service import EventService
+from app.services.kg_service import KGService
+from app.services.kg_writer import KGBatchWriter
+from app.services.memory_outbox import MemoryOutbox, OutboxDrainer
+from tests.fakes import FakeGraph, FakeVectorDB
+
+
+class _FlakyVectorDB(FakeVectorDB):
+    def __init__(self) -> None:
+        super().__init__()
+        self.poisoned: set[int] = set()
+
+    def upsert_many(self, points, **kwargs) -> None:
+        if any(int(pid) in self.poisoned for pid, _, _ in points):
+            raise RuntimeError('qdrant rejected the batch')
+        super().upsert_many(points)
+
+
+class _DownGraph(FakeGraph):
+    def upsert_many(self, nodes, edges) -> None:
+        raise RuntimeError('nebula down')
+
+
+def _qm(key: str) -> QualifiedMemory:
+    return QualifiedMemory(type='fact', scope='profile', key=key, value={'k': key}, confidence=0.9)
+
+
+def test_outbox_defers_indexing_to_the_drainer(sqlite_session_factory, make_memory_svc) -> None:
+    vdb, graph = _FlakyVectorDB(), FakeGraph()
+    svc = make_memory_svc(vdb=vdb, graph=graph, outbox=MemoryOutbox())
+    drainer = OutboxDrainer(lambda: svc.vector_db_svc, lambda: svc.kg, sqlite_session_factory)
+
+    db = sqlite_session_factory()
+    evt = EventService().create_event(db, EventCreate(actor_id='u1', text='x'))
+    mems = svc.store_qualified(db, evt, [_qm('fact.a'), _qm('fact.b'), _qm('fact.c')])
+
+    # the request path wrote MySQL only, with one outbox row per memory
+    assert vdb.points == {} and graph.requests == 0
+    assert db.scalars(select(OutboxEntry.memory_id)).all() == [m.id for m in mems]
+    assert svc.outbox.lag(db)['entries_by_status'] == {'pending': 3}
+
+    vdb.poisoned = {mems[1].id}
+    assert drainer.drain_once(db) == 3
+
+    # the batch failed, the per-entry retry got the other two through
+    assert sorted(vdb.points) == [mems[0].id, mems[2].id]
+    assert vdb.points[mems[0].id][1]['actor_id'] == 'u1'
+    assert graph.requests > 0
+    rows = {e.memory_id: e for e in db.scalars(select(OutboxEntry))}
+    assert rows[mems[0].id].status == 'done' and rows[mems[0].id].processed_at is not None
+    assert (rows[mems[1].id].status, rows[mems[1].id].attempts) == ('pending', 1)
+
+    # backoff: the failed entry is not claimable right away
+    assert drainer.drain_once(db) == 0
+    lag = svc.outbox.lag(db)
+    assert lag['entries_by_status'] == {'done': 2, 'pending': 1}
+    assert lag['oldest_pending_age_s'] >= 0
+    db.close()
+
+
+def test_drainer_does_not_complete_rows_the_kg_batch_writer_would_drop(
+    sqlite_session_factory, make_memory_svc
+) -> None:
+    graph = _DownGraph()
+    writer = KGBatchWriter(graph, window_ms=0)
+    svc = make_memory_svc(kg=KGService(graph=graph, writer=writer), outbox=MemoryOutbox())
+    drainer = OutboxDrainer(lambda: svc.vector_db_svc, lambda: svc.kg, sqlite_session_factory)
+
+    db = sqlite_session_factory()
+    evt = EventService().create_event(db, EventCreate(actor_id='u1', text='x'))
+    svc.store_qualified(db, evt, [_qm('fact.a')])
+
+    assert drainer.drain_once(db) == 1
+    # the graph write failed synchronously, so the row stays pending for a retry
+    assert [e.status for e in db.scalars(select(OutboxEntry))] == ['pending']
+    assert writer.metrics()['dropped'] == 0
+    writer.close()
+    db.close()
+
+
+def test_a_reclaimed_entry_is_left_to_its_new_owner(sqlite_session_factory, make_memory_svc) -> None:
+    outbox = MemoryOutbox()
+    svc = make_memory_svc(outbox=outbox)
+    db = sqlite_session_factory()
+    evt = EventService().create_event(db, EventCreate(actor_id='u1', text='x'))
+    svc.store_qualified(db, evt, [_qm('fact.a')])
+
+    [slow] = outbox.claim(db, 10)
+    slow_id, slow_token = slow.id, slow.claim_token
+    # the lock went stale and another drainer took the entry over
+    db.execute(update(OutboxEntry).values(status='processing', claim_token='other'))
+    db.commit()
+
+    outbox.complete(db, [slow_id], slow_token)
+    outbox.fail(db, slow, 'late failure', slow_token)
+
+    entry = db.scalars(select(OutboxEntry)).one()
+    assert (entry.status, entry.claim_token, entry.last_error) == ('processing', 'other', None)
+    db.close()
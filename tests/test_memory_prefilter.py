@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.services.memory_prefilter import CentroidClassifier, MemoryPreFilter, load_labeled_events
+from tests.fakes import FakeEmbedder, FakeLLM
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'prefilter_labeled.jsonl')
+
+
+def test_heuristics_have_no_false_negatives_on_fixture() -> None:
+    report = MemoryPreFilter(enabled=True, skip_actor_types=['system']).evaluate(load_labeled_events(FIXTURE))
+
+    assert report['false_negative_rate'] == 0.0, report['missed']
+    # acks, short noise and our own system replies should all be skipped
+    assert report['skipped'] >= 17
+    assert report['avoided_rate'] > 0.4
+
+
+def test_skipped_events_never_reach_the_llm(monkeypatch: pytest.MonkeyPatch, make_memory_svc) -> None:
+    monkeypatch.setattr(settings, 'use_llm_qualifier', True)
+    monkeypatch.setattr(settings, 'prefilter_enabled', True)
+    llm = FakeLLM({})
+    svc = make_memory_svc(llm)
+
+    for text in ('ok', 'thanks!', 'remember ok', 'I prefer concise answers'):
+        svc.qualify(actor_type='user', actor_id='u1', text=text, payload=None)
+    svc.qualify(actor_type='system', actor_id='memvec', text='Got it.', payload=None)
+
+    assert llm.calls == 2
+    m = svc.prefilter.metrics()
+    assert m['llm_calls_avoided'] == 3
+    assert m['skipped_by_reason'] == {'ack': 2, 'actor': 1}
+
+
+def test_classifier_skips_only_when_closer_to_non_memories() -> None:
+    class AxisEmbedder(FakeEmbedder):
+        # 'tool' texts point one way, everything else the other
+        def embed_many(self, texts: list[str]) -> list[list[float]]:
+            return [[1.0, 0.0] if 'tool' in t else [0.0, 1.0] for t in texts]
+
+    examples = [('tool run finished', False), ('tool log line', False), ('I like tea', True)]
+    clf = CentroidClassifier(AxisEmbedder(), examples, threshold=0.0)
+    f = MemoryPreFilter(enabled=True, classifier=clf)
+
+    assert f.decide(actor_type='user', text='tool step 3 complete', payload=None).reason == 'classifier'
+    assert f.decide(actor_type='user', text='I like coffee a lot', payload=None).reason == 'pass'
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Callable, Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.deps import get_memory_service
+from app.core.config import settings
+from app.db.session import get_db
+from app.main import create_app
+from app.services.memory_service import MemoryService
+from tests.fakes import FakeLLM, FakeVectorDB
+
+
+@pytest.fixture()
+def client(
+    monkeypatch: pytest.MonkeyPatch,
+    sqlite_session_factory: sessionmaker,
+    make_memory_svc: Callable[..., MemoryService],
+) -> Generator[tuple[TestClient, FakeVectorDB], None, None]:
+    # everything external is faked; this checks the read path wiring end to end.
+    monkeypatch.setattr(settings, 'use_llm_qualifier', True)
+
+    def override_get_db() -> Generator[Session, None, None]:
+        db = sqlite_session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def pref(actor: str) -> dict:
+        return {
+            'memories': [
+                {'type': 'preference', 'scope': 'profile', 'key': 'preference.food.likes',
+                 'value': {'items': ['tea'], 'who': actor}, 'confidence': 0.9},
+            ]
+        }
+
+    vdb = FakeVectorDB()
+    svc = make_memory_svc(FakeLLM({'actor_id: u1': pref('u1'), 'actor_id: u2': pref('u2')}), vdb=vdb)
+
+    app = create_app()
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_memory_service] = lambda: svc
+
+    # no `with`: skip the lifespan, which would talk to the real MySQL engine.
+    yield TestClient(app), vdb
+
+    app.dependency_overrides.clear()
+
+
+def test_search_filters_by_actor_and_hydrates_rows(client) -> None:
+    c, vdb = client
+    for actor in ('u1', 'u2'):
+        r = c.post('/v1/events', json={'actor_type': 'user', 'actor_id': actor, 'text': 'I like tea'})
+        assert r.status_code == 200, r.text
+
+    query = 'preference.food.likes\n{"items": ["tea"], "who": "u2"}'
+    r = c.post('/v1/memories/search', json={'query': query, 'actor_id': 'u2', 'k': 5})
+    assert r.status_code == 200, r.text
+    hits = r.json()
+
+    assert len(hits) == 1
+    assert hits[0]['memory']['value']['who'] == 'u2'
+    assert hits[0]['score'] == pytest.approx(1.0)
+
+    r = c.post('/v1/memories/search', json={'query': query, 'type': 'fact'})
+    assert r.json() == []
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from nebula3.common.ttypes import ErrorCode
+from nebula3.Exception import IOErrorException
+
+from app.integrations.kg.nebula_graph import NebulaSessionPool
+from app.models.memory import Memory
+from app.services.kg_service import KGService
+from app.schemas.event import EventCreate
+from tests.fakes import FakeGraph
+
+
+class _Result:
+    def __init__(self, code: int = ErrorCode.SUCCEEDED) -> None:
+        self.code = code
+
+    def is_succeeded(self) -> bool:
+        return self.code == ErrorCode.SUCCEEDED
+
+    def error_code(self) -> int:
+        return self.code
+
+    def error_msg(self) -> str:
+        return f'code {self.code}'
+
+
+class _Session:
+    def __init__(self, fail_with: list) -> None:
+        self.executed: list[str] = []
+        self.released = False
+        self.fail_with = fail_with
+
+    def execute(self, stmt: str) -> _Result:
+        self.executed.append(stmt)
+        if stmt.startswith('USE ') and stmt.count(';') == 1:
+            return _Result()
+        if self.fail_with:
+            err = self.fail_with.pop(0)
+            if isinstance(err, Exception):
+                raise err
+            return _Result(err)
+        return _Result()
+
+    def release(self) -> None:
+        self.released = True
+
+
+class _ConnPool:
+    def __init__(self, fail_with: list | None = None) -> None:
+        self.sessions: list[_Session] = []
+        self.fail_with = fail_with or []
+
+    def get_session(self, user: str, password: str) -> _Session:
+        sess = _Session(self.fail_with)
+        self.sessions.append(sess)
+        return sess
+
+
+def test_sessions_are_reused_and_use_is_prefixed() -> None:
+    conn = _ConnPool()
+    pool = NebulaSessionPool(conn, 'memkg', size=4)
+
+    for _ in range(3):
+        pool.execute('FETCH PROP ON * "x" YIELD vertex AS v;')
+
+    assert len(conn.sessions) == 1
+    queries = conn.sessions[0].executed[1:]
+    assert queries == ['USE memkg; FETCH PROP ON * "x" YIELD vertex AS v;'] * 3
+
+
+def test_dead_session_is_replaced_and_retried_once() -> None:
+    # outcomes of successive data requests, in order
+    conn = _ConnPool(
+        fail_with=[
+            IOErrorException(IOErrorException.E_CONNECT_BROKEN, 'gone'),
+            ErrorCode.SUCCEEDED,
+            ErrorCode.E_SESSION_INVALID,
+        ]
+    )
+    pool = NebulaSessionPool(conn, 'memkg', size=2)
+
+    pool.execute('A;')  # IO error -> new session succeeds
+    pool.execute('B;')  # expired session -> new session succeeds
+
+    assert len(conn.sessions) == 3
+    assert conn.sessions[0].released and conn.sessions[1].released
+    assert pool._created == 1
+
+    pool.close()
+    assert conn.sessions[2].released
+
+
+def test_upsert_memory_is_one_graph_request() -> None:
+    graph = FakeGraph()
+    mem = Memory(id=7, type='preference', scope='profile', key='pref.tools', value={'x': 'fastapi'}, confidence=0.9)
+
+    KGService(graph=graph).upsert_memory(mem, EventCreate(actor_type='user', actor_id='u1', text='t'))
+
+    assert graph.requests == 1
+    assert ('actor:user:u1', 'HAS_MEMORY', 'memory:7') in graph.edges
+    assert ('memory:7', 'ABOUT', 'entity:tool:fastapi') in graph.edges
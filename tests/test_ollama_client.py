@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.api import deps
+from app.core.config import settings
+from app.integrations.llm.json_stream import JSONStreamScanner
+from app.integrations.llm.ollama_client import LLMJSONError, OllamaClient
+
+
+def _chat(content: str) -> dict:
+    return {'message': {'role': 'assistant', 'content': content}}
+
+
+def test_parse_content_recovers_json_snippet() -> None:
+    assert OllamaClient._parse_content(_chat('Sure! {"memories": []} hope that helps')) == {'memories': []}
+    with pytest.raises(LLMJSONError):
+        OllamaClient._parse_content(_chat('no json here'))
+
+
+def test_session_is_pooled_with_retries(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'ollama_pool_size', 7)
+    monkeypatch.setattr(settings, 'ollama_max_retries', 3)
+
+    adapter = OllamaClient().session.get_adapter('http://localhost:11434/api/chat')
+    assert adapter._pool_maxsize == 7
+    assert adapter.max_retries.total == 3
+    assert 503 in adapter.max_retries.status_forcelist
+
+
+def test_agenerate_json_retries_5xx_and_keeps_calls_in_flight(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'ollama_retry_backoff_s', 0.0)
+    calls: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        prompt = json.loads(request.content)['messages'][1]['content']
+        calls.append(prompt)
+        if calls.count(prompt) == 1:
+            return httpx.Response(503)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=_chat(json.dumps({'echo': prompt})))
+
+    client = OllamaClient(async_transport=httpx.MockTransport(handler))
+
+    async def run() -> list:
+        try:
+            return await asyncio.gather(*(client.agenerate_json('sys', f'p{i}') for i in range(20)))
+        finally:
+            await client.aclose()
+
+    loop = asyncio.new_event_loop()
+    try:
+        t0 = loop.time()
+        out = loop.run_until_complete(run())
+        elapsed = loop.time() - t0
+    finally:
+        loop.close()
+
+    assert out == [{'echo': f'p{i}'} for i in range(20)]
+    assert len(calls) == 40
+    # 20 calls x 50ms would be 1s if they ran one after another
+    assert elapsed < 0.5
+
+
+def test_json_stream_scanner_detects_completion_and_garbage() -> None:
+    s = JSONStreamScanner()
+    for chunk in ['  {"memories": [{"key": "a}\\"b", ', '"n": -1.5e3, "ok": true}]', '}', ' trailing']:
+        s.feed(chunk)
+    assert s.complete and not s.invalid
+    assert json.loads(s.text()) == {'memories': [{'key': 'a}"b', 'n': -1.5e3, 'ok': True}]}
+
+    bad = JSONStreamScanner()
+    bad.feed('Sure, here is')
+    assert bad.invalid and not bad.complete
+
+    unbalanced = JSONStreamScanner()
+    unbalanced.feed('{"memories": [}')
+    assert unbalanced.invalid
+
+
+def test_stream_stops_reading_once_object_is_complete(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'ollama_stream', True)
+    pulled: list[str] = []
+
+    async def chunks():
+        for piece in ['{"memories"', ': []}', ' and then the model keeps rambling', ' forever']:
+            pulled.append(piece)
+            yield (json.dumps({'message': {'content': piece}, 'done': False}) + '\n').encode()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        assert body['stream'] is True and body['format'] == 'json'
+        assert body['options']['num_predict'] == settings.ollama_num_predict
+        return httpx.Response(200, content=chunks())
+
+    client = OllamaClient(async_transport=httpx.MockTransport(handler))
+
+    async def run():
+        try:
+            return await client.agenerate_json('sys', 'user')
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == {'memories': []}
+    assert pulled[-1] == ': []}'
+
+
+def test_stream_aborts_on_output_that_cannot_be_json(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'ollama_stream', True)
+
+    async def chunks():
+        for piece in ['I think', ' the answer is {"memories": []}']:
+            yield (json.dumps({'message': {'content': piece}, 'done': False}) + '\n').encode()
+
+    client = OllamaClient(async_transport=httpx.MockTransport(lambda r: httpx.Response(200, content=chunks())))
+
+    async def run():
+        try:
+            return await client.agenerate_json('sys', 'user')
+        finally:
+            await client.aclose()
+
+    with pytest.raises(LLMJSONError):
+        asyncio.run(run())
+
+
+def test_async_clients_are_per_loop_and_closed_on_shutdown(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = OllamaClient(
+        async_transport=httpx.MockTransport(lambda r: httpx.Response(200, json=_chat('{"memories": []}')))
+    )
+    monkeypatch.setattr(deps, '_memory_svc', SimpleNamespace(llm=client))
+
+    async def run() -> httpx.AsyncClient:
+        await client.agenerate_json('sys', 'user')
+        http = client._async_client()
+        # the lifespan shutdown path
+        await deps.aclose_services()
+        return http
+
+    first = asyncio.run(run())
+    second = asyncio.run(run())
+
+    assert first is not second
+    assert first.is_closed and second.is_closed
+    assert len(client._async_clients) == 0
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import grpc
+import pytest
+from qdrant_client import QdrantClient
+
+from app.core.config import settings
+from app.integrations.vector.qdrant_db import QdrantVectorDB, _is_missing_collection
+from tests.fakes import FakeEmbedder
+
+
+class _CountingClient:
+    """I wrap the local (in-process) Qdrant client and count requests per method."""
+
+    def __init__(self) -> None:
+        self.inner = QdrantClient(location=':memory:')
+        self.calls: dict[str, int] = {}
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.inner, name)
+        if not callable(attr):
+            return attr
+
+        def wrapped(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return attr(*args, **kwargs)
+
+        return wrapped
+
+
+@pytest.fixture()
+def vdb(monkeypatch: pytest.MonkeyPatch) -> QdrantVectorDB:
+    monkeypatch.setattr(settings, 'qdrant_collection', 'bulk_ops_test')
+    monkeypatch.setattr(settings, 'qdrant_batch_size', 4)
+    vdb = QdrantVectorDB(embedder=FakeEmbedder())
+    vdb.client = _CountingClient()
+    return vdb
+
+
+def test_many_ops_are_chunked_by_batch_size(vdb: QdrantVectorDB) -> None:
+    emb = vdb.embedder
+    points = [(i, emb.embed(f'm{i}'), {'memory_id': i, 'key': f'k{i}'}) for i in range(1, 11)]
+
+    vdb.upsert_many(points, wait=False)
+    vdb.set_payload_many([(i, {'checked': True}) for i in range(1, 11)])
+    got = vdb.retrieve_many(list(range(1, 13)), with_vectors=True)
+
+    calls = vdb.client.calls
+    assert calls['upsert'] == 3
+    assert calls['batch_update_points'] == 3
+    assert calls['retrieve'] == 3
+
+    assert sorted(got) == list(range(1, 11))
+    assert got[3]['payload'] == {'memory_id': 3, 'key': 'k3', 'checked': True}
+    assert len(got[3]['vector']) == emb.dim
+    assert vdb.missing_points([1, 5, 11, 12]) == [11, 12]
+
+
+class _RpcNotFound(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.NOT_FOUND
+
+
+class _RpcUnavailable(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.UNAVAILABLE
+
+
+def test_grpc_not_found_counts_as_missing_collection() -> None:
+    assert _is_missing_collection(_RpcNotFound())
+    assert not _is_missing_collection(_RpcUnavailable())
+    assert not _is_missing_collection(RuntimeError('boom'))
+
+
+def test_search_many_batches_queries(vdb: QdrantVectorDB) -> None:
+    emb = vdb.embedder
+    vdb.upsert_many([(i, emb.embed(f'm{i}'), {'memory_id': i}) for i in range(1, 6)])
+
+    queries = [emb.embed(f'm{i}') for i in (1, 2, 3, 4, 5)] + [emb.embed('something else')]
+    hits = vdb.search_many(queries, limit=1, min_score=0.99)
+
+    assert vdb.client.calls['search_batch'] == 2
+    assert [h[0]['payload']['memory_id'] if h else None for h in hits] == [1, 2, 3, 4, 5, None]
+
+
+def test_search_many_treats_batch_size_zero_as_one(vdb: QdrantVectorDB) -> None:
+    emb = vdb.embedder
+    vdb.upsert_many([(i, emb.embed(f'm{i}'), {'memory_id': i}) for i in range(1, 4)])
+    vdb.batch_size = 0
+
+    hits = vdb.search_many([emb.embed(f'm{i}') for i in (1, 2, 3)], limit=1, min_score=0.99)
+
+    assert vdb.client.calls['search_batch'] == 3
+    assert [h[0]['payload']['memory_id'] for h in hits] == [1, 2, 3]
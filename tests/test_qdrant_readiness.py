@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from app.integrations.vector.base import Embedder
+from app.integrations.vector.qdrant_db import QdrantVectorDB
+
+
+class _FakeEmbedder(Embedder):
+    model_name = 'fake'
+    dim = 2
+
+    def embed(self, text: str) -> list[float]:
+        return [1.0, 0.0]
+
+
+class _FakeClient:
+    """I mimic just enough of QdrantClient to count round trips."""
+
+    def __init__(self) -> None:
+        self.collections: set[str] = set()
+        self.get_collections_calls = 0
+        self.create_calls = 0
+        self.payload_indexes: set[tuple[str, str]] = set()
+
+    def get_collections(self):
+        self.get_collections_calls += 1
+        return SimpleNamespace(collections=[SimpleNamespace(name=n) for n in self.collections])
+
+    def get_aliases(self):
+        return SimpleNamespace(aliases=[])
+
+    def create_collection(self, collection_name, **kwargs):
+        self.create_calls += 1
+        self.collections.add(collection_name)
+
+    def create_payload_index(self, collection_name, field_name, **kwargs):
+        self.payload_indexes.add((collection_name, field_name))
+
+    def retrieve(self, collection_name, ids, **kwargs):
+        if collection_name not in self.collections:
+            raise UnexpectedResponse(404, 'Not Found', b'{"status": {"error": "Not found: Collection"}}', {})
+        return []
+
+
+def _vdb() -> tuple[QdrantVectorDB, _FakeClient]:
+    vdb = QdrantVectorDB(embedder=_FakeEmbedder())
+    client = _FakeClient()
+    vdb.client = client
+    return vdb, client
+
+
+def test_readiness_is_checked_once() -> None:
+    vdb, client = _vdb()
+
+    for _ in range(5):
+        vdb.get('1')
+
+    assert client.get_collections_calls == 1
+    assert client.create_calls == 1
+
+
+def test_missing_collection_invalidates_and_recreates() -> None:
+    vdb, client = _vdb()
+    vdb.get('1')
+
+    # someone drops the collection behind our back
+    client.collections.clear()
+
+    assert vdb.get('1') is None
+    assert client.get_collections_calls == 2
+    assert client.create_calls == 2
+
+
+def test_dedup_fields_get_keyword_indexes() -> None:
+    vdb, client = _vdb()
+    vdb.get('1')
+
+    assert client.payload_indexes == {(vdb.collection, f) for f in ('key', 'type', 'scope', 'actor_type', 'actor_id')}
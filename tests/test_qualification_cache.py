@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from typing import Generator
+
+import pytest
+
+from app.core.config import settings
+from app.integrations.llm import cache as qcache
+from app.integrations.llm.cache import (
+    InMemoryQualificationBackend,
+    QualificationCache,
+    SqliteQualificationBackend,
+)
+from app.schemas.llm import QualifiedMemory
+from tests.fakes import FakeLLM
+
+PREF = {
+    'memories': [
+        {'type': 'preference', 'scope': 'profile', 'key': 'preference.drink', 'value': {'likes': 'tea'},
+         'confidence': 0.9},
+    ]
+}
+
+
+def _key(text: str, payload: dict | None = None) -> str:
+    return qcache.qualification_key('m', actor_type='user', actor_id='u1', text=text, payload=payload)
+
+
+@pytest.fixture()
+def fresh_fingerprint() -> Generator[None, None, None]:
+    # qualifier_fingerprint() is memoized; tests that patch the prompts must not leak their hash
+    qcache.qualifier_fingerprint.cache_clear()
+    yield
+    qcache.qualifier_fingerprint.cache_clear()
+
+
+def test_key_normalizes_whitespace_and_payload_order() -> None:
+    assert _key('remember  I like\n tea ') == _key('remember I like tea')
+    assert _key(' remember I like tea', {'a': 1, 'b': 2}) == _key('remember I like tea', {'b': 2, 'a': 1})
+    assert _key('remember I like tea') != _key('remember I like coffee')
+
+
+def test_prompt_change_invalidates_keys(monkeypatch: pytest.MonkeyPatch, fresh_fingerprint: None) -> None:
+    before = _key('hello')
+    monkeypatch.setattr(qcache, 'MEMORY_QUALIFIER_SYSTEM', qcache.MEMORY_QUALIFIER_SYSTEM + '\n- new rule')
+    qcache.qualifier_fingerprint.cache_clear()
+    assert _key('hello') != before
+
+
+def test_memory_backend_ttl_and_lru(monkeypatch: pytest.MonkeyPatch) -> None:
+    backend = InMemoryQualificationBackend(max_entries=2, ttl_s=10)
+    for k in ('a', 'b', 'c'):
+        backend.set(k, k)
+    assert backend.get('a') is None and backend.get('c') == 'c'
+
+    now = qcache.time.monotonic()
+    monkeypatch.setattr(qcache.time, 'monotonic', lambda: now + 11)
+    assert backend.get('c') is None
+
+
+def test_sqlite_backend_survives_reopen(tmp_path) -> None:
+    path = str(tmp_path / 'q.sqlite3')
+    mems = [QualifiedMemory.model_validate(PREF['memories'][0])]
+
+    c1 = QualificationCache(SqliteQualificationBackend(path, max_entries=10, ttl_s=60), model='m')
+    c1.put('k', mems)
+    c1.backend.close()
+
+    c2 = QualificationCache(SqliteQualificationBackend(path, max_entries=10, ttl_s=60), model='m')
+    assert c2.get('k') == mems
+    assert c2.get('other') is None
+    assert c2.metrics()['hit_rate'] == 0.5
+
+
+def test_repeated_events_call_llm_once(monkeypatch: pytest.MonkeyPatch, make_memory_svc) -> None:
+    monkeypatch.setattr(settings, 'use_llm_qualifier', True)
+    monkeypatch.setattr(settings, 'qualification_cache_backend', 'memory')
+    llm = FakeLLM({'tea': PREF})
+    svc = make_memory_svc(llm)
+
+    first = svc.qualify(actor_type='user', actor_id='u1', text='remember I like tea', payload=None)
+    again = svc.qualify(actor_type='user', actor_id='u1', text='remember I  like tea ', payload={})
+
+    assert llm.calls == 1
+    assert first == again
+    assert svc.qualification_cache.metrics()['hits'] == 1
+
+
+def test_user_prompt_template_change_invalidates_keys(monkeypatch: pytest.MonkeyPatch, fresh_fingerprint: None) -> None:
+    before = _key('hello', {'a': 1})
+    real = qcache.build_memory_qualifier_user_prompt
+    monkeypatch.setattr(qcache, 'build_memory_qualifier_user_prompt', lambda **kw: real(**kw) + '\nBe brief.')
+    assert _key('hello', {'a': 1}) == before  # hashed once per process
+
+    qcache.qualifier_fingerprint.cache_clear()
+    assert _key('hello', {'a': 1}) != before
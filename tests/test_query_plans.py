@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+from sqlalchemy import create_engine, delete
+
+import app.models  # noqa: F401
+from app.db.base import Base
+from app.models.event import Event
+from app.models.memory import Memory
+from db_script.explain_indexes import check, seed
+
+
+def _mysql_tests_enabled() -> bool:
+    return os.getenv('RUN_MYSQL_TESTS', 'false').lower() in ('1', 'true', 'yes')
+
+
+def _assert_plans(engine) -> None:
+    bad = [r for r in check(engine) if not r.ok]
+    assert not bad, '\n'.join(f'{r.name}: used={r.used} expected={r.expected} plan={r.plan}' for r in bad)
+
+
+def test_hot_queries_use_indexes_sqlite(tmp_path) -> None:
+    engine = create_engine(f'sqlite+pysqlite:///{tmp_path / "plans.db"}')
+    Base.metadata.create_all(bind=engine)
+    seed(engine, 3_000)
+
+    _assert_plans(engine)
+
+
+@pytest.mark.skipif(not _mysql_tests_enabled(), reason='Set RUN_MYSQL_TESTS=true (and MYSQL_TEST_URL) to EXPLAIN on MySQL.')
+def test_hot_queries_use_indexes_mysql(mysql_engine) -> None:
+    seed(mysql_engine, 20_000)
+    try:
+        _assert_plans(mysql_engine)
+    finally:
+        with mysql_engine.begin() as conn:
+            conn.execute(delete(Memory))
+            conn.execute(delete(Event))
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import pytest
+from qdrant_client import QdrantClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401
+from app.db.base import Base
+from app.integrations.vector.qdrant_db import QdrantVectorDB
+from app.models.event import Event
+from app.models.memory import Memory
+from app.services.reindex_service import ReindexCheckpoint, ReindexService
+from tests.fakes import FakeEmbedder
+
+
+@pytest.fixture()
+def env(tmp_path):
+    engine = create_engine(
+        'sqlite+pysqlite:///:memory:',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Event), [{'actor_type': 'user', 'actor_id': 'u1', 'text': 't', 'payload': {}}])
+        conn.execute(
+            insert(Memory),
+            [
+                {'type': 'fact', 'scope': 'profile', 'key': f'k{i}', 'value': {'i': i}, 'confidence': 0.5,
+                 'assertion_count': 0, 'decay': 0.0, 'event_id': 1}
+                for i in range(25)
+            ],
+        )
+
+    client = QdrantClient(location=':memory:')
+
+    def vdb_factory(emb, name):
+        vdb = QdrantVectorDB(embedder=emb, collection=name)
+        vdb.client = client
+        return vdb
+
+    def job(**kwargs) -> ReindexService:
+        return ReindexService(
+            sessionmaker(bind=engine),
+            embedder=FakeEmbedder(),
+            alias='reindex_test',
+            checkpoint_path=str(tmp_path / 'cp.json'),
+            batch_rows=10,
+            vdb_factory=vdb_factory,
+            **kwargs,
+        )
+
+    return job, vdb_factory, tmp_path / 'cp.json'
+
+
+def test_reindex_resumes_and_swaps_alias(env, monkeypatch: pytest.MonkeyPatch) -> None:
+    job, vdb_factory, cp_path = env
+
+    # the pre-alias deployment: a real collection under the name the app uses
+    legacy = vdb_factory(FakeEmbedder(), 'reindex_test')
+    legacy.ensure_ready()
+
+    # crash on the second batch
+    real_upsert = QdrantVectorDB.upsert_many
+    calls = {'n': 0}
+
+    def flaky(self, points, **kwargs):
+        calls['n'] += 1
+        if calls['n'] == 2:
+            raise RuntimeError('qdrant went away')
+        return real_upsert(self, points, **kwargs)
+
+    monkeypatch.setattr(QdrantVectorDB, 'upsert_many', flaky)
+    with pytest.raises(RuntimeError):
+        job().run()
+
+    cp = ReindexCheckpoint.load(str(cp_path))
+    assert (cp.last_id, cp.rows, cp.done) == (10, 10, False)
+
+    # resumes after id 10, finishes, but refuses to delete the legacy collection on its own
+    monkeypatch.setattr(QdrantVectorDB, 'upsert_many', real_upsert)
+    with pytest.raises(RuntimeError, match='not an alias'):
+        job().run()
+    assert ReindexCheckpoint.load(str(cp_path)).rows == 25
+    assert calls['n'] == 2
+
+    report = job().run(replace_collection=True)
+    assert report.errors == []
+    assert (report.rows, report.resumed_from, report.swapped) == (25, 25, True)
+    assert report.target == cp.target
+
+    # the app keeps using the alias name; it now resolves to the rebuilt collection
+    app_vdb = vdb_factory(FakeEmbedder(), 'reindex_test')
+    assert app_vdb.alias_target('reindex_test') == report.target
+    assert app_vdb.count() == 25
+    assert app_vdb.get(7)['payload']['actor_id'] == 'u1'
+
+    assert ReindexCheckpoint.load(str(cp_path)).done
+
+
+def test_batch_rows_respect_memory_budget() -> None:
+    # 1 MiB budget with 1024-dim vectors: (1024 * 32 + 4096) bytes per row -> 28 rows
+    assert ReindexService.rows_for_budget(1024, 1, 5000) == 28
+    assert ReindexService.rows_for_budget(32, 1024, 500) == 500
+
+
+def test_replacing_a_collection_under_a_running_app_fails_loudly(env, monkeypatch: pytest.MonkeyPatch) -> None:
+    job, vdb_factory, _ = env
+    app_vdb = vdb_factory(FakeEmbedder(), 'reindex_test')
+    app_vdb.ensure_ready()
+
+    real_delete = app_vdb.client.delete_collection
+
+    def delete_then_app_recreates(collection_name, **kwargs):
+        real_delete(collection_name=collection_name, **kwargs)
+        # a request hits the 404 and ensure_ready() lazily recreates the collection
+        app_vdb.invalidate()
+        app_vdb.ensure_ready()
+
+    monkeypatch.setattr(app_vdb.client, 'delete_collection', delete_then_app_recreates)
+    with pytest.raises(RuntimeError, match='Stop the app'):
+        job().run(replace_collection=True)
+
+    # with the app stopped, re-running finishes the swap
+    monkeypatch.setattr(app_vdb.client, 'delete_collection', real_delete)
+    report = job().run(replace_collection=True)
+    assert report.swapped and app_vdb.alias_target('reindex_test') == report.target
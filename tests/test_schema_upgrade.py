@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401
+from app.db.base import Base
+from app.db.upgrade import upgrade_schema
+from app.models.memory import Memory
+
+
+def test_existing_memories_table_gets_content_hash() -> None:
+    engine = create_engine('sqlite+pysqlite:///:memory:', poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    # a database created before the column existed
+    with engine.begin() as conn:
+        conn.execute(text('DROP INDEX ix_memories_content_hash'))
+        conn.execute(text('ALTER TABLE memories DROP COLUMN content_hash'))
+
+    assert upgrade_schema(engine) == ['memories.content_hash', 'memories.ix_memories_content_hash']
+    assert 'content_hash' in {c['name'] for c in inspect(engine).get_columns('memories')}
+    assert 'ix_memories_content_hash' in {i['name'] for i in inspect(engine).get_indexes('memories')}
+
+    # idempotent, and ORM queries on Memory work again
+    assert upgrade_schema(engine) == []
+    with Session(engine) as db:
+        assert db.scalars(select(Memory)).all() == []